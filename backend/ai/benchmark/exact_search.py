@@ -0,0 +1,156 @@
+import argparse
+import gc
+import sys
+import time
+
+from backend.ai.benchmark.retrieval import parse_collection
+from backend.ai.benchmark.utils import (
+    summarize_latencies,
+    get_rss_mb,
+    save_results,
+    load_baseline,
+    compare_with_baseline,
+    report_regressions,
+    load_queries,
+)
+from backend.ai.vectordb.exact import ExactVectorStore, EXACT_DTYPES
+from backend.ai.vectordb.quantization import QUANTIZATIONS
+from backend.ai.vectordb.retrieval import embed_queries, search_by_vectors
+from backend.ai.vectordb.utils import load_vectordb
+from backend.common.constants import SEARCH_BACKEND_CHROMA, SEARCH_BACKEND_EXACT
+from backend.utils.logger import get_logger
+
+logger = get_logger()
+
+"""
+Exact search backend benchmark. Searches the same query embeddings through Chroma and through
+ExactVectorStore in float32 and float16, optionally with int8 or PQ first-stage search, and
+reports per-query and whole-batch search latency, memory and recall@k against exact float32
+search. Query embedding is done once up front and is not part of the timings.
+
+Usage:
+    python -m backend.ai.benchmark.exact_search --collections LaBSE:500:50 BAAI/bge-m3:1000:100 --qa-batch <batch_id> --quantization int8 pq
+"""
+
+DEFAULT_K = 10
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+
+
+def measure_backend(db, vectors, k: int, truth: list[list[str]] | None) -> tuple[dict, list[list[str]]]:
+    """Time one search per query and one batched search of all queries, returns the metrics and the found chunk ids."""
+    per_query = []
+    found = []
+    for vector in vectors:
+        start = time.perf_counter()
+        result = search_by_vectors(db, vector[None, :], k)[0]
+        per_query.append(time.perf_counter() - start)
+        found.append([document.id for document, _ in result])
+
+    start = time.perf_counter()
+    search_by_vectors(db, vectors, k)
+    batch_seconds = time.perf_counter() - start
+
+    metrics = {
+        "search": summarize_latencies(per_query),
+        "batch_search_ms": batch_seconds * 1000,
+        "batch_qps": len(vectors) / batch_seconds if batch_seconds else 0.0,
+    }
+    if truth is not None:
+        metrics["recall_at_k"] = sum(len(set(ids) & set(expected)) / len(expected) for ids, expected in zip(found, truth)) / len(truth)
+    return metrics, found
+
+
+def benchmark_collection(spec: str, queries: list[str], k: int, quantizations: list[str], subvectors: int | None) -> dict:
+    embedding_model, chunk_size, chunk_overlap = parse_collection(spec)
+    db = load_vectordb(embedding_model, chunk_size, chunk_overlap, search_backend=SEARCH_BACKEND_CHROMA)
+    if db is None:
+        raise ValueError(f"Vector DB {spec} could not be loaded")
+    vectors = embed_queries(db, queries)
+    k = min(k, db._collection.count())
+    logger.info(f"Benchmarking search backends of {spec} with {len(queries)} queries (k={k})")
+
+    results = {}
+    truth = None
+    # Exact float32 first, it is the ground truth of the other backends
+    for dtype in EXACT_DTYPES:
+        gc.collect()
+        rss_before = get_rss_mb()
+        start = time.perf_counter()
+        exact = ExactVectorStore.from_chroma(db, dtype)
+        load_time = time.perf_counter() - start
+        metrics, found = measure_backend(exact, vectors, k, truth)
+        truth = truth or found
+        results[f"{SEARCH_BACKEND_EXACT}_{dtype}"] = {
+            "load_time_s": load_time,
+            "memory_mb": get_rss_mb() - rss_before,
+            "matrix_mb": exact.memory_mb(),
+            **metrics
+        }
+        del exact
+
+    for quantization in quantizations:
+        exact = ExactVectorStore.from_chroma(db, "float32")
+        start = time.perf_counter()
+        quantizer = exact.quantize(quantization, subvectors)
+        train_time = time.perf_counter() - start
+        metrics, _ = measure_backend(exact, vectors, k, truth)
+        results[f"{SEARCH_BACKEND_EXACT}_{quantization}"] = {
+            "train_time_s": train_time,
+            "codes_mb": quantizer.nbytes / (1024 * 1024),
+            **metrics
+        }
+        logger.info(f"{spec} {quantization}: codes are {exact.memory_mb() * 1024 * 1024 / quantizer.nbytes:.1f}x smaller than float32")
+        del exact
+
+    # Warm up the HNSW index before timing
+    search_by_vectors(db, vectors[:1], k)
+    metrics, _ = measure_backend(db, vectors, k, truth)
+    results[SEARCH_BACKEND_CHROMA] = metrics
+
+    for name, metrics in results.items():
+        logger.info(f"{spec} {name}: p50 {metrics['search']['p50_ms']:.2f}ms per query, "
+                    f"batch {metrics['batch_search_ms']:.1f}ms, recall@{k} {metrics.get('recall_at_k', 1.0):.3f}")
+    del db
+    gc.collect()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the exact search backend with Chroma")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--qa-batch", help="QA batch id whose queries are searched")
+    source.add_argument("--queries-file", help="JSON file with a list of {query, answer} pairs")
+    parser.add_argument("--collections", nargs="+", required=True,
+                        help="Vector DBs as embedding_model:chunk_size:chunk_overlap")
+    parser.add_argument("--k", type=int, default=DEFAULT_K, help="Chunks retrieved per query")
+    parser.add_argument("--quantization", nargs="*", choices=QUANTIZATIONS, default=[],
+                        help="Quantized first-stage searches to measure, rescored in float32")
+    parser.add_argument("--subvectors", type=int, help="PQ subvectors, dimension / 16 by default")
+    parser.add_argument("--output", help="Where to write the results JSON")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    queries = load_queries(args.qa_batch, args.queries_file)
+    if not queries:
+        raise ValueError("No queries to benchmark")
+
+    results = {
+        "benchmark": "exact_search",
+        "qa_batch": args.qa_batch or args.queries_file,
+        "query_count": len(queries),
+        "k": args.k,
+        "metrics": {spec: benchmark_collection(spec, queries, args.k, args.quantization, args.subvectors) for spec in args.collections},
+    }
+
+    baseline = load_baseline(args.baseline) if args.baseline else None
+    regressions = compare_with_baseline(results, baseline, args.threshold) if baseline else []
+    results["regressions"] = regressions
+    report_regressions(regressions)
+
+    save_results(results, "exact_search", args.output)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+import argparse
+import gc
+import itertools
+import sys
+import time
+
+import numpy as np
+from backend.ai.benchmark.retrieval import parse_collection
+from backend.ai.benchmark.utils import (
+    summarize_latencies,
+    get_rss_mb,
+    save_results,
+    load_baseline,
+    compare_with_baseline,
+    report_regressions,
+    load_queries,
+)
+from backend.ai.vectordb.index_params import get_setting_name, to_collection_metadata
+from backend.ai.vectordb.retrieval import embed_queries
+from backend.ai.vectordb.utils import load_vectordb
+from backend.common.config import (
+    GLOBAL_VECTOR_DB_INITIAL_EMBEDDING_MODEL,
+    GLOBAL_VECTOR_DB_INITIAL_CHUNK_SIZE,
+    GLOBAL_VECTOR_DB_INITIAL_CHUNK_OVERLAP,
+    VECTOR_DB_DEFAULT_INDEX_PARAMS,
+)
+from backend.common.constants import HNSW_SPACES, SEARCH_BACKEND_CHROMA
+from backend.utils.logger import get_logger
+
+logger = get_logger()
+
+"""
+HNSW parameter sweep for one vector DB. Reads the stored chunk embeddings once, rebuilds the
+index in memory for every combination of space, M, construction_ef and search_ef, and reports
+recall@k against exact search, query latency, build time and memory. The recommended setting
+is the fastest one that reaches the target recall; pass it as index_params when building.
+
+Usage:
+    python -m backend.ai.benchmark.hnsw_sweep --collection LaBSE:500:50 --qa-batch <batch_id> --m 8 16 32 --search-ef 10 50 100
+"""
+
+DEFAULT_K = 10
+DEFAULT_TARGET_RECALL = 0.95
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+
+
+def exact_neighbors(embeddings: np.ndarray, queries: np.ndarray, space: str, k: int) -> np.ndarray:
+    """Indices of the k nearest stored embeddings of every query by brute force."""
+    if space == "cosine":
+        embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    if space == "l2":
+        distances = (queries ** 2).sum(axis=1)[:, None] - 2 * queries @ embeddings.T + (embeddings ** 2).sum(axis=1)[None, :]
+    else:
+        distances = -(queries @ embeddings.T)
+    return np.argsort(distances, axis=1)[:, :k]
+
+
+def measure_setting(client, ids: list[str], embeddings: np.ndarray, queries: np.ndarray, truth: np.ndarray, index_params: dict, k: int) -> dict:
+    """Build an in-memory index with the given parameters and query it once per query."""
+    name = f"sweep_{get_setting_name(index_params)}"
+    gc.collect()
+    rss_before = get_rss_mb()
+
+    start = time.perf_counter()
+    collection = client.create_collection(name=name, metadata=to_collection_metadata(index_params))
+    batch_size = client.get_max_batch_size()
+    for offset in range(0, len(ids), batch_size):
+        collection.add(ids=ids[offset:offset + batch_size], embeddings=embeddings[offset:offset + batch_size])
+    build_seconds = time.perf_counter() - start
+    rss_after = get_rss_mb()
+
+    position = {chunk_id: i for i, chunk_id in enumerate(ids)}
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=[query.tolist()], n_results=k, include=[])
+        latencies.append(time.perf_counter() - start)
+        found = {position[chunk_id] for chunk_id in result["ids"][0]}
+        recalls.append(len(found & set(expected.tolist())) / len(expected))
+
+    client.delete_collection(name)
+    return {
+        "recall_at_k": float(np.mean(recalls)),
+        "latency": summarize_latencies(latencies),
+        "build_seconds": build_seconds,
+        "index_memory_mb": rss_after - rss_before,
+    }
+
+
+def recommend(settings: dict, target_recall: float) -> str | None:
+    """Fastest setting by p50 latency that reaches the target recall, else the one with the best recall."""
+    if not settings:
+        return None
+    reaching = {name: result for name, result in settings.items() if result["recall_at_k"] >= target_recall}
+    if reaching:
+        return min(reaching, key=lambda name: reaching[name]["latency"]["p50_ms"])
+    return max(settings, key=lambda name: settings[name]["recall_at_k"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep HNSW parameters of a vector DB for recall, latency and memory")
+    parser.add_argument(
+        "--collection",
+        default=f"{GLOBAL_VECTOR_DB_INITIAL_EMBEDDING_MODEL}:{GLOBAL_VECTOR_DB_INITIAL_CHUNK_SIZE}:{GLOBAL_VECTOR_DB_INITIAL_CHUNK_OVERLAP}",
+        help="Vector DB as embedding_model:chunk_size:chunk_overlap"
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--qa-batch", help="QA batch id whose queries are searched")
+    source.add_argument("--queries-file", help="JSON file with a list of {query, answer} pairs")
+    parser.add_argument("--k", type=int, default=DEFAULT_K)
+    parser.add_argument("--space", nargs="+", choices=HNSW_SPACES, default=[VECTOR_DB_DEFAULT_INDEX_PARAMS["space"]])
+    parser.add_argument("--m", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--construction-ef", type=int, nargs="+", default=[100, 200])
+    parser.add_argument("--search-ef", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--target-recall", type=float, default=DEFAULT_TARGET_RECALL)
+    parser.add_argument("--output", help="Where to write the results JSON")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    import chromadb
+    from chromadb.config import Settings
+
+    embedding_model, chunk_size, chunk_overlap = parse_collection(args.collection)
+    db = load_vectordb(embedding_model, chunk_size, chunk_overlap, search_backend=SEARCH_BACKEND_CHROMA)
+    if db is None:
+        logger.error(f"Vector DB {args.collection} could not be loaded")
+        return 1
+
+    stored = db._collection.get(include=["embeddings"])
+    ids = stored["ids"]
+    embeddings = np.asarray(stored["embeddings"], dtype=np.float32)
+    queries = embed_queries(db, load_queries(args.qa_batch, args.queries_file))
+    k = min(args.k, len(ids))
+    logger.info(f"Sweeping {args.collection}: {len(ids)} chunks, {len(queries)} queries, k={k}")
+
+    client = chromadb.Client(Settings(anonymized_telemetry=False))
+    truths = {space: exact_neighbors(embeddings, queries, space, k) for space in args.space}
+    index_params_by_name, settings = {}, {}
+    for space, m, construction_ef, search_ef in itertools.product(args.space, args.m, args.construction_ef, args.search_ef):
+        index_params = {"space": space, "M": m, "construction_ef": construction_ef, "search_ef": search_ef}
+        name = get_setting_name(index_params)
+        index_params_by_name[name] = index_params
+        settings[name] = measure_setting(client, ids, embeddings, queries, truths[space], index_params, k)
+        logger.info(f"{name}: recall@{k} {settings[name]['recall_at_k']:.3f}, "
+                    f"p50 {settings[name]['latency']['p50_ms']:.2f}ms, build {settings[name]['build_seconds']:.1f}s")
+
+    recommended = recommend(settings, args.target_recall)
+    results = {
+        "benchmark": "hnsw_sweep",
+        "collection": args.collection,
+        "chunk_count": len(ids),
+        "query_count": len(queries),
+        "k": k,
+        "target_recall": args.target_recall,
+        "recommended": index_params_by_name.get(recommended),
+        "index_params": index_params_by_name,
+        "metrics": settings,
+    }
+    if recommended:
+        logger.info(f"Recommended index parameters for {args.collection}: {index_params_by_name[recommended]}")
+
+    baseline = load_baseline(args.baseline) if args.baseline else None
+    regressions = compare_with_baseline(results, baseline, args.threshold) if baseline else []
+    results["regressions"] = regressions
+    report_regressions(regressions)
+
+    save_results(results, "hnsw_sweep", args.output)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import argparse
+import json
+import subprocess
+import sys
+
+from backend.ai.benchmark.utils import summarize_latencies, save_results, load_baseline, compare_with_baseline, report_regressions
+from backend.utils.logger import get_logger
+
+logger = get_logger()
+
+"""
+Import-time benchmark for API startup. Imports a module in fresh interpreters, reports the wall
+time and which heavy dependencies were loaded eagerly, and lists the slowest imports from
+python -X importtime.
+
+Usage:
+    python -m backend.ai.benchmark.import_time --module backend.web.main --runs 5
+"""
+
+DEFAULT_MODULE = "backend.web.main"
+DEFAULT_RUNS = 5
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+HEAVY_MODULES = ["langchain", "langchain_groq", "langchain_chroma", "langchain_huggingface", "chromadb",
+                 "sentence_transformers", "torch", "neo4j", "pymongo"]
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "heavy": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def measure_import(module: str) -> tuple[dict, list[tuple[int, str]]]:
+    """
+    Import a module in a fresh interpreter.
+
+    Returns:
+        The child's timing and loaded heavy modules, and (cumulative microseconds, module) per import
+    """
+    script = IMPORT_SCRIPT.format(module=module, heavy=HEAVY_MODULES)
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", script], capture_output=True, text=True)
+    if process.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{process.stderr[-2000:]}")
+
+    imports = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented below their parent, keep the indentation to tell them apart
+        imports.append((int(cumulative), name[1:].rstrip()))
+    return json.loads(process.stdout.strip().splitlines()[-1]), imports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the import time of the API entry point")
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--top", type=int, default=15, help="Slowest top-level imports to report")
+    parser.add_argument("--output", help="Where to write the results JSON")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    elapsed = []
+    heavy_modules = []
+    imports = []
+    for _ in range(args.runs):
+        timing, imports = measure_import(args.module)
+        elapsed.append(timing["elapsed"])
+        heavy_modules = timing["heavy"]
+
+    # Top-level packages only, nested imports are already part of their parent's cumulative time
+    top_level = sorted(((cumulative, name) for cumulative, name in imports if not name.startswith(" ")), reverse=True)
+    results = {
+        "benchmark": "import_time",
+        "module": args.module,
+        "metrics": {
+            "import": summarize_latencies(elapsed),
+            "eager_heavy_module_count": len(heavy_modules),
+        },
+        "eager_heavy_modules": heavy_modules,
+        "slowest_imports_ms": {name: cumulative / 1000 for cumulative, name in top_level[:args.top]},
+    }
+    logger.info(f"Import of {args.module}: p50 {results['metrics']['import']['p50_ms']:.0f}ms, "
+                f"eager heavy modules: {', '.join(heavy_modules) or 'none'}")
+
+    baseline = load_baseline(args.baseline) if args.baseline else None
+    regressions = compare_with_baseline(results, baseline, args.threshold) if baseline else []
+    if baseline:
+        # A heavy module that is imported eagerly again is a regression even when the timing noise hides it
+        for name in sorted(set(heavy_modules) - set(baseline.get("eager_heavy_modules", []))):
+            regressions.append({"metric": f"eager_import.{name}", "baseline": 0, "current": 1, "change": 1.0})
+    results["regressions"] = regressions
+    report_regressions(regressions)
+
+    save_results(results, "import_time", args.output)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+import argparse
+import asyncio
+import itertools
+import sys
+import time
+
+import httpx
+from backend.ai.benchmark.utils import summarize_latencies, save_results, load_baseline, compare_with_baseline, report_regressions, load_queries
+from backend.common.constants import LLAMA_3_3_70B_VERSATILE
+from backend.utils.logger import get_logger
+
+logger = get_logger()
+
+"""
+End-to-end load generator for the FastAPI app. Sends requests to /chat or /tests/run at a target
+rate (open loop, so a slow server does not lower the offered load) and reports latency
+percentiles, throughput and error rate. Run the app with LLM_PROVIDER=stub against the stub
+server to measure the web and retrieval stack without Groq quota or network variance.
+
+Usage:
+    python -m backend.ai.llm.stub_server --port 8900
+    LLM_PROVIDER=stub uvicorn backend.web.main:app --port 8000
+    python -m backend.ai.benchmark.load --url http://127.0.0.1:8000 --rps 5 10 20 --duration 30 --qa-batch <batch_id>
+"""
+
+CHAT_TARGET = "chat"
+TESTS_RUN_TARGET = "tests-run"
+DEFAULT_QUERY = "Genel sağlık sigortası primi nasıl hesaplanır?"
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+
+
+def build_request(target: str, query: str, args) -> tuple[str, dict]:
+    if target == TESTS_RUN_TARGET:
+        return "/tests/run", {"test_id": args.test_id}
+    return "/chat", {"llm": args.llm, "query": query, "options": []}
+
+
+async def send_request(client: httpx.AsyncClient, path: str, payload: dict, results: list):
+    start = time.perf_counter()
+    try:
+        response = await client.post(path, json=payload)
+        results.append((response.status_code, time.perf_counter() - start))
+    except httpx.HTTPError as e:
+        results.append((type(e).__name__, time.perf_counter() - start))
+
+
+async def run_load(args, rps: float, queries: list[str]) -> dict:
+    """Offer requests at a fixed rate for the configured duration and wait for every response."""
+    results = []
+    tasks = []
+    query_cycle = itertools.cycle(queries)
+    request_count = int(rps * args.duration)
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        start = time.perf_counter()
+        for i in range(request_count):
+            # Open loop: each request starts on schedule regardless of earlier responses
+            delay = start + i / rps - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            path, payload = build_request(args.target, next(query_cycle), args)
+            tasks.append(asyncio.create_task(send_request(client, path, payload, results)))
+        offered_time = time.perf_counter() - start
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    successes = [latency for status, latency in results if status == 200]
+    status_counts = {}
+    for status, _ in results:
+        status_counts[str(status)] = status_counts.get(str(status), 0) + 1
+
+    summary = {
+        "target_rps": rps,
+        "offered_rps": request_count / offered_time if offered_time else 0.0,
+        "throughput_rps": len(successes) / elapsed if elapsed else 0.0,
+        "error_rate": 1 - len(successes) / len(results) if results else 0.0,
+        "latency": summarize_latencies(successes),
+        "status_count": status_counts,
+    }
+    logger.info(f"{rps} RPS: {summary['throughput_rps']:.1f} ok/s, error rate {summary['error_rate']:.1%}, "
+                f"p50 {summary['latency'].get('p50_ms', 0):.0f}ms, p99 {summary['latency'].get('p99_ms', 0):.0f}ms")
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the FastAPI app at target request rates")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Base URL of the running app")
+    parser.add_argument("--target", choices=[CHAT_TARGET, TESTS_RUN_TARGET], default=CHAT_TARGET)
+    parser.add_argument("--rps", type=float, nargs="+", default=[1.0, 5.0, 10.0], help="Target request rates to step through")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load per rate")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Client timeout per request")
+    parser.add_argument("--max-connections", type=int, default=200)
+    parser.add_argument("--llm", default=LLAMA_3_3_70B_VERSATILE, help="Model sent with /chat requests")
+    parser.add_argument("--test-id", type=int, help="Test case run by the tests-run target")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--qa-batch", help="QA batch id whose queries are sent to /chat")
+    source.add_argument("--queries-file", help="JSON file with a list of {query, answer} pairs")
+    parser.add_argument("--output", help="Where to write the results JSON")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    if args.target == TESTS_RUN_TARGET and args.test_id is None:
+        parser.error("--test-id is required for the tests-run target")
+    queries = load_queries(args.qa_batch, args.queries_file) if (args.qa_batch or args.queries_file) else [DEFAULT_QUERY]
+
+    results = {
+        "benchmark": "load",
+        "target": args.target,
+        "duration_s": args.duration,
+        "metrics": {f"rps_{rps:g}": asyncio.run(run_load(args, rps, queries)) for rps in args.rps},
+    }
+
+    baseline = load_baseline(args.baseline) if args.baseline else None
+    regressions = compare_with_baseline(results, baseline, args.threshold) if baseline else []
+    results["regressions"] = regressions
+    report_regressions(regressions)
+
+    save_results(results, "load", args.output)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+import argparse
+import gc
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.ai.benchmark.utils import (
+    summarize_latencies,
+    get_rss_mb,
+    get_directory_size_mb,
+    save_results,
+    load_baseline,
+    compare_with_baseline,
+    report_regressions,
+    load_queries,
+)
+from backend.ai.vectordb.exact import ExactVectorStore
+from backend.ai.vectordb.utils import load_vectordb
+from backend.common.config import RAG_OPTIONS
+from backend.common.constants import CROSS_ENCODER_OPTION
+from backend.common.paths import RETRIEVAL_BENCHMARK_BASELINE_PATH, construct_db_path
+from backend.utils.logger import get_logger
+
+logger = get_logger()
+
+"""
+Offline retrieval and rerank benchmark. Loads each vector DB config, replays the queries of a
+QA batch against it without any LLM calls and reports load time, memory, retrieval latency,
+QPS under concurrency and cross-encoder throughput.
+
+Usage:
+    python -m backend.ai.benchmark.retrieval --qa-batch <batch_id> --collections LaBSE:500:50 BAAI/bge-m3:1000:100
+"""
+
+DEFAULT_CONCURRENCIES = [1, 4, 8]
+DEFAULT_K = 10
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+
+
+def parse_collection(spec: str) -> tuple[str, int, int]:
+    """Parse a collection given as embedding_model:chunk_size:chunk_overlap."""
+    embedding_model, chunk_size, chunk_overlap = spec.rsplit(":", 2)
+    return embedding_model, int(chunk_size), int(chunk_overlap)
+
+
+def measure_latency(db, queries: list[str], k: int) -> dict:
+    """Time query embedding, vector search and the full similarity search for each query."""
+    embed_latencies, search_latencies, total_latencies = [], [], []
+    for query in queries:
+        start = time.perf_counter()
+        vector = db.embeddings.embed_query(query)
+        embedded = time.perf_counter()
+        db.similarity_search_by_vector(vector, k)
+        searched = time.perf_counter()
+        embed_latencies.append(embedded - start)
+        search_latencies.append(searched - embedded)
+        total_latencies.append(searched - start)
+
+    return {
+        "embedding": summarize_latencies(embed_latencies),
+        "search": summarize_latencies(search_latencies),
+        "retrieval": summarize_latencies(total_latencies),
+    }
+
+
+def measure_qps(db, queries: list[str], k: int, concurrencies: list[int], min_queries: int) -> dict:
+    """Run the queries with several worker counts and report queries per second for each."""
+    workload = queries * max(1, -(-min_queries // len(queries)))
+    results = {}
+    for concurrency in concurrencies:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(lambda query: db.similarity_search(query, k), workload))
+        elapsed = time.perf_counter() - start
+        results[f"concurrency_{concurrency}"] = {"qps": len(workload) / elapsed, "count": len(workload)}
+        logger.info(f"Concurrency {concurrency}: {len(workload) / elapsed:.1f} QPS")
+    return results
+
+
+def measure_rerank(db, queries: list[str], k: int, rerankers: list[str], cross_encoders: dict) -> dict:
+    """Measure cross-encoder latency and pair throughput on the chunks each query retrieves."""
+    from sentence_transformers import CrossEncoder
+
+    candidates = [(query, db.similarity_search(query, k)) for query in queries]
+    results = {}
+    for model_name in rerankers:
+        if model_name not in cross_encoders:
+            start = time.perf_counter()
+            cross_encoders[model_name] = (CrossEncoder(model_name, trust_remote_code=True), time.perf_counter() - start)
+        cross_encoder, model_load_time = cross_encoders[model_name]
+
+        latencies = []
+        pair_count = 0
+        for query, chunks in candidates:
+            pairs = [(query, chunk.page_content) for chunk in chunks]
+            start = time.perf_counter()
+            cross_encoder.predict(pairs)
+            latencies.append(time.perf_counter() - start)
+            pair_count += len(pairs)
+
+        results[model_name] = {
+            "load_time_s": model_load_time,
+            "latency": summarize_latencies(latencies),
+            "pairs_per_second": pair_count / sum(latencies) if latencies else 0.0,
+        }
+        logger.info(f"Reranker {model_name}: {results[model_name]['pairs_per_second']:.1f} pairs/s")
+    return results
+
+
+def benchmark_collection(spec: str, queries: list[str], args, cross_encoders: dict) -> dict:
+    embedding_model, chunk_size, chunk_overlap = parse_collection(spec)
+    logger.info(f"Benchmarking {embedding_model} ({chunk_size}/{chunk_overlap}) with {len(queries)} queries")
+
+    rss_before = get_rss_mb()
+    start = time.perf_counter()
+    db = load_vectordb(embedding_model, chunk_size, chunk_overlap)
+    load_time = time.perf_counter() - start
+    if db is None:
+        raise ValueError(f"Vector DB {spec} could not be loaded")
+
+    # Warm up the embedding model and the index before timing
+    db.similarity_search(queries[0], args.k)
+    rss_loaded = get_rss_mb()
+
+    metrics = {
+        "load_time_s": load_time,
+        "chunk_count": db.count() if isinstance(db, ExactVectorStore) else db._collection.count(),
+        "disk_size_mb": get_directory_size_mb(construct_db_path(embedding_model, chunk_size, chunk_overlap)),
+        "memory_mb": rss_loaded - rss_before,
+        "latency": measure_latency(db, queries, args.k),
+        "throughput": measure_qps(db, queries, args.k, args.concurrency, args.min_queries),
+    }
+    if args.rerankers:
+        metrics["rerank"] = measure_rerank(db, queries, args.k, args.rerankers, cross_encoders)
+
+    # Drop the reference so the next collection is measured from a comparable baseline
+    del db
+    gc.collect()
+    return metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline retrieval and rerank benchmark across vector DB configs")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--qa-batch", help="QA batch id whose queries are replayed")
+    source.add_argument("--queries-file", help="JSON file with a list of {query, answer} pairs")
+    parser.add_argument("--collections", nargs="+", required=True,
+                        help="Vector DBs as embedding_model:chunk_size:chunk_overlap")
+    parser.add_argument("--k", type=int, default=DEFAULT_K, help="Chunks retrieved per query")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=DEFAULT_CONCURRENCIES)
+    parser.add_argument("--min-queries", type=int, default=200, help="Minimum queries per QPS measurement")
+    parser.add_argument("--rerankers", nargs="*", default=RAG_OPTIONS[CROSS_ENCODER_OPTION],
+                        help="Cross-encoder models to measure, none to skip")
+    parser.add_argument("--output", help="Where to write the results JSON")
+    parser.add_argument("--baseline", default=str(RETRIEVAL_BENCHMARK_BASELINE_PATH))
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="Relative change reported as a regression")
+    args = parser.parse_args(argv)
+
+    queries = load_queries(args.qa_batch, args.queries_file)
+    if not queries:
+        raise ValueError("No queries to benchmark")
+
+    cross_encoders = {}
+    results = {
+        "benchmark": "retrieval",
+        "qa_batch": args.qa_batch or args.queries_file,
+        "query_count": len(queries),
+        "k": args.k,
+        "metrics": {spec: benchmark_collection(spec, queries, args, cross_encoders) for spec in args.collections},
+    }
+
+    baseline = load_baseline(args.baseline)
+    regressions = compare_with_baseline(results, baseline, args.threshold) if baseline else []
+    results["regressions"] = regressions
+    report_regressions(regressions)
+
+    save_results(results, "retrieval", args.output)
+    if args.update_baseline:
+        save_results(results, "retrieval", args.baseline)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
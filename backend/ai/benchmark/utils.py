@@ -0,0 +1,130 @@
+import datetime
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import psutil
+from backend.common.paths import BENCHMARK_RESULTS_DIR
+from backend.utils.logger import get_logger
+
+logger = get_logger()
+
+"""
+This file contains helpers shared by the benchmark CLIs: latency summaries, memory readings
+and JSON result files compared against a stored baseline.
+"""
+
+# Metrics where a higher value is an improvement, everything else is treated as lower-is-better
+HIGHER_IS_BETTER_KEYWORDS = ("qps", "throughput", "per_second", "recall", "mrr", "ndcg", "rps")
+
+
+def summarize_latencies(latencies: list[float]) -> dict:
+    """Summarize a list of latencies in seconds as milliseconds."""
+    if not latencies:
+        return {"count": 0}
+    values = np.asarray(latencies) * 1000
+    return {
+        "count": int(values.size),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+    }
+
+
+def load_queries(qa_batch: str | None, queries_file: str | None) -> list[str]:
+    """Load benchmark queries from a QA batch in MongoDB or from a JSON file of QA pairs."""
+    if queries_file:
+        with open(queries_file, "r", encoding="utf-8") as f:
+            return [pair["query"] for pair in json.load(f)]
+
+    from backend.ai.testing.io_utils import load_queries_expected_answers_batch_by_id
+    return [pair["query"] for pair in load_queries_expected_answers_batch_by_id(qa_batch)]
+
+
+def get_rss_mb() -> float:
+    """Resident memory of the current process in MB."""
+    return psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024)
+
+
+def get_directory_size_mb(path: Path) -> float:
+    """Total size of the files under a directory in MB."""
+    total = sum(file.stat().st_size for file in Path(path).rglob("*") if file.is_file())
+    return total / (1024 * 1024)
+
+
+def save_results(results: dict, name: str, output_path: str | None = None) -> Path:
+    """Write benchmark results as JSON, by default into a timestamped file in the results directory."""
+    if output_path is None:
+        BENCHMARK_RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_path = BENCHMARK_RESULTS_DIR / f"{name}_{timestamp}.json"
+    output_path = Path(output_path)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    logger.info(f"Benchmark results saved to {output_path}")
+    return output_path
+
+
+def load_baseline(baseline_path: Path) -> dict | None:
+    if not Path(baseline_path).exists():
+        logger.warning(f"No baseline found at {baseline_path}")
+        return None
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _flatten(data: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare_with_baseline(results: dict, baseline: dict, threshold: float) -> list[dict]:
+    """
+    Compare every numeric metric found in both result sets.
+
+    Args:
+        results: Current benchmark results
+        baseline: Stored baseline results with the same layout
+        threshold: Relative change considered a regression, e.g. 0.2 for 20%
+
+    Returns:
+        List of regressions with the metric name, baseline value, current value and relative change
+    """
+    current = _flatten(results.get("metrics", {}))
+    previous = _flatten(baseline.get("metrics", {}))
+    regressions = []
+    for name, value in current.items():
+        if name not in previous or previous[name] == 0 or name.endswith("count"):
+            continue
+        change = (value - previous[name]) / abs(previous[name])
+        metric_name = name.rsplit(".", 1)[-1]
+        if any(keyword in metric_name for keyword in HIGHER_IS_BETTER_KEYWORDS):
+            change = -change
+        if change > threshold:
+            regressions.append({
+                "metric": name,
+                "baseline": previous[name],
+                "current": value,
+                "change": round(change, 4)
+            })
+    return regressions
+
+
+def report_regressions(regressions: list[dict]) -> None:
+    if not regressions:
+        logger.info("No regressions against the baseline")
+        return
+    for regression in regressions:
+        logger.warning(
+            f"Regression in {regression['metric']}: {regression['baseline']:.3f} -> "
+            f"{regression['current']:.3f} ({regression['change'] * 100:+.1f}% worse)"
+        )
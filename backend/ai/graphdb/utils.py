@@ -1,4 +1,3 @@
-from neo4j import GraphDatabase
 from backend.utils.logger import get_logger
 import os
 
@@ -18,6 +17,7 @@ class Neo4jConnection:
         """Get or create Neo4j driver"""
         if self._driver is None:
             try:
+                from neo4j import GraphDatabase
                 URI = os.getenv("NEO4J_URI")
                 AUTH = (os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD"))
                 self._driver = GraphDatabase.driver(
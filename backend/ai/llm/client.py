@@ -0,0 +1,310 @@
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, CancelledError, wait
+from threading import Event, Lock
+
+import httpx
+from langchain_groq import ChatGroq
+from backend.common.constants import GROQ_PROVIDER, STUB_PROVIDER
+from backend.common.config import (
+    LLM_PROVIDER,
+    LLM_STUB_BASE_URL,
+    LLM_REQUEST_TIMEOUT,
+    LLM_MAX_RETRIES,
+    LLM_RETRY_BASE_DELAY,
+    LLM_RETRY_MAX_DELAY,
+    LLM_HEDGING_ENABLED,
+    LLM_HEDGE_MIN_DELAY,
+    LLM_HEDGE_QUANTILE,
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_HEDGE_MAX_WORKERS,
+    LLM_HTTP_MAX_CONNECTIONS,
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    LLM_HTTP_KEEPALIVE_EXPIRY,
+)
+from backend.ai.llm.rate_limiter import RateLimiter, estimate_tokens
+from backend.ai.llm.completion_cache import CompletionCache
+from backend.utils.logger import get_logger
+from backend.utils.metrics import record_llm_call
+
+logger = get_logger()
+
+"""
+This file contains the shared LLM client factory. Every LLM call in the backend goes
+through invoke_llm so that clients, connection pools, timeouts, retries, rate limits and
+the completion cache are uniform.
+"""
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRYABLE_ERROR_NAMES = {"APITimeoutError", "APIConnectionError", "TimeoutException", "ConnectError"}
+
+
+class LLMClientPool:
+    """Singleton cache of one chat client per (provider, model) sharing a keep-alive HTTP pool"""
+    _instance = None
+    _lock = Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._clients = {}
+                    cls._instance._http_clients = {}
+                    cls._instance._latencies = {}
+                    cls._instance._latency_lock = Lock()
+                    cls._instance._executor = ThreadPoolExecutor(
+                        max_workers=LLM_HEDGE_MAX_WORKERS,
+                        thread_name_prefix="llm-hedge"
+                    )
+        return cls._instance
+
+    def get_http_client(self, provider: str) -> httpx.Client:
+        """Get the pooled HTTP client shared by every model of a provider."""
+        if provider not in self._http_clients:
+            with self._lock:
+                if provider not in self._http_clients:
+                    self._http_clients[provider] = httpx.Client(
+                        limits=httpx.Limits(
+                            max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                            max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                            keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY
+                        ),
+                        timeout=LLM_REQUEST_TIMEOUT
+                    )
+        return self._http_clients[provider]
+
+    def get_chat_model(self, model: str, provider: str = GROQ_PROVIDER, schema=None):
+        """
+        Get the cached chat client for a model, optionally bound to a structured output schema.
+
+        Args:
+            model: Model name as used by the provider
+            provider: LLM provider name
+            schema: Optional Pydantic model for structured output
+
+        Returns:
+            A LangChain runnable that can be invoked with a list of messages
+        """
+        key = (provider, model, schema)
+        if key not in self._clients:
+            with self._lock:
+                if key not in self._clients:
+                    self._clients[key] = self._create_chat_model(model, provider, schema)
+        return self._clients[key]
+
+    def _create_chat_model(self, model: str, provider: str, schema):
+        if provider == GROQ_PROVIDER:
+            provider_kwargs = {}
+        elif provider == STUB_PROVIDER:
+            # The stub server speaks the Groq API, so the same client is pointed at it
+            provider_kwargs = {
+                "base_url": os.getenv("LLM_STUB_BASE_URL", LLM_STUB_BASE_URL),
+                "api_key": os.getenv("GROQ_API_KEY", STUB_PROVIDER)
+            }
+        else:
+            raise ValueError(f"Unsupported LLM provider: {provider}")
+
+        logger.info(f"Creating {provider} client for model {model}")
+        # Retries are handled by invoke_llm so that every call site backs off the same way
+        llm = ChatGroq(
+            model=model,
+            timeout=LLM_REQUEST_TIMEOUT,
+            max_retries=0,
+            http_client=self.get_http_client(provider),
+            **provider_kwargs
+        )
+        if schema is not None:
+            # Keep the raw message so token usage is visible for structured calls too
+            return llm.with_structured_output(schema, include_raw=True)
+        return llm
+
+    def record_latency(self, provider: str, model: str, seconds: float):
+        with self._latency_lock:
+            self._latencies.setdefault((provider, model), deque(maxlen=200)).append(seconds)
+
+    def get_hedge_delay(self, provider: str, model: str) -> float | None:
+        """
+        Get the delay after which a duplicate request is sent for a slow call.
+
+        Returns:
+            The observed latency quantile for the model, or None while there are too few samples
+        """
+        # Copied under the lock, other threads keep appending while the quantile is computed
+        with self._latency_lock:
+            samples = list(self._latencies.get((provider, model), ()))
+        if len(samples) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        quantile_value = ordered[min(len(ordered) - 1, int(len(ordered) * LLM_HEDGE_QUANTILE))]
+        return max(LLM_HEDGE_MIN_DELAY, quantile_value)
+
+    def get_executor(self) -> ThreadPoolExecutor:
+        return self._executor
+
+    def close(self):
+        with self._lock:
+            for http_client in self._http_clients.values():
+                http_client.close()
+            self._http_clients = {}
+            self._clients = {}
+
+
+def get_default_provider() -> str:
+    """Provider used when a call site does not pick one, set by the LLM_PROVIDER environment variable."""
+    return os.getenv("LLM_PROVIDER", LLM_PROVIDER)
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Check if an LLM error is a rate limit, server error or transient network failure."""
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES
+    return type(error).__name__ in RETRYABLE_ERROR_NAMES
+
+
+def get_retry_delay(error: Exception, attempt: int) -> float:
+    """Jittered exponential backoff, honoring the provider's Retry-After header when present."""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), LLM_RETRY_MAX_DELAY)
+        except ValueError:
+            pass
+    backoff = min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * (2 ** attempt))
+    return random.uniform(0, backoff)
+
+
+def get_usage(response) -> dict | None:
+    """Get the token usage reported by the provider for a response."""
+    if isinstance(response, dict):
+        response = response.get("raw")
+    return getattr(response, "usage_metadata", None)
+
+
+def _unwrap_structured(response):
+    """Return the parsed schema instance of a structured response, raising its parsing error."""
+    if isinstance(response, dict) and "parsed" in response:
+        if response.get("parsing_error") is not None:
+            raise response["parsing_error"]
+        return response["parsed"]
+    return response
+
+
+def _invoke_limited(llm, model: str, messages: list, provider: str, cancelled: Event | None = None):
+    """
+    Invoke a model once, holding a slot of its rate limiter for the duration of the call.
+
+    A call cancelled while it waited for the limiter gives its reservation back without being sent.
+    """
+    if cancelled is not None and cancelled.is_set():
+        raise CancelledError()
+    if provider == STUB_PROVIDER:
+        # The stub has no quota, load tests measure the stack at full concurrency
+        return llm.invoke(messages)
+
+    limiter = RateLimiter().get(model)
+    estimated_tokens = estimate_tokens(messages)
+    limiter.acquire(estimated_tokens)
+    if cancelled is not None and cancelled.is_set():
+        limiter.release(estimated_tokens=estimated_tokens, actual_tokens=0)
+        raise CancelledError()
+    start = time.perf_counter()
+    try:
+        response = llm.invoke(messages)
+    except Exception as e:
+        limiter.release(rate_limited=getattr(e, "status_code", None) == 429)
+        raise
+    usage = get_usage(response)
+    limiter.release(
+        time.perf_counter() - start,
+        estimated_tokens=estimated_tokens,
+        actual_tokens=usage.get("total_tokens") if usage else None
+    )
+    return response
+
+
+def _invoke_hedged(pool: LLMClientPool, provider: str, model: str, call):
+    """
+    Run a call and, if it is slower than the model's tail latency, race a duplicate request.
+
+    Once one request succeeds the other is cancelled: it is dropped if it has not started and
+    skips sending if it is still waiting for the rate limiter. A request already sent cannot be
+    interrupted, its response is discarded and its limiter slot is released when it returns.
+    """
+    cancelled = Event()
+    hedge_delay = pool.get_hedge_delay(provider, model) if LLM_HEDGING_ENABLED else None
+    if hedge_delay is None:
+        return call(cancelled)
+
+    def attempt():
+        response = call(cancelled)
+        # Set before the future completes, so a request picked up by the freed worker sees it
+        cancelled.set()
+        return response
+
+    executor = pool.get_executor()
+    futures = {executor.submit(attempt)}
+    done, _ = wait(futures, timeout=hedge_delay)
+    if not done:
+        logger.info(f"{model} call exceeded {hedge_delay:.1f}s, sending hedged request")
+        futures.add(executor.submit(attempt))
+
+    error = None
+    pending = futures
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                for loser in pending:
+                    loser.cancel()
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+def invoke_llm(model: str, messages: list, schema=None, provider: str | None = None):
+    """
+    Invoke an LLM through the shared client pool with rate limiting, timeouts, retries and hedging.
+
+    In replay mode the completion cache answers instead of the provider, in record mode every
+    completion is stored.
+
+    Args:
+        model: Model name as used by the provider
+        messages: List of LangChain messages
+        schema: Optional Pydantic model for structured output
+        provider: LLM provider name, get_default_provider() if not given
+
+    Returns:
+        The model response, or a schema instance when schema is given
+    """
+    provider = provider or get_default_provider()
+    cache = CompletionCache()
+    cached = cache.get(model, messages, schema)
+    if cached is not None:
+        return cached
+
+    pool = LLMClientPool()
+    llm = pool.get_chat_model(model, provider, schema)
+
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        start = time.perf_counter()
+        try:
+            response = _invoke_hedged(pool, provider, model, lambda cancelled: _invoke_limited(llm, model, messages, provider, cancelled))
+            elapsed = time.perf_counter() - start
+            pool.record_latency(provider, model, elapsed)
+            record_llm_call(model, elapsed, get_usage(response))
+            completion = _unwrap_structured(response)
+            cache.put(model, messages, completion, schema)
+            return completion
+        except Exception as e:
+            if attempt >= LLM_MAX_RETRIES or not is_retryable_error(e):
+                raise
+            delay = get_retry_delay(e, attempt)
+            logger.warning(f"{model} call failed ({e}), retrying in {delay:.1f}s "
+                           f"(attempt {attempt + 1}/{LLM_MAX_RETRIES})")
+            time.sleep(delay)
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+from threading import Lock
+
+from langchain_core.load import dumpd, load
+from backend.common.config import LLM_CACHE_MODE
+from backend.common.constants import LLM_CACHE_MODES, LLM_CACHE_PASSTHROUGH, LLM_CACHE_RECORD, LLM_CACHE_REPLAY
+from backend.common.paths import COMPLETION_CACHE_DIR
+from backend.utils.logger import get_logger
+
+logger = get_logger()
+
+"""
+This file contains the exact-prompt LLM completion cache used by invoke_llm. In record mode every
+completion is stored on disk keyed by model, messages and structured output schema; in replay mode
+stored completions are served without calling the provider, so whole test runs can be re-executed
+offline to profile everything except the model.
+
+The mode is read from the LLM_CACHE_MODE environment variable and defaults to passthrough.
+"""
+
+STRUCTURED_COMPLETION = "structured"
+MESSAGE_COMPLETION = "message"
+
+
+class CompletionCacheMiss(KeyError):
+    """Raised in replay mode when a completion was never recorded"""
+
+
+class CompletionCache:
+    """Singleton on-disk store of LLM completions, one JSON file per prompt"""
+    _instance = None
+    _lock = Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance.directory = Path(COMPLETION_CACHE_DIR)
+                    cls._instance.set_mode(os.getenv("LLM_CACHE_MODE", LLM_CACHE_MODE))
+        return cls._instance
+
+    def set_mode(self, mode: str):
+        if mode not in LLM_CACHE_MODES:
+            raise ValueError(f"Unknown LLM cache mode {mode}, expected one of {LLM_CACHE_MODES}")
+        if mode != LLM_CACHE_PASSTHROUGH:
+            logger.info(f"LLM completion cache in {mode} mode at {self.directory}")
+        self.mode = mode
+
+    @staticmethod
+    def make_key(model: str, messages: list, schema=None) -> str:
+        """Hash of everything that determines a completion."""
+        payload = {
+            "model": model,
+            "messages": [{"type": message.type, "content": message.content} for message in messages],
+            "schema": schema.model_json_schema() if schema is not None else None
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def _get_path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, model: str, messages: list, schema=None):
+        """
+        Get a recorded completion in replay mode.
+
+        Returns:
+            The completion, or None when not replaying
+
+        Raises:
+            CompletionCacheMiss: If replaying and the prompt was never recorded
+        """
+        if self.mode != LLM_CACHE_REPLAY:
+            return None
+
+        key = self.make_key(model, messages, schema)
+        path = self._get_path(key)
+        if not path.exists():
+            raise CompletionCacheMiss(f"No recorded completion of {model} for prompt {key}")
+
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        if entry["type"] == STRUCTURED_COMPLETION:
+            return schema.model_validate(entry["data"])
+        return load(entry["data"])
+
+    def put(self, model: str, messages: list, completion, schema=None):
+        """Store a completion in record mode."""
+        if self.mode != LLM_CACHE_RECORD:
+            return
+
+        key = self.make_key(model, messages, schema)
+        if schema is not None:
+            entry = {"type": STRUCTURED_COMPLETION, "model": model, "data": completion.model_dump()}
+        else:
+            entry = {"type": MESSAGE_COMPLETION, "model": model, "data": dumpd(completion)}
+
+        path = self._get_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so a concurrent replay never reads a half-written file, the temp name is
+        # unique per write since hedged or concurrent calls of one process can record the same prompt
+        temp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(temp_path, path)
@@ -1,11 +1,51 @@
 
-from sentence_transformers import CrossEncoder
-from backend.common.config import CROSS_ENCODER_K
+from collections import OrderedDict
+from contextlib import contextmanager
+from threading import Lock
+from typing import TYPE_CHECKING
+from backend.common.config import CROSS_ENCODER_K, CROSS_ENCODER_CACHE_SIZE
 from backend.utils.logger import get_logger
 from backend.ai.testing.models import TestOption
 logger = get_logger()
 
-def use_cross_encoder(cross_encoder_option:TestOption, query, retrieved_chunks):
+if TYPE_CHECKING:
+    from sentence_transformers import CrossEncoder
+
+_cross_encoders: OrderedDict[str, "CrossEncoder"] = OrderedDict()
+_cross_encoders_lock = Lock()
+_pinned_cross_encoders: set[str] = set()
+
+def get_cross_encoder(cross_encoder_model_name) -> "CrossEncoder":
+    """
+    Get a loaded cross-encoder, keeping the CROSS_ENCODER_CACHE_SIZE most recently used models in memory.
+    """
+    with _cross_encoders_lock:
+        if cross_encoder_model_name in _cross_encoders:
+            _cross_encoders.move_to_end(cross_encoder_model_name)
+            return _cross_encoders[cross_encoder_model_name]
+
+        logger.info(f"Loading cross-encoder {cross_encoder_model_name}")
+        # sentence_transformers pulls in torch, so it is only imported once a reranker is needed
+        from sentence_transformers import CrossEncoder
+        cross_encoder = CrossEncoder(cross_encoder_model_name, trust_remote_code=True)
+        _cross_encoders[cross_encoder_model_name] = cross_encoder
+        evictable = [name for name in _cross_encoders if name not in _pinned_cross_encoders]
+        while len(_cross_encoders) > CROSS_ENCODER_CACHE_SIZE and evictable:
+            del _cross_encoders[evictable.pop(0)]
+        return cross_encoder
+
+@contextmanager
+def pinned_cross_encoders(cross_encoder_model_names):
+    """Keep the given cross-encoders in memory for the duration of the block, e.g. a test sweep."""
+    with _cross_encoders_lock:
+        _pinned_cross_encoders.update(cross_encoder_model_names)
+    try:
+        yield
+    finally:
+        with _cross_encoders_lock:
+            _pinned_cross_encoders.difference_update(cross_encoder_model_names)
+
+def use_cross_encoder(cross_encoder_option:TestOption, query, retrieved_chunks, return_scores=False):
     cross_encoder_model_name = cross_encoder_option.data
     top_k = CROSS_ENCODER_K
 
@@ -13,17 +53,24 @@ def use_cross_encoder(cross_encoder_option:TestOption, query, retrieved_chunks):
         query,
         retrieved_chunks,
         cross_encoder_model_name,
-        top_k
+        top_k,
+        return_scores
     )
 
     return retrieved_chunks_cross_encoded
 
-def rerank_with_cross_encoder(query, retrieved_chunks, cross_encoder_model_name, top_k=None):
+def get_cross_encoder_cache_options(cross_encoder_option:TestOption) -> str:
+    """Retrieval cache options describing a cross-encoder rerank."""
+    return f"cross_encoder={cross_encoder_option.data};top_k={CROSS_ENCODER_K}"
+
+def rerank_with_cross_encoder(query, retrieved_chunks, cross_encoder_model_name, top_k=None, return_scores=False):
     """
     Improved re-ranking with robust error handling and fallback mechanisms.
+
+    With return_scores, (chunk, score) pairs are returned and the fallback has None scores.
     """
   
-    cross_encoder = CrossEncoder(cross_encoder_model_name, trust_remote_code=True)
+    cross_encoder = get_cross_encoder(cross_encoder_model_name)
     try:
         # Prepare pairs of (query, chunk) for the cross-encoder
         pairs = [(query, chunk.page_content) for chunk in retrieved_chunks]
@@ -44,8 +91,12 @@ def rerank_with_cross_encoder(query, retrieved_chunks, cross_encoder_model_name,
         # Add logging for re-ranking details
         logger.info(f"Re-ranking results: Original chunks={len(retrieved_chunks)}, Reranked chunks={len(reranked_chunks)}")
         
+        if return_scores:
+            return [(chunk, float(score)) for chunk, score in reranked_chunks]
         return [chunk for chunk, _ in reranked_chunks]
     
     except Exception as e:
         logger.error(f"Cross-encoder re-ranking error: {e}")
+        if return_scores:
+            return [(chunk, None) for chunk in retrieved_chunks]
         return retrieved_chunks
\ No newline at end of file
@@ -1,16 +1,15 @@
-from langchain_groq import ChatGroq
 from langchain.schema import SystemMessage, HumanMessage
 from backend.ai.llm.llm_as_a_judge.models import JudgeOutput
 from backend.ai.llm.prompts import EVALUATION_PROMPT, CHUNK_EVALUATION_PROMPT
 from backend.common.constants import OPENAI_GPT_OSS_120B
+from backend.ai.llm.client import invoke_llm
+from backend.utils.metrics import stage_timer
 
 def llm_as_a_judge(query: str, response: str, expected_answer: str,chunks) -> str:
     """
     Turkish-specific LLM judge with language-aware evaluation.
     """
 
-    llm = ChatGroq(model=OPENAI_GPT_OSS_120B)
-
     messages = [
         SystemMessage(content="You are an LLM as a judge being used in a RAG system."),
         HumanMessage(content=EVALUATION_PROMPT.format(
@@ -19,9 +18,9 @@ def llm_as_a_judge(query: str, response: str, expected_answer: str,chunks) -> st
             response=response
         ))
     ]
-    
-    llm = llm.with_structured_output(JudgeOutput)
-    evaluation = llm.invoke(messages)
+
+    with stage_timer("judge_response", model=OPENAI_GPT_OSS_120B):
+        evaluation = invoke_llm(OPENAI_GPT_OSS_120B, messages, schema=JudgeOutput)
 
     chunk_evaluation_messages=[
         SystemMessage(content="You are an LLM as a judge being used in a RAG system."),
@@ -31,6 +30,7 @@ def llm_as_a_judge(query: str, response: str, expected_answer: str,chunks) -> st
         ))
     ]
     
-    chunk_evaluation = llm.invoke(chunk_evaluation_messages)
+    with stage_timer("judge_chunks", model=OPENAI_GPT_OSS_120B):
+        chunk_evaluation = invoke_llm(OPENAI_GPT_OSS_120B, chunk_evaluation_messages, schema=JudgeOutput)
 
     return evaluation, chunk_evaluation
@@ -1,4 +1,3 @@
-from langchain_groq import ChatGroq
 from backend.common.constants import CROSS_ENCODER_OPTION
 from langchain.schema import SystemMessage, HumanMessage
 from backend.ai.testing.models import RagResponse, TestOption
@@ -6,48 +5,84 @@ from langchain_chroma import Chroma
 from backend.ai.graphdb.utils import neo4j_graph_search, format_graph_to_context
 from backend.utils.logger import get_logger
 from backend.common.constants import GRAPH_DB_OPTION, VECTOR_DB_OPTION, SELF_RAG_OPTION
-from backend.ai.llm.self_rag.self_rag import use_self_rag
-from backend.ai.llm.cross_encoder import use_cross_encoder
+from backend.ai.llm.self_rag.self_rag import use_self_rag, get_self_rag_n
+from backend.ai.llm.cross_encoder import use_cross_encoder, get_cross_encoder_cache_options
+from backend.ai.vectordb.retrieval_cache import cached_similarity_search, load_cached_chunks, store_cached_chunks
+from backend.ai.llm.client import invoke_llm
+from backend.utils.metrics import stage_timer
 
 logger = get_logger()
 
-def rag_invoke(llm_name: str, system_prompt: str, db: Chroma|None, similarity_vector_k: int, query: str, options: list[TestOption], rag_database: str) -> str:
+def get_retrieval_depth(options: list[TestOption], similarity_vector_k: int) -> int:
+    """Number of chunks rag_invoke needs per query, deeper when Self-RAG selects from several retrievals."""
+    for option in options:
+        if option.name == SELF_RAG_OPTION and option.is_enabled:
+            return similarity_vector_k * get_self_rag_n(option)
+    return similarity_vector_k
+
+def rerank_cached(db: Chroma, option: TestOption, query: str, retrieved_chunks: list, similarity_vector_k: int) -> list:
+    """Cross-encoder rerank served from the retrieval cache when the same query was reranked before."""
+    cache_options = get_cross_encoder_cache_options(option)
+    cached_chunks = load_cached_chunks(db, query, similarity_vector_k, cache_options)
+    if cached_chunks is not None:
+        return cached_chunks
+
+    scored_chunks = use_cross_encoder(option, query, retrieved_chunks, return_scores=True)
+    # A failed rerank falls back to the retrieval order and is not cached
+    if all(score is not None for _, score in scored_chunks):
+        store_cached_chunks(db, query, similarity_vector_k, scored_chunks, cache_options)
+    return [chunk for chunk, _ in scored_chunks]
+
+def rag_invoke(llm_name: str, system_prompt: str, db: Chroma|None, similarity_vector_k: int, query: str, options: list[TestOption], rag_database: str, precomputed_chunks: list|None = None) -> str:
+    """
+    Answer a query with RAG.
+
+    precomputed_chunks are the query's vector DB chunks retrieved ahead of time by a batched
+    search, ordered by similarity and at least get_retrieval_depth deep. When given, the
+    per-query similarity search is skipped.
+    """
     final_chunks = []
 
 
     if rag_database == GRAPH_DB_OPTION:
         # Use Neo4j graph database
         logger.info("Using Neo4j graph database for retrieval")
-        graph_results = neo4j_graph_search(query, similarity_vector_k)
+        with stage_timer("graph_retrieval", db=rag_database):
+            graph_results = neo4j_graph_search(query, similarity_vector_k)
         context = format_graph_to_context(graph_results)
 
     elif rag_database == VECTOR_DB_OPTION:
         # Use traditional vector database
         logger.info("Using vector database for retrieval")
-        retrieved_chunks = db.similarity_search(query, similarity_vector_k)
+        if precomputed_chunks is not None:
+            retrieved_chunks = precomputed_chunks[:similarity_vector_k]
+        else:
+            with stage_timer("retrieval", db=rag_database):
+                retrieved_chunks = cached_similarity_search(db, query, similarity_vector_k)
         logger.info(f"Retrieved {len(retrieved_chunks)} chunks from vector DB.")
         final_chunks = retrieved_chunks
 
         for option in options:
             if option.name == CROSS_ENCODER_OPTION and option.is_enabled:
                 logger.info(f"Re-ranking with cross-encoder.")
-                final_chunks = use_cross_encoder(option, query, retrieved_chunks)
+                with stage_timer("cross_encoder", model=option.data, db=rag_database):
+                    final_chunks = rerank_cached(db, option, query, retrieved_chunks, similarity_vector_k)
 
             # Self-RAG will override CE if both are enabled
             elif option.name == SELF_RAG_OPTION and option.is_enabled:
                 logger.info("Using Self-RAG option.")
-                final_chunks = use_self_rag(option,query,db, k_per_retrieval=similarity_vector_k, final_k=similarity_vector_k)
+                final_chunks = use_self_rag(option,query,db, k_per_retrieval=similarity_vector_k, final_k=similarity_vector_k, retrieved_chunks=precomputed_chunks)
 
         # Format context for vector DB
         context = "\n\n".join([f'Page Number: {chunk.metadata.get("page", "Unknown")}: {chunk.page_content}\n' for chunk in retrieved_chunks])
 
     # Use Groq API for response generation
-    llm = ChatGroq(model=llm_name)
     messages = [
         SystemMessage(content=system_prompt),
         HumanMessage(content=f"Context:\n{context}\n\nQuestion: {query}")
     ]
-    response = llm.invoke(messages)
+    with stage_timer("generation", model=llm_name, db=rag_database):
+        response = invoke_llm(llm_name, messages)
 
     return RagResponse(content=response.content,
                        metadata={
@@ -0,0 +1,231 @@
+import datetime
+import time
+from threading import Condition, Lock
+
+from pymongo import ReturnDocument
+from backend.common.config import (
+    LLM_RATE_LIMITS,
+    LLM_DEFAULT_RATE_LIMIT,
+    LLM_INITIAL_CONCURRENCY,
+    LLM_MIN_CONCURRENCY,
+    LLM_MAX_CONCURRENCY,
+    LLM_TARGET_LATENCY,
+    LLM_AIMD_DECREASE_FACTOR,
+    LLM_LATENCY_DECREASE_FACTOR,
+    LLM_ESTIMATED_OUTPUT_TOKENS,
+    LLM_RATE_LIMIT_MONGO_COORDINATION,
+)
+from backend.utils.logger import get_logger
+
+logger = get_logger()
+
+"""
+This file contains the process-wide rate limiter used by every LLM call. Each model gets a
+requests/min and a tokens/min token bucket plus an AIMD concurrency limit that shrinks on 429s
+and slow responses and grows back while calls succeed. Buckets can optionally be coordinated
+across processes through per-minute counters in MongoDB.
+"""
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate"""
+
+    def __init__(self, rate_per_minute: int):
+        self.capacity = float(rate_per_minute)
+        self.fill_rate = rate_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.fill_rate)
+        self.updated_at = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take tokens from the bucket, going into debt if there are not enough.
+
+        Returns:
+            Seconds the caller has to wait before the reservation is covered
+        """
+        with self._lock:
+            self._refill()
+            self.tokens -= min(amount, self.capacity)
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.fill_rate
+
+    def adjust(self, amount: float):
+        """Correct a previous reservation once the actual usage is known."""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+    def drain(self):
+        """Empty the bucket after the provider reported a rate limit."""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, 0.0)
+
+
+class AdaptiveConcurrencyLimiter:
+    """Concurrency limit adjusted with additive increase / multiplicative decrease"""
+
+    def __init__(self, initial: int, minimum: int, maximum: int, target_latency: float):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self._condition = Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, latency: float | None = None, rate_limited: bool = False):
+        with self._condition:
+            self.in_flight -= 1
+            if rate_limited:
+                self.limit = max(self.minimum, self.limit * LLM_AIMD_DECREASE_FACTOR)
+            elif latency is not None and latency > self.target_latency:
+                self.limit = max(self.minimum, self.limit * LLM_LATENCY_DECREASE_FACTOR)
+            elif latency is not None:
+                # Grows by roughly one slot per `limit` successful calls
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+
+class MongoRateWindow:
+    """Per-minute request and token counters shared by every process through MongoDB"""
+
+    def __init__(self):
+        self._indexes_created = False
+
+    def _get_collection(self):
+        from backend.web.database.main import GLOBAL_MONGO_DB_CLIENT
+        collection = GLOBAL_MONGO_DB_CLIENT.get_rate_limits_collection()
+        if not self._indexes_created:
+            collection.create_index([("model", 1), ("window", 1)], unique=True)
+            collection.create_index("expires_at", expireAfterSeconds=0)
+            self._indexes_created = True
+        return collection
+
+    def reserve(self, model: str, tokens: int, rpm: int, tpm: int) -> float:
+        """
+        Count a call in the current minute window if it still fits the shared limits.
+
+        A rejected attempt is not counted, so callers waiting for the next window do not use up its quota.
+        A call larger than tpm is allowed alone in an otherwise empty window.
+
+        Returns:
+            Seconds until the next window if the shared limits are exceeded, otherwise 0
+        """
+        now = time.time()
+        window = int(now // 60)
+        collection = self._get_collection()
+        # Create the window first, the conditional increment below cannot upsert without clashing on the unique index
+        collection.update_one(
+            {"model": model, "window": window},
+            {"$setOnInsert": {
+                "requests": 0,
+                "tokens": 0,
+                "expires_at": datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=5)
+            }},
+            upsert=True
+        )
+        document = collection.find_one_and_update(
+            {
+                "model": model,
+                "window": window,
+                "requests": {"$lt": rpm},
+                "$or": [{"tokens": {"$lte": tpm - tokens}}, {"requests": 0}]
+            },
+            {"$inc": {"requests": 1, "tokens": tokens}},
+            return_document=ReturnDocument.AFTER
+        )
+        if document is None:
+            return (window + 1) * 60 - now
+        return 0.0
+
+
+class ModelRateLimiter:
+    """Request, token and concurrency limits for a single model"""
+
+    def __init__(self, model: str, rpm: int, tpm: int, coordinator: MongoRateWindow | None = None):
+        self.model = model
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.concurrency = AdaptiveConcurrencyLimiter(
+            LLM_INITIAL_CONCURRENCY, LLM_MIN_CONCURRENCY, LLM_MAX_CONCURRENCY, LLM_TARGET_LATENCY
+        )
+        self.coordinator = coordinator
+
+    def acquire(self, estimated_tokens: int):
+        """
+        Block until a call with the estimated token count may be sent.
+
+        The request and token budget is reserved before the concurrency slot is taken, so calls
+        sleeping on the rate limits do not hold slots that calls ready to be sent could use.
+        """
+        wait_time = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        if wait_time > 0:
+            logger.debug(f"Rate limiting {self.model} for {wait_time:.2f}s")
+            time.sleep(wait_time)
+
+        while self.coordinator is not None:
+            wait_time = self.coordinator.reserve(self.model, estimated_tokens, self.rpm, self.tpm)
+            if wait_time <= 0:
+                break
+            logger.debug(f"Shared rate limit reached for {self.model}, waiting {wait_time:.2f}s")
+            time.sleep(wait_time)
+
+        self.concurrency.acquire()
+
+    def release(self, latency: float | None = None, rate_limited: bool = False,
+                estimated_tokens: int = 0, actual_tokens: int | None = None):
+        """Report the outcome of a call sent after acquire."""
+        if rate_limited:
+            self.requests.drain()
+            self.tokens.drain()
+            logger.warning(f"Rate limited by provider for {self.model}, "
+                           f"concurrency limit now {self.concurrency.limit:.1f}")
+        elif actual_tokens is not None:
+            self.tokens.adjust(actual_tokens - estimated_tokens)
+        self.concurrency.release(latency, rate_limited)
+
+
+class RateLimiter:
+    """Singleton registry of per-model rate limiters"""
+    _instance = None
+    _lock = Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._limiters = {}
+                    cls._instance._coordinator = MongoRateWindow() if LLM_RATE_LIMIT_MONGO_COORDINATION else None
+        return cls._instance
+
+    def get(self, model: str) -> ModelRateLimiter:
+        if model not in self._limiters:
+            with self._lock:
+                if model not in self._limiters:
+                    limits = LLM_RATE_LIMITS.get(model, LLM_DEFAULT_RATE_LIMIT)
+                    self._limiters[model] = ModelRateLimiter(
+                        model, limits["rpm"], limits["tpm"], self._coordinator
+                    )
+        return self._limiters[model]
+
+
+def estimate_tokens(messages: list) -> int:
+    """Rough token estimate for a request: ~4 characters per token plus the expected output."""
+    characters = sum(len(str(getattr(message, "content", message))) for message in messages)
+    return characters // 4 + LLM_ESTIMATED_OUTPUT_TOKENS
@@ -1,9 +1,9 @@
 from backend.utils.logger import get_logger
-from langchain_groq import ChatGroq
 from langchain.schema import SystemMessage, HumanMessage
 from backend.common.constants import LLAMA_3_3_70B_VERSATILE
 from backend.ai.llm.prompts import SELF_RAG_SYSTEM_PROMPT
 from backend.ai.llm.self_rag.models import SelfRAGOutput
+from backend.ai.llm.client import invoke_llm
 from langchain.schema import Document
 from pydantic import ValidationError
 
@@ -37,9 +37,6 @@ def self_rag_agent(query: str, chunks: list[Document], top_k: int):
         Select the top {top_k} most relevant chunks. """
 
     # Call LLM with structured output
-    llm = ChatGroq(model=LLAMA_3_3_70B_VERSATILE)
-    llm = llm.with_structured_output(SelfRAGOutput)
-
     messages = [
         SystemMessage(content=system_prompt),
         HumanMessage(content=user_prompt)
@@ -47,7 +44,7 @@ def self_rag_agent(query: str, chunks: list[Document], top_k: int):
 
     try:
         # Get structured response
-        response: SelfRAGOutput = llm.invoke(messages)
+        response: SelfRAGOutput = invoke_llm(LLAMA_3_3_70B_VERSATILE, messages, schema=SelfRAGOutput)
 
         logger.info(f"LLM selected indices: {response.selected_indices}")
         if response.relevance_scores:
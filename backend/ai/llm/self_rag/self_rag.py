@@ -3,12 +3,20 @@ from backend.utils.logger import get_logger
 from backend.ai.testing.models import TestOption
 from backend.common.config import SELF_RAG_N
 from backend.ai.llm.self_rag.agent import self_rag_agent
+from backend.ai.vectordb.retrieval_cache import cached_similarity_search
+from backend.common.constants import LLAMA_3_3_70B_VERSATILE, VECTOR_DB_OPTION
+from backend.utils.metrics import stage_timer
 
 
 logger = get_logger()
 
 
-def use_self_rag(option:TestOption, query: str, db: Chroma, k_per_retrieval: int, final_k: int):
+def get_self_rag_n(option: TestOption) -> int:
+    """Number of retrieval rounds of a Self-RAG option, defaulting to SELF_RAG_N if not specified."""
+    return int(option.data) if option and str(option.data).isdigit() else SELF_RAG_N
+
+
+def use_self_rag(option:TestOption, query: str, db: Chroma, k_per_retrieval: int, final_k: int, retrieved_chunks=None):
     """
     Self-Reflective RAG: Performs n different retrievals and uses LLM to select the most k relevant chunks.
 
@@ -18,20 +26,26 @@ def use_self_rag(option:TestOption, query: str, db: Chroma, k_per_retrieval: int
         n: Number of different retrieval iterations to perform
         k_per_retrieval: Number of chunks to retrieve in each iteration
         final_k: Final number of most relevant chunks to return after LLM selection
+        retrieved_chunks: Optional precomputed chunks for the query, at least k_per_retrieval * n deep
 
     Returns:
         List of the most relevant chunks selected by the LLM
     """
 
     # Step 1: Perform n different retrievals with varying parameters
-    n = int(option.data) if option and option.data.isdigit() else SELF_RAG_N   # Default to SELF_RAG_N if not specified
+    n = get_self_rag_n(option)
 
     logger.info(f"Starting Self-RAG with {k_per_retrieval * n} retrievals, selecting top {final_k}")
 
     total_k = k_per_retrieval * n
-    all_retrieved_chunks = db.similarity_search(query, k=total_k)
-    
+    if retrieved_chunks is not None and len(retrieved_chunks) >= total_k:
+        all_retrieved_chunks = retrieved_chunks[:total_k]
+    else:
+        with stage_timer("self_rag_retrieval", db=VECTOR_DB_OPTION):
+            all_retrieved_chunks = cached_similarity_search(db, query, total_k)
+
     logger.info(f"Retrieved {len(all_retrieved_chunks)} chunks")
     
-    selected_chunks = self_rag_agent(query, all_retrieved_chunks, final_k)
+    with stage_timer("self_rag_selection", model=LLAMA_3_3_70B_VERSATILE, db=VECTOR_DB_OPTION):
+        selected_chunks = self_rag_agent(query, all_retrieved_chunks, final_k)
     return selected_chunks
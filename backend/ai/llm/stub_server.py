@@ -0,0 +1,206 @@
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+"""
+Local OpenAI/Groq-compatible stub LLM server for load tests. It answers chat completion requests
+after a sampled latency, emits output at a fixed token rate, supports streaming and tool calls
+(used by structured output) and injects server errors, rate limits and hangs at configurable
+rates. Point the backend at it with LLM_PROVIDER=stub.
+
+Usage:
+    python -m backend.ai.llm.stub_server --port 8900 --latency-median 0.8 --tokens-per-second 250 --error-rate 0.01
+"""
+
+DEFAULT_PORT = 8900
+STUB_WORD = "stub"
+
+
+class StubSettings():
+    def __init__(self, latency_distribution="lognormal", latency_median=0.5, latency_sigma=0.5,
+                 tokens_per_second=200.0, output_tokens=150, error_rate=0.0, rate_limit_rate=0.0,
+                 hang_rate=0.0, hang_seconds=120.0, retry_after=1.0, seed=None):
+        self.latency_distribution = latency_distribution
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+
+    def sample_latency(self) -> float:
+        """Time to first token in seconds."""
+        if self.latency_distribution == "fixed":
+            return self.latency_median
+        if self.latency_distribution == "uniform":
+            return self.random.uniform(0, 2 * self.latency_median)
+        if self.latency_distribution == "exponential":
+            return self.random.expovariate(math.log(2) / self.latency_median)
+        return self.random.lognormvariate(math.log(self.latency_median), self.latency_sigma)
+
+
+def estimate_prompt_tokens(messages: list[dict]) -> int:
+    return sum(len(str(message.get("content") or "")) for message in messages) // 4
+
+
+def fake_value(schema: dict, definitions: dict):
+    """Build the smallest value that satisfies a JSON schema, used as tool call arguments."""
+    if "$ref" in schema:
+        return fake_value(definitions[schema["$ref"].split("/")[-1]], definitions)
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            options = [option for option in schema[key] if option.get("type") != "null"]
+            return fake_value(options[0] if options else {"type": "null"}, definitions)
+    if "enum" in schema:
+        return schema["enum"][0]
+
+    schema_type = schema.get("type", "string")
+    if schema_type == "object":
+        properties = schema.get("properties", {})
+        return {name: fake_value(properties[name], definitions) for name in schema.get("required", properties.keys())}
+    if schema_type == "array":
+        return [fake_value(schema.get("items", {}), definitions) for _ in range(max(1, schema.get("minItems", 1)))]
+    if schema_type == "integer":
+        return int(schema.get("minimum", schema.get("exclusiveMinimum", -1) + 1))
+    if schema_type == "number":
+        return float(schema.get("minimum", 0))
+    if schema_type == "boolean":
+        return True
+    if schema_type == "null":
+        return None
+    text = "Stub response generated by the local load test server."
+    return text.ljust(schema.get("minLength", 0), ".")[:schema.get("maxLength", len(text))]
+
+
+def build_message(body: dict, output_tokens: int) -> dict:
+    """Build the assistant message, a tool call when the request forces one."""
+    tools = body.get("tools") or []
+    if tools:
+        function = tools[0]["function"]
+        parameters = function.get("parameters", {})
+        arguments = fake_value(parameters, parameters.get("$defs", parameters.get("definitions", {})))
+        return {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [{
+                "id": f"call_{uuid.uuid4().hex[:12]}",
+                "type": "function",
+                "function": {"name": function["name"], "arguments": json.dumps(arguments)}
+            }]
+        }
+    return {"role": "assistant", "content": " ".join([STUB_WORD] * output_tokens)}
+
+
+def create_app(settings: StubSettings) -> FastAPI:
+    app = FastAPI(title="Stub LLM provider")
+
+    def error_response(status_code: int, message: str, headers: dict | None = None):
+        return JSONResponse(status_code=status_code, headers=headers,
+                            content={"error": {"message": message, "type": "stub_error", "code": status_code}})
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok"}
+
+    @app.post("/openai/v1/chat/completions")
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        roll = settings.random.random()
+        if roll < settings.rate_limit_rate:
+            return error_response(429, "Rate limit reached (injected)", {"retry-after": str(settings.retry_after)})
+        roll -= settings.rate_limit_rate
+        if roll < settings.error_rate:
+            await asyncio.sleep(settings.sample_latency())
+            return error_response(500, "Internal server error (injected)")
+        roll -= settings.error_rate
+        if roll < settings.hang_rate:
+            await asyncio.sleep(settings.hang_seconds)
+            return error_response(504, "Gateway timeout (injected)")
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        model = body.get("model", "stub")
+        created = int(time.time())
+        output_tokens = min(settings.output_tokens, body.get("max_tokens") or settings.output_tokens)
+        message = build_message(body, output_tokens)
+        usage = {
+            "prompt_tokens": estimate_prompt_tokens(body.get("messages", [])),
+            "completion_tokens": output_tokens,
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        latency = settings.sample_latency()
+
+        if not body.get("stream"):
+            await asyncio.sleep(latency + output_tokens / settings.tokens_per_second)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if message.get("tool_calls") else "stop"}],
+                "usage": usage
+            }
+
+        async def stream():
+            def chunk(delta: dict, finish_reason=None, extra: dict | None = None) -> str:
+                payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                           "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}], **(extra or {})}
+                return f"data: {json.dumps(payload)}\n\n"
+
+            await asyncio.sleep(latency)
+            yield chunk({"role": "assistant", "content": ""})
+            if message.get("tool_calls"):
+                yield chunk({"tool_calls": [{"index": 0, **message["tool_calls"][0]}]})
+                finish_reason = "tool_calls"
+            else:
+                for _ in range(output_tokens):
+                    await asyncio.sleep(1 / settings.tokens_per_second)
+                    yield chunk({"content": f"{STUB_WORD} "})
+                finish_reason = "stop"
+            # Groq reports usage of a stream in the last chunk
+            yield chunk({}, finish_reason, {"x_groq": {"usage": usage}, "usage": usage})
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return app
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local OpenAI/Groq-compatible stub LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency-distribution", choices=["lognormal", "exponential", "uniform", "fixed"], default="lognormal")
+    parser.add_argument("--latency-median", type=float, default=0.5, help="Median seconds to first token")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Log-space spread of the lognormal latency")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--output-tokens", type=int, default=150)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of requests answered with a 429")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="Share of requests that hang until --hang-seconds")
+    parser.add_argument("--hang-seconds", type=float, default=120.0)
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with injected 429s")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    settings = StubSettings(args.latency_distribution, args.latency_median, args.latency_sigma, args.tokens_per_second,
+                            args.output_tokens, args.error_rate, args.rate_limit_rate, args.hang_rate,
+                            args.hang_seconds, args.retry_after, args.seed)
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
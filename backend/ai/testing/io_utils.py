@@ -1,10 +1,17 @@
 import datetime
+import os
+import socket
+import threading
+from contextlib import contextmanager
 
 from bson import ObjectId
 from backend.ai.llm.llm_as_a_judge.models import JudgeOutput
 from backend.ai.testing.models import TestCase
 from langchain_core.documents import Document
 from backend.web.database.main import GLOBAL_MONGO_DB_CLIENT
+from pymongo import ReturnDocument
+from backend.common.constants import FULL_RUN_TYPE, RETRIEVAL_RUN_TYPE, RUN_STATUS_RUNNING, RUN_STATUS_PARTIAL, RUN_STATUS_COMPLETED, RESUMABLE_RUN_STATUSES
+from backend.common.config import RUN_HEARTBEAT_STALE_AFTER
 from backend.utils.logger import get_logger
 logger = get_logger()
 
@@ -75,6 +82,20 @@ def increment_run_count():
     run_count += 1
     collection.update_one({"name": "run_count"}, {"$set": {"data": run_count}})
     return run_count
+
+def allocate_run_count():
+    """
+    Atomically take the current run_count for a new run and increment the global counter.
+
+    Allocating up front keeps an interrupted run's run_count from being reused by the next run.
+    """
+    collection = GLOBAL_MONGO_DB_CLIENT.get_config_collection()
+    document = collection.find_one_and_update(
+        {"name": "run_count"},
+        {"$inc": {"data": 1}},
+        return_document=ReturnDocument.BEFORE
+    )
+    return document["data"]
     
 
 # Function to load existing JSON data
@@ -89,10 +110,11 @@ def load_existing_test_results():
     documents = list(collection.find())
     return documents
 
-def add_test_result(test_case: TestCase ,query_expected_answer: dict ,response: str ,retrieved_chunks: list[Document] ,evaluation: JudgeOutput ,chunk_evaluation: JudgeOutput, run_count: int, error: str = ""):
+def add_test_result(test_case: TestCase ,query_expected_answer: dict ,response: str ,retrieved_chunks: list[Document] ,evaluation: JudgeOutput ,chunk_evaluation: JudgeOutput, run_count: int, error: str = "", metrics: dict | None = None):
     """
     Add a test result to the existing results.
     """
+    metrics = metrics or {}
     # Store results in a dictionary
     result = {
         "test_id": test_case.test_id,
@@ -100,6 +122,7 @@ def add_test_result(test_case: TestCase ,query_expected_answer: dict ,response:
         "embedding_model": test_case.embedding_model_name,
         "system_message": test_case.system_message,
         "query": query_expected_answer["query"],
+        "query_id": str(query_expected_answer["_id"]) if "_id" in query_expected_answer else None,
         "chunk_size": test_case.chunk_size,
         "chunk_overlap": test_case.chunk_overlap,
         "similar_vector_count" : test_case.similar_vector_count,
@@ -116,7 +139,10 @@ def add_test_result(test_case: TestCase ,query_expected_answer: dict ,response:
         "chunk_evaluation_reasoning": chunk_evaluation.reasoning if chunk_evaluation is not None else '',
         "run_count" : run_count,
         "rag_database": test_case.rag_database,
-        "error": error if error else ''
+        "error": error if error else '',
+        "stage_timings": metrics.get("stage_timings", {}),
+        "total_time": metrics.get("total_time", 0),
+        "token_usage": metrics.get("token_usage", {})
         }
 
     collection = GLOBAL_MONGO_DB_CLIENT.get_results_collection()
@@ -124,9 +150,36 @@ def add_test_result(test_case: TestCase ,query_expected_answer: dict ,response:
 
     logger.info(f"Result saved to database.")
 
-def add_run_record(run_count: int, test_case: TestCase, qa_batch_id: str | None = None):
+def load_average_query_time(test_case: TestCase) -> float | None:
     """
-    Add a run record to the runs collection.
+    Average measured seconds per query of earlier results with the same model and vector DB config.
+
+    Falls back to every result of the same LLM, returns None when nothing was measured yet.
+    """
+    collection = GLOBAL_MONGO_DB_CLIENT.get_results_collection()
+    filters = [
+        {"llm": test_case.llm_name, "embedding_model": test_case.embedding_model_name,
+         "chunk_size": test_case.chunk_size, "chunk_overlap": test_case.chunk_overlap,
+         "rag_database": test_case.rag_database},
+        {"llm": test_case.llm_name},
+    ]
+    for match in filters:
+        documents = list(collection.aggregate([
+            {"$match": {**match, "total_time": {"$gt": 0}}},
+            {"$group": {"_id": None, "average": {"$avg": "$total_time"}}}
+        ]))
+        if documents:
+            return documents[0]["average"]
+    return None
+
+def get_run_owner() -> str:
+    """Host and process that executes a run, stored next to its heartbeat."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def add_run_record(run_count: int, test_case: TestCase, qa_batch_id: str | None = None, total_queries: int | None = None):
+    """
+    Add a run record to the runs collection. The run stays running until finish_run_record is called,
+    its heartbeat is refreshed by touch_run_heartbeat while queries are processed.
     """
     run_record = {
         "test_id": test_case.test_id,
@@ -140,7 +193,15 @@ def add_run_record(run_count: int, test_case: TestCase, qa_batch_id: str | None
         "options": [{"name": option.name, "is_enabled": option.is_enabled, "data": option.data} for option in test_case.options],
         "run_count" : run_count,
         "rag_database": test_case.rag_database,
-        "qa_batch_id": qa_batch_id
+        "qa_batch_id": qa_batch_id,
+        "run_type": FULL_RUN_TYPE,
+        "status": RUN_STATUS_RUNNING,
+        "owner": get_run_owner(),
+        "heartbeat_at": datetime.datetime.now(),
+        "total_queries": total_queries,
+        "completed_query_ids": [],
+        "resume_count": 0,
+        "resumptions": []
         }
 
     collection = GLOBAL_MONGO_DB_CLIENT.get_runs_collection()
@@ -148,6 +209,127 @@ def add_run_record(run_count: int, test_case: TestCase, qa_batch_id: str | None
 
     logger.info(f"Run record for run {run_count} added to database.")
 
+def load_run_record(run_count: int):
+    collection = GLOBAL_MONGO_DB_CLIENT.get_runs_collection()
+    return collection.find_one({"run_count": run_count})
+
+def mark_query_completed(run_count: int, query_id: str):
+    """Record a query of a run as done, so resuming the run skips it."""
+    collection = GLOBAL_MONGO_DB_CLIENT.get_runs_collection()
+    collection.update_one({"run_count": run_count}, {"$addToSet": {"completed_query_ids": query_id}})
+
+def touch_run_heartbeat(run_count: int):
+    """Refresh a run's heartbeat, showing the run is still being processed."""
+    collection = GLOBAL_MONGO_DB_CLIENT.get_runs_collection()
+    collection.update_one({"run_count": run_count}, {"$set": {"heartbeat_at": datetime.datetime.now(), "owner": get_run_owner()}})
+
+@contextmanager
+def run_heartbeat(run_count: int):
+    """
+    Keep a run's heartbeat fresh while the block runs, from a daemon thread that refreshes it every
+    third of RUN_HEARTBEAT_STALE_AFTER. A single query can take longer than the stale window through
+    LLM retries and rate limiting, so the heartbeat does not depend on queries finishing.
+    """
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(RUN_HEARTBEAT_STALE_AFTER / 3):
+            try:
+                touch_run_heartbeat(run_count)
+            except Exception as e:
+                logger.warning(f"Could not refresh the heartbeat of run {run_count}: {e}")
+
+    touch_run_heartbeat(run_count)
+    thread = threading.Thread(target=beat, name=f"run-heartbeat-{run_count}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+def is_run_alive(run: dict) -> bool:
+    """Whether a running run's heartbeat is recent enough that it is still being processed."""
+    heartbeat_at = run.get("heartbeat_at")
+    if run.get("status") != RUN_STATUS_RUNNING or not isinstance(heartbeat_at, datetime.datetime):
+        return False
+    return datetime.datetime.now() - heartbeat_at < datetime.timedelta(seconds=RUN_HEARTBEAT_STALE_AFTER)
+
+def add_run_resumption(run_count: int, remaining_queries: int) -> bool:
+    """
+    Claim a run for resumption: count the resumption, mark it running again and take over its heartbeat.
+
+    The claim is a single conditional update, so it fails if the run is no longer resumable or is
+    running with a fresh heartbeat, e.g. still in progress or already resumed by another process.
+
+    Returns:
+        True if the run was claimed
+    """
+    now = datetime.datetime.now()
+    stale_before = now - datetime.timedelta(seconds=RUN_HEARTBEAT_STALE_AFTER)
+    collection = GLOBAL_MONGO_DB_CLIENT.get_runs_collection()
+    result = collection.update_one({
+        "run_count": run_count,
+        "status": {"$in": RESUMABLE_RUN_STATUSES},
+        # Records from before heartbeats have none and count as interrupted
+        "$or": [{"status": {"$ne": RUN_STATUS_RUNNING}}, {"heartbeat_at": {"$not": {"$gt": stale_before}}}]
+    }, {
+        "$set": {"status": RUN_STATUS_RUNNING, "heartbeat_at": now, "owner": get_run_owner()},
+        "$inc": {"resume_count": 1},
+        "$push": {"resumptions": {"time_stamp": str(now), "remaining_queries": remaining_queries}}
+    })
+    return result.modified_count == 1
+
+def finish_run_record(run_count: int) -> str:
+    """
+    Mark a run completed if every query is done, otherwise partial.
+
+    Returns:
+        The run's new status
+    """
+    collection = GLOBAL_MONGO_DB_CLIENT.get_runs_collection()
+    document = collection.find_one({"run_count": run_count})
+    completed = len(document.get("completed_query_ids", []))
+    status = RUN_STATUS_COMPLETED if completed >= (document.get("total_queries") or 0) else RUN_STATUS_PARTIAL
+    collection.update_one({"run_count": run_count}, {"$set": {"status": status, "finished_at": str(datetime.datetime.now())}})
+    logger.info(f"Run {run_count} {status} with {completed}/{document.get('total_queries')} queries.")
+    return status
+
+def delete_unfinished_results(run_count: int, completed_query_ids: list[str]) -> int:
+    """
+    Delete a run's results of queries that are not marked completed, e.g. failed queries or one
+    that was being saved when the process died, before those queries are run again.
+    """
+    collection = GLOBAL_MONGO_DB_CLIENT.get_results_collection()
+    result = collection.delete_many({"run_count": run_count, "query_id": {"$nin": completed_query_ids}})
+    return result.deleted_count
+
+def add_retrieval_run_record(run_count: int, test_case: TestCase, qa_batch_id: str | None, evaluation: dict):
+    """
+    Add a retrieval-only run record with its metrics to the runs collection.
+    """
+    run_record = {
+        "test_id": test_case.test_id,
+        "embedding_model": test_case.embedding_model_name,
+        "chunk_size": test_case.chunk_size,
+        "chunk_overlap": test_case.chunk_overlap,
+        "similar_vector_count" : test_case.similar_vector_count,
+        "time_stamp" : str(datetime.datetime.now()),
+        "run_count" : run_count,
+        "rag_database": test_case.rag_database,
+        "qa_batch_id": qa_batch_id,
+        "run_type": RETRIEVAL_RUN_TYPE,
+        "retrieval_metrics": evaluation["metrics"],
+        "evaluated_queries": evaluation["evaluated_queries"],
+        "skipped_queries": evaluation["skipped_queries"],
+        "retrieval_k": evaluation["k"]
+        }
+
+    collection = GLOBAL_MONGO_DB_CLIENT.get_runs_collection()
+    collection.insert_one(run_record)
+
+    logger.info(f"Retrieval run record for run {run_count} added to database.")
+
 if __name__ == "__main__":
     test_cases = load_test_cases()
     print(f"Loaded {len(test_cases)} test cases.")
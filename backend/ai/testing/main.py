@@ -1,27 +1,54 @@
 from bson import ObjectId
 from langchain_chroma import Chroma
-from langchain_groq import ChatGroq
-from langchain.schema import SystemMessage, HumanMessage
 from dotenv import load_dotenv
 from backend.ai.llm.llm_as_a_judge.models import JudgeOutput
-from backend.ai.llm.rag import rag_invoke
+from backend.ai.llm.rag import rag_invoke, get_retrieval_depth
 from backend.ai.vectordb.utils import load_vectordb
-from backend.ai.testing.io_utils import add_test_result, load_queries_expected_answers_batch_by_id, load_test_case_by_test_id, load_system_message_by_id, load_run_count, increment_run_count, add_run_record
+from backend.ai.vectordb.retrieval import batch_similarity_search
+from backend.ai.vectordb.retrieval_cache import load_cached_chunks_batch, store_cached_chunks_batch
+from backend.ai.testing.io_utils import add_test_result, load_queries_expected_answers_batch_by_id, load_test_case_by_test_id, load_system_message_by_id, allocate_run_count, add_run_record, load_run_record, mark_query_completed, run_heartbeat, is_run_alive, add_run_resumption, finish_run_record, delete_unfinished_results
 from backend.ai.testing.models import RagResponse, TestCase
 from backend.ai.llm.llm_as_a_judge.agent import llm_as_a_judge
 from backend.ai.llm.cross_encoder import rerank_with_cross_encoder
-from backend.common.constants import HYBRID_DB_OPTION, VECTOR_DB_OPTION, GRAPH_DB_OPTION
+from backend.common.constants import HYBRID_DB_OPTION, VECTOR_DB_OPTION, GRAPH_DB_OPTION, RESUMABLE_RUN_STATUSES
 import sys
 
 from backend.utils.logger import get_logger
+from backend.utils.metrics import trace_query, stage_timer
 
 # Load environment variables
 
 logger = get_logger()
 
-def run_test(test_case:TestCase, query_expeced_answer, run_count:int, vector_db:Chroma):
+def precompute_retrievals(test_case: TestCase, queries_and_expected_answers: list[dict], vector_db: Chroma) -> list[list] | None:
+    """
+    Retrieve the chunks of every query in the batch with one batched embedding call and one
+    multi-query vector search. Queries found in the retrieval cache are not searched again.
+
+    Returns:
+        The chunks of each query in batch order, or None if the test case does not use the vector DB
+    """
+    if test_case.rag_database != VECTOR_DB_OPTION or vector_db is None or not queries_and_expected_answers:
+        return None
+
+    depth = get_retrieval_depth(test_case.options, test_case.similar_vector_count)
+    queries = [qa["query"] for qa in queries_and_expected_answers]
+    with stage_timer("batch_retrieval", db=test_case.rag_database):
+        retrievals = load_cached_chunks_batch(vector_db, queries, depth)
+        missing = [i for i, chunks in enumerate(retrievals) if chunks is None]
+        if missing:
+            results = batch_similarity_search(vector_db, [queries[i] for i in missing], depth)
+            store_cached_chunks_batch(vector_db, [queries[i] for i in missing], depth, results)
+            for i, scored_chunks in zip(missing, results):
+                retrievals[i] = [chunk for chunk, _ in scored_chunks]
+    return retrievals
+
+def run_test(test_case:TestCase, query_expeced_answer, run_count:int, vector_db:Chroma, precomputed_chunks:list|None = None):
     """
     Run a single test with the given parameters and save the results to a JSON file.
+
+    Returns:
+        True if the query was answered and judged, False if an error result was saved
     """
     evaluation: None | JudgeOutput = None
     chunk_evaluation: None | JudgeOutput = None
@@ -29,39 +56,49 @@ def run_test(test_case:TestCase, query_expeced_answer, run_count:int, vector_db:
     rag_metadata: None | dict = None
     error_message: str = ''
 
-    try:
-        rag: RagResponse = rag_invoke(
-            test_case.llm_name,
-            test_case.system_message,
-            vector_db,
-            test_case.similar_vector_count,
-            query_expeced_answer["query"],
-            test_case.options,
-            test_case.rag_database
-        )
-        rag_response = rag.content
-        rag_metadata = rag.metadata
-    except Exception as e:
-        error_message = (f"RAG system error: {e}")
-        logger.error(error_message)
-        add_test_result(test_case,query_expeced_answer, rag_response, rag_metadata["retrieved_chunks"],evaluation,chunk_evaluation, run_count, error_message)
-        return
+    with trace_query() as trace:
+        try:
+            rag: RagResponse = rag_invoke(
+                test_case.llm_name,
+                test_case.system_message,
+                vector_db,
+                test_case.similar_vector_count,
+                query_expeced_answer["query"],
+                test_case.options,
+                test_case.rag_database,
+                precomputed_chunks
+            )
+            rag_response = rag.content
+            rag_metadata = rag.metadata
+        except Exception as e:
+            error_message = (f"RAG system error: {e}")
+            logger.error(error_message)
+            add_test_result(test_case,query_expeced_answer, rag_response, [],evaluation,chunk_evaluation, run_count, error_message, trace.to_dict())
+            return False
 
-    try:
-        evaluation, chunk_evaluation = llm_as_a_judge(
-            query_expeced_answer["query"],
-            rag_response,
-            query_expeced_answer["answer"],
-            rag_metadata["retrieved_chunks"]
-        )
+        try:
+            evaluation, chunk_evaluation = llm_as_a_judge(
+                query_expeced_answer["query"],
+                rag_response,
+                query_expeced_answer["answer"],
+                rag_metadata["retrieved_chunks"]
+            )
 
-    except Exception as e:
-        error_message = (f"LLM judge evaluation error: {e}")
-        logger.error(error_message)
-        add_test_result(test_case,query_expeced_answer, rag_response, rag_metadata["retrieved_chunks"],evaluation,chunk_evaluation, run_count, error_message)
-        return
+        except Exception as e:
+            error_message = (f"LLM judge evaluation error: {e}")
+            logger.error(error_message)
+            add_test_result(test_case,query_expeced_answer, rag_response, rag_metadata["retrieved_chunks"],evaluation,chunk_evaluation, run_count, error_message, trace.to_dict())
+            return False
 
-    add_test_result(test_case,query_expeced_answer, rag_response, rag_metadata["retrieved_chunks"],evaluation,chunk_evaluation, run_count, error_message)
+    logger.debug(f"Stage timings: {trace.stages}")
+    add_test_result(test_case,query_expeced_answer, rag_response, rag_metadata["retrieved_chunks"],evaluation,chunk_evaluation, run_count, error_message, trace.to_dict())
+    return True
+
+def load_test_vectordb(test_case: TestCase) -> Chroma | None:
+    """Load the vector DB of a test case, None for graph DB test cases."""
+    if test_case.rag_database in [VECTOR_DB_OPTION, HYBRID_DB_OPTION]:
+        return load_vectordb(test_case.embedding_model_name, test_case.chunk_size, test_case.chunk_overlap)
+    return None
 
 def run_test_case_by_test_id(test_id):
     load_dotenv(override=True)
@@ -71,10 +108,7 @@ def run_test_case_by_test_id(test_id):
         test_case = load_test_case_by_test_id(test_id)
         qa_batch_id = test_case.qa_batch
         queries_and_expected_answers = load_queries_expected_answers_batch_by_id(qa_batch_id)
-        if(test_case.rag_database in [VECTOR_DB_OPTION, HYBRID_DB_OPTION]):
-            vector_db = load_vectordb(test_case.embedding_model_name,test_case.chunk_size,test_case.chunk_overlap)  
-        else:
-            vector_db = None
+        vector_db = load_test_vectordb(test_case)
         logger.debug(f"Successfully loaded test case and {len(queries_and_expected_answers)} Q&A pairs")
     except Exception as e:
         logger.error(f"Failed to load test case or Q&A batch for test_id {test_id}: {e}")
@@ -83,27 +117,94 @@ def run_test_case_by_test_id(test_id):
     try:
         logger.debug(f"Loading system message with ID: {test_case.system_message}")
         system_message = load_system_message_by_id(test_case.system_message)
-        run_count = load_run_count()
         test_case.system_message = system_message["content"]
         logger.debug("Successfully loaded system message")
     except Exception as e:
         logger.error(f"Failed to load system message for test_id {test_id}: {e}")
         raise Exception(f"System message loading failed: {e}") from e
 
-    logger.info(f"Running test case {test_case.test_id} with {len(queries_and_expected_answers)} queries.")
-    add_run_record(run_count, test_case, qa_batch_id)
+    run_test_case(test_case, queries_and_expected_answers, vector_db)
 
-    try:
-        for i, query in enumerate(queries_and_expected_answers, 1):
-            logger.debug(f"Processing query {i}/{len(queries_and_expected_answers)}")
-            run_test(test_case, query, run_count, vector_db)
-        
-        increment_run_count()
-        logger.info(f"Successfully completed all {len(queries_and_expected_answers)} tests")
-    except Exception as e:
-        logger.error(f"Test execution failed during query processing: {e}")
-        raise Exception(f"Test execution failed: {e}") from e
+def run_test_case(test_case: TestCase, queries_and_expected_answers: list[dict], vector_db: Chroma | None, precomputed: list[list] | None = None, run_count: int | None = None) -> int:
+    """
+    Run every query of a loaded test case under a new run_count, or continue an existing run.
+
+    Each successful query is checkpointed in the run record, so an interrupted or partially
+    failed run can be continued with resume_run.
+
+    Args:
+        test_case: Test case with its system message content loaded
+        queries_and_expected_answers: Q&A pairs to run
+        vector_db: Loaded vector DB, None for graph DB test cases
+        precomputed: Chunks of each query retrieved ahead of time, computed here if not given
+        run_count: Run to continue, a new run is started if not given
+
+    Returns:
+        The run_count of the run
+    """
+    if run_count is None:
+        run_count = allocate_run_count()
+        add_run_record(run_count, test_case, test_case.qa_batch, len(queries_and_expected_answers))
+    logger.info(f"Running test case {test_case.test_id} with {len(queries_and_expected_answers)} queries under run {run_count}.")
+
+    with run_heartbeat(run_count):
+        if precomputed is None:
+            try:
+                precomputed = precompute_retrievals(test_case, queries_and_expected_answers, vector_db)
+            except Exception as e:
+                # Fall back to per-query retrieval, errors then surface in each test result
+                logger.error(f"Batched retrieval failed, retrieving per query: {e}")
+
+        try:
+            for i, query in enumerate(queries_and_expected_answers, 1):
+                logger.debug(f"Processing query {i}/{len(queries_and_expected_answers)}")
+                if run_test(test_case, query, run_count, vector_db, precomputed[i - 1] if precomputed else None):
+                    mark_query_completed(run_count, str(query["_id"]))
+            
+            status = finish_run_record(run_count)
+            logger.info(f"Finished {len(queries_and_expected_answers)} tests of run {run_count} ({status})")
+        except Exception as e:
+            logger.error(f"Test execution failed during query processing: {e}")
+            raise Exception(f"Test execution failed: {e}") from e
+    return run_count
+
+def resume_run(run_count: int) -> dict:
+    """
+    Continue an interrupted or partially failed run, running only the queries it has not completed.
+
+    Returns:
+        The run_count, the number of queries run again and the run's new status
+    """
+    load_dotenv(override=True)
+
+    run = load_run_record(run_count)
+    if run is None:
+        raise ValueError(f"Run {run_count} not found")
+    if run.get("status") not in RESUMABLE_RUN_STATUSES:
+        raise ValueError(f"Run {run_count} cannot be resumed (status: {run.get('status', 'unknown')})")
+    if is_run_alive(run):
+        raise ValueError(f"Run {run_count} is still in progress on {run.get('owner', 'unknown')} (last heartbeat {run['heartbeat_at']})")
+
+    # The run record holds the exact config the run started with, even if the test case was edited since
+    test_case = TestCase(run["test_id"], run["llm"], run["embedding_model"], run["system_message"], run["chunk_size"], run["chunk_overlap"], run["similar_vector_count"], run["options"], run["qa_batch_id"], run["rag_database"])
+    completed_query_ids = run.get("completed_query_ids", [])
+    queries_and_expected_answers = load_queries_expected_answers_batch_by_id(test_case.qa_batch)
+    remaining = [qa for qa in queries_and_expected_answers if str(qa["_id"]) not in set(completed_query_ids)]
+
+    # Claim the run before touching its results, a run that came back to life or was resumed meanwhile keeps them
+    if not add_run_resumption(run_count, len(remaining)):
+        raise ValueError(f"Run {run_count} is no longer resumable, it is in progress or was resumed by another process")
+    deleted = delete_unfinished_results(run_count, completed_query_ids)
+    logger.info(f"Resuming run {run_count} with {len(remaining)} of {len(queries_and_expected_answers)} queries "
+                f"({deleted} unfinished results removed)")
+
+    vector_db = load_test_vectordb(test_case)
+    run_test_case(test_case, remaining, vector_db, run_count=run_count)
+    return {"run_count": run_count, "resumed_queries": len(remaining), "status": load_run_record(run_count)["status"]}
 
 if __name__ == "__main__":
-    test_id = int(sys.argv[1])
-    run_test_case_by_test_id(test_id)
+    if sys.argv[1] == "resume":
+        resume_run(int(sys.argv[2]))
+    else:
+        test_id = int(sys.argv[1])
+        run_test_case_by_test_id(test_id)
@@ -0,0 +1,156 @@
+import re
+import sys
+
+import numpy as np
+from dotenv import load_dotenv
+from backend.ai.vectordb.retrieval import batch_similarity_search
+from backend.ai.vectordb.utils import load_vectordb
+from backend.ai.testing.io_utils import load_test_case_by_test_id, load_queries_expected_answers_batch_by_id, allocate_run_count, add_retrieval_run_record
+from backend.common.config import RETRIEVAL_EVAL_KS
+from backend.common.constants import VECTOR_DB_OPTION
+from backend.utils.logger import get_logger
+from backend.utils.metrics import stage_timer
+
+logger = get_logger()
+
+"""
+Retrieval-only evaluation. Replays a QA batch against the test case's vector DB without any
+LLM calls and scores the retrieved pages against the pages labeled in each QA pair's `path`.
+"""
+
+PAGE_NUMBER_PATTERN = re.compile(r"\d+")
+PAGE_RANGE_DASH_PATTERN = re.compile(r"\s*[-–]\s*")
+
+
+def parse_labeled_pages(path: str | None) -> set[int]:
+    """
+    Parse the page numbers labeled in a QA pair's path, e.g. "12", "12, 14" or "s. 12-13".
+
+    Ranges such as "12-14" or "12 - 14" are expanded.
+    """
+    if not path:
+        return set()
+    # Join spaced ranges before splitting on whitespace, "12 - 14" would otherwise become 12 and 14
+    path = PAGE_RANGE_DASH_PATTERN.sub("-", path)
+    pages = set()
+    for part in re.split(r"[,;/\s]+", path):
+        numbers = [int(n) for n in PAGE_NUMBER_PATTERN.findall(part)]
+        if "-" in part and len(numbers) == 2 and numbers[0] <= numbers[1]:
+            pages.update(range(numbers[0], numbers[1] + 1))
+        else:
+            pages.update(numbers)
+    return pages
+
+
+def compute_retrieval_metrics(retrieved_pages: np.ndarray, labeled_pages: list[set[int]], ks: list[int]) -> dict:
+    """
+    Compute recall@k, hit rate@k, MRR and nDCG@k for a whole batch at once.
+
+    Args:
+        retrieved_pages: Int matrix (queries x retrieved) of page numbers in rank order, -1 for padding
+        labeled_pages: Labeled relevant pages for each query
+        ks: Cutoffs to report
+
+    Returns:
+        Dictionary of metrics averaged over the batch
+    """
+    query_count, depth = retrieved_pages.shape
+    label_width = max(len(labels) for labels in labeled_pages)
+    labels = np.full((query_count, label_width), -2, dtype=np.int64)
+    for i, pages in enumerate(labeled_pages):
+        labels[i, :len(pages)] = sorted(pages)
+    label_counts = np.array([len(pages) for pages in labeled_pages], dtype=np.float64)
+
+    # matches[i, j, l]: retrieved rank j of query i is labeled page l
+    matches = retrieved_pages[:, :, None] == labels[:, None, :]
+    relevant = matches.any(axis=2)
+
+    # Several chunks can come from the same page, only the first one counts as a new relevant page
+    same_page = retrieved_pages[:, :, None] == retrieved_pages[:, None, :]
+    earlier = np.tril(np.ones((depth, depth), dtype=bool), k=-1)
+    repeated = (same_page & earlier[None, :, :]).any(axis=2)
+    gains = (relevant & ~repeated).astype(np.float64)
+
+    discounts = 1.0 / np.log2(np.arange(depth) + 2)
+    first_relevant = np.where(relevant.any(axis=1), relevant.argmax(axis=1), -1)
+    reciprocal_ranks = np.where(first_relevant >= 0, 1.0 / (np.maximum(first_relevant, 0) + 1), 0.0)
+
+    metrics = {"mrr": float(reciprocal_ranks.mean())}
+    for k in ks:
+        k = min(k, depth)
+        found = matches[:, :k, :].any(axis=1).sum(axis=1)
+        dcg = (gains[:, :k] * discounts[:k]).sum(axis=1)
+        ideal_hits = np.minimum(label_counts, k).astype(int)
+        idcg = np.cumsum(discounts[:k])[ideal_hits - 1]
+        metrics[f"recall_at_{k}"] = float((found / label_counts).mean())
+        metrics[f"hit_rate_at_{k}"] = float(relevant[:, :k].any(axis=1).mean())
+        metrics[f"ndcg_at_{k}"] = float((dcg / idcg).mean())
+    return metrics
+
+
+def evaluate_retrieval(db, queries_and_expected_answers: list[dict], k: int, ks: list[int]) -> dict:
+    """
+    Retrieve chunks for every labeled QA pair in one batch and score them.
+
+    Returns:
+        Dictionary with the batch metrics and evaluated/skipped query counts
+    """
+    labeled = [(qa, parse_labeled_pages(qa.get("path"))) for qa in queries_and_expected_answers]
+    labeled = [(qa, pages) for qa, pages in labeled if pages]
+    skipped = len(queries_and_expected_answers) - len(labeled)
+    if skipped:
+        logger.warning(f"Skipping {skipped} QA pairs without labeled pages")
+    if not labeled:
+        raise ValueError("No QA pairs with labeled pages in this batch")
+
+    depth = max([k] + ks)
+    with stage_timer("retrieval", db=VECTOR_DB_OPTION):
+        results = batch_similarity_search(db, [qa["query"] for qa, _ in labeled], depth)
+
+    retrieved_pages = np.full((len(results), depth), -1, dtype=np.int64)
+    for i, chunks in enumerate(results):
+        pages = [int(chunk.metadata.get("page", -1)) for chunk, _ in chunks]
+        retrieved_pages[i, :len(pages)] = pages
+
+    metrics = compute_retrieval_metrics(retrieved_pages, [pages for _, pages in labeled], ks)
+    return {
+        "metrics": metrics,
+        "evaluated_queries": len(labeled),
+        "skipped_queries": skipped,
+        "k": depth
+    }
+
+
+def run_retrieval_eval_by_test_id(test_id) -> dict:
+    """
+    Run a retrieval-only evaluation for a test case and store it as a retrieval run.
+
+    Returns:
+        The stored run summary including the metrics
+    """
+    load_dotenv(override=True)
+
+    test_case = load_test_case_by_test_id(test_id)
+    if test_case is None:
+        raise ValueError(f"Test case {test_id} not found")
+    if test_case.rag_database != VECTOR_DB_OPTION:
+        raise ValueError(f"Retrieval-only evaluation needs a {VECTOR_DB_OPTION} test case, got {test_case.rag_database}")
+
+    queries_and_expected_answers = load_queries_expected_answers_batch_by_id(test_case.qa_batch)
+    vector_db = load_vectordb(test_case.embedding_model_name, test_case.chunk_size, test_case.chunk_overlap)
+    if vector_db is None:
+        raise ValueError(f"Vector DB for test case {test_id} could not be loaded")
+
+    logger.info(f"Running retrieval-only evaluation of test case {test_id} with {len(queries_and_expected_answers)} queries")
+    evaluation = evaluate_retrieval(vector_db, queries_and_expected_answers, test_case.similar_vector_count, RETRIEVAL_EVAL_KS)
+
+    run_count = allocate_run_count()
+    add_retrieval_run_record(run_count, test_case, test_case.qa_batch, evaluation)
+    logger.info(f"Retrieval metrics for run {run_count}: {evaluation['metrics']}")
+
+    return {"run_count": run_count, **evaluation}
+
+
+if __name__ == "__main__":
+    test_id = int(sys.argv[1])
+    run_retrieval_eval_by_test_id(test_id)
@@ -0,0 +1,263 @@
+import argparse
+import copy
+import gc
+import itertools
+import json
+import sys
+import time
+
+from dotenv import load_dotenv
+from backend.ai.llm.cross_encoder import pinned_cross_encoders
+from backend.ai.llm.rag import get_retrieval_depth
+from backend.ai.llm.self_rag.self_rag import get_self_rag_n
+from backend.ai.testing.io_utils import load_test_case_by_test_id, load_queries_expected_answers_batch_by_id, load_system_message_by_id, load_average_query_time
+from backend.ai.testing.main import run_test_case, precompute_retrievals
+from backend.ai.testing.models import TestCase
+from backend.ai.vectordb.utils import load_vectordb
+from backend.common.constants import CROSS_ENCODER_OPTION, SELF_RAG_OPTION, VECTOR_DB_OPTION, HYBRID_DB_OPTION
+from backend.utils.logger import get_logger
+
+logger = get_logger()
+
+"""
+Test matrix scheduler. Expands a list of test IDs or a parameter grid into work items and runs
+them in an order where each vector DB is opened once and each reranker is loaded once.
+Items with the same retrieval config share one batched retrieval of their QA batch.
+
+Usage:
+    python -m backend.ai.testing.sweep --test-ids 1 2 3
+    python -m backend.ai.testing.sweep --grid grid.json
+
+A grid file varies the fields of a base test case, any field left out keeps the base value:
+    {
+        "base_test_id": 3,
+        "llm_name": ["llama-3.3-70b-versatile"],
+        "embedding_model_name": ["sentence-transformers/LaBSE", "BAAI/bge-m3"],
+        "chunk_config": [[500, 50], [1000, 100]],
+        "similar_vector_count": [5, 10],
+        "cross_encoder": [null, "cross-encoder/ms-marco-MiniLM-L-6-v2"],
+        "self_rag_n": [null, 3]
+    }
+"""
+
+GRID_TEST_CASE_FIELDS = ["llm_name", "embedding_model_name", "similar_vector_count", "system_message"]
+
+
+class WorkItem():
+    def __init__(self, test_case: TestCase):
+        self.test_case = test_case
+        self.estimated_time: float | None = None
+        self.actual_time: float | None = None
+        self.run_count: int | None = None
+        self.error: str = ""
+
+    @property
+    def db_key(self) -> tuple | None:
+        """Vector DB the item needs, None for graph DB test cases."""
+        if self.test_case.rag_database not in [VECTOR_DB_OPTION, HYBRID_DB_OPTION]:
+            return None
+        return (self.test_case.embedding_model_name, self.test_case.chunk_size, self.test_case.chunk_overlap)
+
+    @property
+    def reranker(self) -> str:
+        for option in self.test_case.options:
+            if option.name == CROSS_ENCODER_OPTION and option.is_enabled:
+                return option.data
+        return ""
+
+    @property
+    def self_rag_n(self) -> int:
+        for option in self.test_case.options:
+            if option.name == SELF_RAG_OPTION and option.is_enabled:
+                return get_self_rag_n(option)
+        return 0
+
+    @property
+    def retrieval_key(self) -> tuple:
+        """Items with equal keys retrieve exactly the same chunks."""
+        depth = get_retrieval_depth(self.test_case.options, self.test_case.similar_vector_count)
+        return (self.db_key, self.test_case.rag_database, self.test_case.qa_batch, depth)
+
+    def sort_key(self) -> tuple:
+        return (self.db_key is None, self.db_key or (), self.reranker, self.self_rag_n, self.test_case.llm_name)
+
+    def to_dict(self) -> dict:
+        return {
+            "test_id": self.test_case.test_id,
+            "llm": self.test_case.llm_name,
+            "embedding_model": self.test_case.embedding_model_name,
+            "chunk_size": self.test_case.chunk_size,
+            "chunk_overlap": self.test_case.chunk_overlap,
+            "similar_vector_count": self.test_case.similar_vector_count,
+            "reranker": self.reranker,
+            "self_rag_n": self.self_rag_n,
+            "run_count": self.run_count,
+            "estimated_time": self.estimated_time,
+            "actual_time": self.actual_time,
+            "error": self.error
+        }
+
+
+def expand_test_ids(test_ids: list[int]) -> list[WorkItem]:
+    items = []
+    for test_id in test_ids:
+        test_case = load_test_case_by_test_id(test_id)
+        if test_case is None:
+            raise ValueError(f"Test case {test_id} not found")
+        items.append(WorkItem(test_case))
+    return items
+
+
+def expand_grid(grid: dict) -> list[WorkItem]:
+    """Expand a parameter grid over a base test case into one work item per combination."""
+    base = load_test_case_by_test_id(grid["base_test_id"])
+    if base is None:
+        raise ValueError(f"Base test case {grid['base_test_id']} not found")
+
+    axes = {field: grid[field] for field in GRID_TEST_CASE_FIELDS if field in grid}
+    for field in ["chunk_config", "cross_encoder", "self_rag_n"]:
+        if field in grid:
+            axes[field] = grid[field]
+
+    items = []
+    for values in itertools.product(*axes.values()):
+        test_case = copy.deepcopy(base)
+        for field, value in zip(axes.keys(), values):
+            if field == "chunk_config":
+                test_case.chunk_size, test_case.chunk_overlap = value
+            elif field == "cross_encoder":
+                test_case.update_option(CROSS_ENCODER_OPTION, value is not None, value)
+            elif field == "self_rag_n":
+                test_case.update_option(SELF_RAG_OPTION, value is not None, str(value) if value is not None else None)
+            else:
+                setattr(test_case, field, value)
+        items.append(WorkItem(test_case))
+    return items
+
+
+def schedule(items: list[WorkItem]) -> list[WorkItem]:
+    """Order work items so each vector DB and reranker is loaded once."""
+    return sorted(items, key=lambda item: item.sort_key())
+
+
+def estimate(items: list[WorkItem], query_counts: dict) -> float:
+    """
+    Estimate each item's wall-clock time from the measured per-query times of earlier results.
+
+    Returns:
+        The total estimate over the items that have history
+    """
+    for item in items:
+        average = load_average_query_time(item.test_case)
+        if average is not None:
+            item.estimated_time = average * query_counts[item.test_case.qa_batch]
+    return sum(item.estimated_time or 0.0 for item in items)
+
+
+def run_sweep(items: list[WorkItem]) -> dict:
+    """
+    Run scheduled work items, opening each vector DB once and sharing retrievals between items.
+
+    Returns:
+        Summary with per-item and total estimated and actual wall-clock times
+    """
+    load_dotenv(override=True)
+    items = schedule(items)
+
+    qa_batches = {}
+    system_messages = {}
+    for item in items:
+        qa_batch = item.test_case.qa_batch
+        if qa_batch not in qa_batches:
+            qa_batches[qa_batch] = load_queries_expected_answers_batch_by_id(qa_batch)
+        system_message_id = item.test_case.system_message
+        if system_message_id not in system_messages:
+            system_messages[system_message_id] = load_system_message_by_id(system_message_id)["content"]
+        item.test_case.system_message = system_messages[system_message_id]
+
+    estimated_total = estimate(items, {batch: len(queries) for batch, queries in qa_batches.items()})
+    logger.info(f"Sweep of {len(items)} work items, estimated {estimated_total:.0f}s "
+                f"({sum(item.estimated_time is None for item in items)} items without history)")
+
+    vector_db_key, vector_db = None, None
+    retrievals = {}
+    start = time.perf_counter()
+    with pinned_cross_encoders({item.reranker for item in items if item.reranker}):
+        for i, item in enumerate(items, 1):
+            test_case = item.test_case
+            logger.info(f"Sweep item {i}/{len(items)}: test {test_case.test_id}, {item.db_key}, "
+                        f"reranker={item.reranker or 'none'}, self_rag_n={item.self_rag_n}, llm={test_case.llm_name}")
+            item_start = time.perf_counter()
+            try:
+                if item.db_key != vector_db_key and item.db_key is not None:
+                    # Release the previous DB before opening the next one
+                    vector_db = None
+                    retrievals = {}
+                    gc.collect()
+                    vector_db, vector_db_key = load_vectordb(*item.db_key), None
+                    if vector_db is None:
+                        raise ValueError(f"Vector DB {item.db_key} could not be loaded")
+                    vector_db_key = item.db_key
+
+                queries = qa_batches[test_case.qa_batch]
+                item_db = vector_db if item.db_key is not None else None
+                if item.retrieval_key not in retrievals:
+                    try:
+                        retrievals[item.retrieval_key] = precompute_retrievals(test_case, queries, item_db)
+                    except Exception as e:
+                        logger.error(f"Batched retrieval failed, retrieving per query: {e}")
+                        retrievals[item.retrieval_key] = None
+                item.run_count = run_test_case(test_case, queries, item_db, retrievals[item.retrieval_key])
+            except Exception as e:
+                logger.error(f"Sweep item {i} failed: {e}")
+                item.error = str(e)
+            item.actual_time = time.perf_counter() - item_start
+
+    actual_total = time.perf_counter() - start
+    estimated_items = [item for item in items if item.estimated_time is not None]
+    summary = {
+        "items": [item.to_dict() for item in items],
+        "estimated_time": estimated_total,
+        "actual_time": actual_total,
+        # Compare on the items that had an estimate so new configs do not skew the ratio
+        "estimated_items_actual_time": sum(item.actual_time for item in estimated_items),
+        "failed_items": sum(bool(item.error) for item in items)
+    }
+    logger.info(f"Sweep finished in {actual_total:.0f}s, estimated {estimated_total:.0f}s "
+                f"(actual {summary['estimated_items_actual_time']:.0f}s for items with an estimate)")
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a matrix of test cases ordered to minimize model and DB reloads")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--test-ids", type=int, nargs="+", help="Test case IDs to run")
+    source.add_argument("--grid", help="JSON file with a parameter grid over a base test case")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the schedule and the estimate")
+    parser.add_argument("--output", help="Where to write the sweep summary JSON")
+    args = parser.parse_args(argv)
+
+    if args.grid:
+        with open(args.grid, "r", encoding="utf-8") as f:
+            items = expand_grid(json.load(f))
+    else:
+        items = expand_test_ids(args.test_ids)
+
+    if args.dry_run:
+        items = schedule(items)
+        query_counts = {batch: len(load_queries_expected_answers_batch_by_id(batch)) for batch in {item.test_case.qa_batch for item in items}}
+        estimated_total = estimate(items, query_counts)
+        summary = {"items": [item.to_dict() for item in items], "estimated_time": estimated_total}
+    else:
+        summary = run_sweep(items)
+
+    output = json.dumps(summary, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+    return 1 if summary.get("failed_items") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
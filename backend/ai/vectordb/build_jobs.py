@@ -0,0 +1,158 @@
+import datetime
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Lock
+
+from backend.ai.vectordb.catalog import get_catalog_key
+from backend.ai.vectordb.index_params import normalize_index_params
+from backend.common.config import VECTOR_DB_BUILD_WORKERS
+from backend.common.constants import (
+    BUILD_JOB_QUEUED,
+    BUILD_JOB_RUNNING,
+    BUILD_JOB_COMPLETED,
+    BUILD_JOB_FAILED,
+    BUILD_JOB_CANCELLED,
+    BUILD_JOB_FINISHED_STATUSES,
+)
+from backend.common.paths import construct_db_path
+from backend.utils.logger import get_logger
+
+logger = get_logger()
+
+"""
+This file contains the background vector DB build jobs. POST /vectordb/create submits a job and
+returns at once; the job parses, splits and embeds the document in a worker thread and reports
+its progress until the new DB is renamed into place. Jobs live in memory for the lifetime of the
+API process.
+"""
+
+
+class BuildJob:
+    def __init__(self, embedding_model_name: str, chunk_size: int, chunk_overlap: int, index_params: dict | None = None):
+        self.id = uuid.uuid4().hex
+        self.embedding_model_name = embedding_model_name
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.index_params = normalize_index_params(index_params)
+        self.status = BUILD_JOB_QUEUED
+        self.progress = {}
+        self.error = ""
+        self.created_at = str(datetime.datetime.now())
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = Event()
+
+    @property
+    def key(self) -> str:
+        return get_catalog_key(self.embedding_model_name, self.chunk_size, self.chunk_overlap)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "name": self.embedding_model_name,
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+            "index_params": self.index_params,
+            "status": self.status,
+            "progress": dict(self.progress),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+class BuildJobManager:
+    """Singleton that queues vector DB builds on a small worker pool"""
+    _instance = None
+    _lock = Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance.jobs = {}
+                    cls._instance.executor = ThreadPoolExecutor(
+                        max_workers=VECTOR_DB_BUILD_WORKERS,
+                        thread_name_prefix="vectordb-build"
+                    )
+        return cls._instance
+
+    def submit(self, embedding_model_name: str, chunk_size: int, chunk_overlap: int, index_params: dict | None = None) -> BuildJob:
+        """
+        Queue a build, or return the unfinished job that already builds the same vector DB.
+
+        Raises:
+            FileExistsError: If the vector DB already exists
+            ValueError: On invalid index parameters
+        """
+        with self._lock:
+            job = BuildJob(embedding_model_name, chunk_size, chunk_overlap, index_params)
+            for existing in self.jobs.values():
+                if existing.key == job.key and existing.status not in BUILD_JOB_FINISHED_STATUSES:
+                    return existing
+            if construct_db_path(embedding_model_name, chunk_size, chunk_overlap).exists():
+                raise FileExistsError(f"Vector database {job.key} already exists")
+            self.jobs[job.id] = job
+        self.executor.submit(self._run, job)
+        logger.info(f"Queued vector DB build {job.id} for {job.key}")
+        return job
+
+    def get(self, job_id: str) -> BuildJob:
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise KeyError(f"Build job {job_id} not found")
+        return job
+
+    def list(self) -> list[BuildJob]:
+        return sorted(self.jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> BuildJob:
+        """Ask a job to stop; a running build stops after its current step and removes its temporary files."""
+        job = self.get(job_id)
+        with self._lock:
+            if job.status in BUILD_JOB_FINISHED_STATUSES:
+                return job
+            job.cancel_event.set()
+            if job.status == BUILD_JOB_QUEUED:
+                self._finish(job, BUILD_JOB_CANCELLED)
+        logger.info(f"Cancellation requested for vector DB build {job.id}")
+        return job
+
+    def _finish(self, job: BuildJob, status: str, error: str = ""):
+        job.status = status
+        job.error = error
+        job.finished_at = str(datetime.datetime.now())
+
+    def _update_progress(self, job: BuildJob, progress: dict):
+        job.progress = progress
+
+    def _run(self, job: BuildJob):
+        from backend.ai.vectordb.utils import build_vectordb, VectorDBBuildCancelled
+
+        with self._lock:
+            if job.cancel_event.is_set():
+                return
+            job.status = BUILD_JOB_RUNNING
+            job.started_at = str(datetime.datetime.now())
+        try:
+            build_vectordb(
+                job.embedding_model_name, job.chunk_size, job.chunk_overlap,
+                index_params=job.index_params,
+                on_progress=lambda progress: self._update_progress(job, progress),
+                cancel_event=job.cancel_event,
+                build_id=job.id[:8]
+            )
+            self._finish(job, BUILD_JOB_COMPLETED)
+            logger.info(f"Vector DB build {job.id} for {job.key} completed")
+        except VectorDBBuildCancelled:
+            self._finish(job, BUILD_JOB_CANCELLED)
+            logger.info(f"Vector DB build {job.id} for {job.key} cancelled")
+        except Exception as e:
+            self._finish(job, BUILD_JOB_FAILED, str(e))
+            logger.error(f"Vector DB build {job.id} for {job.key} failed: {e}")
+
+
+# Global instance
+GLOBAL_BUILD_JOB_MANAGER = BuildJobManager()
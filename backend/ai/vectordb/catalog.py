@@ -0,0 +1,199 @@
+import datetime
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from backend.common.paths import CHROMA_DB_DIR, VECTOR_DB_CATALOG_PATH, construct_db_path
+from backend.utils.logger import get_logger
+
+logger = get_logger()
+
+"""
+This file contains the vector DB catalog, a JSON manifest in CHROMA_DB_DIR with one entry per
+built vector DB. create_vectordb and delete_vectordb keep it current, so listing the available
+DBs reads one small file instead of walking every Chroma segment directory.
+
+The web app and the CLIs update the manifest from separate processes, so every read-modify-write
+holds an OS lock on a sidecar .lock file and re-reads the manifest inside it.
+"""
+
+_lock = Lock()
+_cache = {"mtime": None, "entries": {}}
+CATALOG_LOCK_PATH = VECTOR_DB_CATALOG_PATH.with_suffix(".lock")
+
+
+def get_catalog_key(embedding_model_name, chunk_size, chunk_overlap) -> str:
+    return f"{embedding_model_name}_{chunk_size}_{chunk_overlap}"
+
+
+@contextmanager
+def _catalog_lock():
+    """Hold the in-process lock and the cross-process file lock of the manifest."""
+    with _lock:
+        CATALOG_LOCK_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(CATALOG_LOCK_PATH, "a+b") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                # msvcrt locks a byte range from the file position and gives up after a few seconds, so keep trying
+                lock_file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        time.sleep(0.05)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _read_catalog() -> dict:
+    """Read the manifest from disk, called with the catalog lock held."""
+    with open(VECTOR_DB_CATALOG_PATH, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    _cache["mtime"] = VECTOR_DB_CATALOG_PATH.stat().st_mtime_ns
+    _cache["entries"] = entries
+    return entries
+
+
+def _write_catalog(entries: dict):
+    VECTOR_DB_CATALOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    # Write then rename so readers never see a half-written manifest
+    temp_path = VECTOR_DB_CATALOG_PATH.with_suffix(f".{os.getpid()}.tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(entries, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, VECTOR_DB_CATALOG_PATH)
+    _cache["mtime"] = VECTOR_DB_CATALOG_PATH.stat().st_mtime_ns
+    _cache["entries"] = entries
+
+
+def load_catalog() -> dict:
+    """
+    Get the catalog entries keyed by embedding_model_chunk_size_chunk_overlap.
+
+    The parsed manifest is cached in memory until the file changes. A missing manifest is
+    built once from the DB directories already on disk.
+    """
+    if not VECTOR_DB_CATALOG_PATH.exists():
+        with _catalog_lock():
+            # Another process may have built it while this one waited for the lock
+            if not VECTOR_DB_CATALOG_PATH.exists():
+                _write_catalog(scan_vectordbs())
+                return _cache["entries"]
+
+    with _lock:
+        mtime = VECTOR_DB_CATALOG_PATH.stat().st_mtime_ns
+        if _cache["mtime"] != mtime:
+            with open(VECTOR_DB_CATALOG_PATH, "r", encoding="utf-8") as f:
+                _cache["entries"] = json.load(f)
+            _cache["mtime"] = mtime
+        return _cache["entries"]
+
+
+def get_catalog_entry(embedding_model_name, chunk_size, chunk_overlap) -> dict | None:
+    return load_catalog().get(get_catalog_key(embedding_model_name, chunk_size, chunk_overlap))
+
+
+def register_vectordb(embedding_model_name, chunk_size, chunk_overlap, chunk_count=None, build_seconds=None, embedding_dimension=None, **extra):
+    """Add or replace the catalog entry of a built vector DB."""
+    db_path = construct_db_path(embedding_model_name, chunk_size, chunk_overlap)
+    entry = {
+        "embedding_model": embedding_model_name,
+        "chunk_size": int(chunk_size),
+        "chunk_overlap": int(chunk_overlap),
+        "chunk_count": chunk_count,
+        "disk_size_mb": round(get_directory_size_mb(db_path), 3),
+        "build_seconds": round(build_seconds, 3) if build_seconds is not None else None,
+        "embedding_dimension": embedding_dimension,
+        "path": str(Path(db_path).relative_to(CHROMA_DB_DIR)),
+        "created_at": str(datetime.datetime.now()),
+        **extra
+    }
+    load_catalog()
+    with _catalog_lock():
+        entries = _read_catalog()
+        entries[get_catalog_key(embedding_model_name, chunk_size, chunk_overlap)] = entry
+        _write_catalog(entries)
+    logger.info(f"Registered vector DB {get_catalog_key(embedding_model_name, chunk_size, chunk_overlap)} in the catalog")
+    return entry
+
+
+def update_catalog_entry(embedding_model_name, chunk_size, chunk_overlap, **fields):
+    """Update fields of an existing catalog entry."""
+    key = get_catalog_key(embedding_model_name, chunk_size, chunk_overlap)
+    load_catalog()
+    with _catalog_lock():
+        entries = _read_catalog()
+        if key not in entries:
+            raise ValueError(f"Vector DB {key} is not in the catalog")
+        entries[key] = {**entries[key], **fields}
+        _write_catalog(entries)
+    return entries[key]
+
+
+def unregister_vectordb(embedding_model_name, chunk_size, chunk_overlap):
+    """Remove the catalog entry of a deleted vector DB."""
+    load_catalog()
+    with _catalog_lock():
+        entries = _read_catalog()
+        if entries.pop(get_catalog_key(embedding_model_name, chunk_size, chunk_overlap), None) is not None:
+            _write_catalog(entries)
+
+
+def get_directory_size_mb(path) -> float:
+    path = Path(path)
+    if not path.exists():
+        return 0.0
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file()) / (1024 * 1024)
+
+
+def scan_vectordbs() -> dict:
+    """
+    Find the vector DBs on disk by their directory names, used to build a missing catalog.
+
+    Chunk count, build time and embedding dimension of scanned DBs are unknown.
+    """
+    entries = {}
+    chroma_path = Path(CHROMA_DB_DIR)
+    if not chroma_path.exists():
+        return entries
+
+    # Model names with a "/" create a nested directory, e.g. chroma_db_BAAI/bge-m3_500_50
+    db_name_pattern = re.compile(r"^chroma_db_(?P<model>.+)_(?P<chunk_size>\d+)_(?P<chunk_overlap>\d+)$")
+    candidates = [item for item in chroma_path.iterdir() if item.is_dir()]
+    candidates += [child for item in candidates for child in item.iterdir() if child.is_dir()]
+    for item in candidates:
+        match = db_name_pattern.match(item.relative_to(chroma_path).as_posix())
+        if match is None or not (item / "chroma.sqlite3").exists():
+            continue
+        key = get_catalog_key(match["model"], match["chunk_size"], match["chunk_overlap"])
+        entries[key] = {
+            "embedding_model": match["model"],
+            "chunk_size": int(match["chunk_size"]),
+            "chunk_overlap": int(match["chunk_overlap"]),
+            "chunk_count": None,
+            "disk_size_mb": round(get_directory_size_mb(item), 3),
+            "build_seconds": None,
+            "embedding_dimension": None,
+            "index_params": None,
+            "path": item.relative_to(chroma_path).as_posix(),
+            "created_at": None
+        }
+    logger.info(f"Built vector DB catalog from {len(entries)} directories on disk")
+    return entries
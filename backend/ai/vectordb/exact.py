@@ -0,0 +1,166 @@
+import numpy as np
+from langchain.docstore.document import Document
+from backend.ai.vectordb.quantization import fit_quantizer
+from backend.common.config import VECTOR_DB_RESCORE_FACTOR
+from backend.utils.logger import get_logger
+
+logger = get_logger()
+
+"""
+This file contains the exact search backend. It copies a Chroma collection's embeddings into one
+contiguous float32 or float16 matrix and answers searches with a matrix multiply, which is exact
+and, at the few thousand chunks of an SGK config, faster than going through Chroma's HNSW and
+SQLite layers. It implements the parts of the langchain Chroma interface that rag_invoke, the
+retrieval cache and the batched retrieval use, so it can be returned by load_vectordb in place of
+a Chroma instance.
+
+With a quantizer attached, searches first score the compact int8 or PQ codes and rescore the
+best VECTOR_DB_RESCORE_FACTOR * k candidates against the float vectors.
+"""
+
+EXACT_DTYPES = {"float32": np.float32, "float16": np.float16}
+# Rows multiplied at once, bounds the float32 copy made of a float16 matrix
+SEARCH_BLOCK_SIZE = 16384
+
+
+class ExactVectorStore:
+    def __init__(self, ids: list[str], texts: list[str], metadatas: list[dict], embeddings, embedding_function,
+                 space: str = "l2", dtype: str = "float32", persist_directory: str = "", collection_id: str = "",
+                 quantizer=None, rescore_factor: int = VECTOR_DB_RESCORE_FACTOR):
+        if dtype not in EXACT_DTYPES:
+            raise ValueError(f"Unknown exact search dtype {dtype}, expected one of {', '.join(EXACT_DTYPES)}")
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if space == "cosine":
+            matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+        # Same attribute name as langchain's Chroma, embed_queries reads it
+        self.embeddings = embedding_function
+        self.space = space
+        self.dtype = dtype
+        self.persist_directory = persist_directory
+        self.collection_id = collection_id
+        self._ids = list(ids)
+        self._texts = list(texts)
+        self._metadatas = [metadata or {} for metadata in metadatas]
+        self._positions = {chunk_id: i for i, chunk_id in enumerate(self._ids)}
+        self._matrix = np.ascontiguousarray(matrix, dtype=EXACT_DTYPES[dtype])
+        self._squared_norms = (matrix ** 2).sum(axis=1) if space == "l2" else None
+        self.quantizer = quantizer
+        self.rescore_factor = rescore_factor
+
+    @classmethod
+    def from_chroma(cls, vector_db, dtype: str = "float32") -> "ExactVectorStore":
+        """Copy the vectors, texts and metadata of a loaded Chroma collection."""
+        collection = vector_db._collection
+        data = collection.get(include=["embeddings", "documents", "metadatas"])
+        store = cls(
+            data["ids"], data["documents"], data["metadatas"], data["embeddings"],
+            vector_db.embeddings,
+            space=(collection.metadata or {}).get("hnsw:space", "l2"),
+            dtype=dtype,
+            persist_directory=str(getattr(vector_db, "_persist_directory", "") or ""),
+            collection_id=str(collection.id)
+        )
+        logger.info(f"Loaded {store.count()} vectors into the exact search backend ({dtype}, {store.memory_mb():.1f} MB)")
+        return store
+
+    def quantize(self, quantization: str, subvectors: int | None = None):
+        """Train int8 or PQ codes over the stored vectors and use them for first-stage search."""
+        self.quantizer = fit_quantizer(self._matrix.astype(np.float32), quantization, subvectors)
+        # Quantized results can differ, the retrieval cache has to fingerprint the store again
+        self.__dict__.pop("_retrieval_cache_fingerprint", None)
+        logger.info(f"Quantized {self.count()} vectors with {quantization}: {self.quantizer.nbytes / (1024 * 1024):.2f} MB "
+                    f"of codes for {self.memory_mb():.2f} MB of {self.dtype} vectors")
+        return self.quantizer
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def memory_mb(self) -> float:
+        return self._matrix.nbytes / (1024 * 1024)
+
+    def _document(self, position: int) -> Document:
+        return Document(page_content=self._texts[position], metadata=dict(self._metadatas[position]), id=self._ids[position])
+
+    def _prepare_queries(self, vectors) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.space == "cosine":
+            vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors
+
+    def _distances(self, vectors: np.ndarray) -> np.ndarray:
+        """Distances of every query to every row, in the same units Chroma reports for the space."""
+        vectors = self._prepare_queries(vectors)
+
+        products = np.empty((len(vectors), len(self._ids)), dtype=np.float32)
+        for start in range(0, len(self._ids), SEARCH_BLOCK_SIZE):
+            block = self._matrix[start:start + SEARCH_BLOCK_SIZE]
+            products[:, start:start + len(block)] = vectors @ block.astype(np.float32, copy=False).T
+
+        if self.space == "l2":
+            return (vectors ** 2).sum(axis=1)[:, None] - 2 * products + self._squared_norms[None, :]
+        return 1 - products
+
+    def _rescored_distances(self, vectors: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """Candidates from the quantized codes and their full-precision distances, one row per query."""
+        vectors = self._prepare_queries(vectors)
+        candidate_count = min(len(self._ids), k * self.rescore_factor)
+        approximate = self.quantizer.approximate_distances(vectors, self.space)
+        candidates = np.argpartition(approximate, candidate_count - 1, axis=1)[:, :candidate_count]
+        distances = np.empty(candidates.shape, dtype=np.float32)
+        for i, (vector, rows) in enumerate(zip(vectors, candidates)):
+            # Sorted rows read a memory-mapped matrix front to back
+            rows.sort()
+            products = self._matrix[rows].astype(np.float32) @ vector
+            if self.space == "l2":
+                distances[i] = vector @ vector - 2 * products + self._squared_norms[rows]
+            else:
+                distances[i] = 1 - products
+        return candidates, distances
+
+    def similarity_search_by_vectors(self, vectors, k: int) -> list[list[tuple[Document, float]]]:
+        """
+        Search several query embeddings at once, exactly unless a quantizer is attached.
+
+        Returns:
+            For each query, a list of (chunk, distance) pairs ordered from closest to farthest
+        """
+        if len(vectors) == 0 or not self._ids:
+            return [[] for _ in range(len(vectors))]
+        k = min(k, len(self._ids))
+        if self.quantizer is not None:
+            candidates, distances = self._rescored_distances(vectors, k)
+        else:
+            distances = self._distances(vectors)
+            candidates = np.broadcast_to(np.arange(len(self._ids)), distances.shape)
+        results = []
+        for row, positions in zip(distances, candidates):
+            nearest = np.argpartition(row, k - 1)[:k]
+            nearest = nearest[np.argsort(row[nearest], kind="stable")]
+            results.append([(self._document(int(positions[i])), float(row[i])) for i in nearest])
+        return results
+
+    def similarity_search_by_vector_with_score(self, embedding, k: int = 4) -> list[tuple[Document, float]]:
+        return self.similarity_search_by_vectors(np.asarray([embedding]), k)[0]
+
+    def similarity_search_by_vector(self, embedding, k: int = 4, **kwargs) -> list[Document]:
+        return [document for document, _ in self.similarity_search_by_vector_with_score(embedding, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs) -> list[tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self.embeddings.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs) -> list[Document]:
+        return [document for document, _ in self.similarity_search_with_score(query, k)]
+
+    def get(self, ids: list[str] | None = None, include: list[str] | None = None) -> dict:
+        """Chunks by id in the shape of Chroma's get, unknown ids are skipped."""
+        include = include or ["documents", "metadatas"]
+        positions = range(len(self._ids)) if ids is None else [self._positions[i] for i in ids if i in self._positions]
+        result = {"ids": [self._ids[position] for position in positions]}
+        if "documents" in include:
+            result["documents"] = [self._texts[position] for position in positions]
+        if "metadatas" in include:
+            result["metadatas"] = [self._metadatas[position] for position in positions]
+        if "embeddings" in include:
+            result["embeddings"] = self._matrix[list(positions)].astype(np.float32)
+        return result
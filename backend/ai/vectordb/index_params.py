@@ -0,0 +1,55 @@
+from backend.common.config import VECTOR_DB_DEFAULT_INDEX_PARAMS
+from backend.common.constants import HNSW_SPACES
+
+"""
+This file contains the HNSW index parameters of a vector DB collection: space, M,
+construction_ef and search_ef. Chroma stores them as hnsw:* collection metadata when the
+collection is created and keeps them fixed afterwards, so changing them means rebuilding the DB.
+"""
+
+HNSW_PARAM_TYPES = {
+    "space": str,
+    "M": int,
+    "construction_ef": int,
+    "search_ef": int,
+}
+
+
+def normalize_index_params(index_params: dict | None = None) -> dict:
+    """
+    Fill missing index parameters with the defaults and validate them.
+
+    Raises:
+        ValueError: On unknown parameters, an unknown space or non-positive sizes
+    """
+    index_params = dict(index_params or {})
+    unknown = set(index_params) - set(HNSW_PARAM_TYPES)
+    if unknown:
+        raise ValueError(f"Unknown index parameters: {', '.join(sorted(unknown))}")
+
+    params = {name: cast(index_params.get(name, VECTOR_DB_DEFAULT_INDEX_PARAMS[name])) for name, cast in HNSW_PARAM_TYPES.items()}
+    if params["space"] not in HNSW_SPACES:
+        raise ValueError(f"Unknown HNSW space {params['space']}, expected one of {', '.join(HNSW_SPACES)}")
+    for name in ("M", "construction_ef", "search_ef"):
+        if params[name] <= 0:
+            raise ValueError(f"Index parameter {name} must be positive")
+    return params
+
+
+def to_collection_metadata(index_params: dict) -> dict:
+    """Chroma collection metadata for the given index parameters."""
+    return {f"hnsw:{name}": value for name, value in normalize_index_params(index_params).items()}
+
+
+def from_collection_metadata(metadata: dict | None) -> dict:
+    """Index parameters of an existing collection, Chroma defaults for those it does not set."""
+    metadata = metadata or {}
+    return normalize_index_params({
+        name: metadata[f"hnsw:{name}"] for name in HNSW_PARAM_TYPES if f"hnsw:{name}" in metadata
+    })
+
+
+def get_setting_name(index_params: dict) -> str:
+    """Short label of a parameter set, e.g. l2_M16_cef100_ef10."""
+    params = normalize_index_params(index_params)
+    return f"{params['space']}_M{params['M']}_cef{params['construction_ef']}_ef{params['search_ef']}"
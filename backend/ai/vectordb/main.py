@@ -1,15 +1,15 @@
 # db.py
 from threading import Lock
-from backend.ai.vectordb.utils import load_vectordb
-from langchain_chroma import Chroma
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from langchain_chroma import Chroma
 
-import os
-os.environ['ALLOW_RESET'] = 'TRUE'
 
 class VectorDB:
     _instance = None
     _lock = Lock()
-    db: Chroma = None
+    db: "Chroma" = None
     
     def __new__(cls):
         if cls._instance is None:
@@ -25,16 +25,17 @@ class VectorDB:
         return self.name
 
     def load_db(self, embedding_model, chunk_size, chunk_overlap):
+        # Imported here so the web app starts without loading langchain and the embedding stack
+        from backend.ai.vectordb.utils import load_vectordb
         self.close()
         self.db = load_vectordb(embedding_model, chunk_size, chunk_overlap)
         self.name = f"{embedding_model}_{chunk_size}_{chunk_overlap}"
 
     def close(self):
         if hasattr(self, 'db'):
-            if hasattr(self.db, '_client'):
-                self.db._client.reset()  # Reset the client
-
-            # Clear references
+            # Only the reference is dropped. Resetting the client would delete every collection in its
+            # directory, and the directory is often reopened right away, e.g. to switch search backends.
+            # The client itself stays in chromadb's per-path cache, which other loads of the DB may share
             self.db = None
 
             # Force garbage collection
@@ -0,0 +1,160 @@
+import numpy as np
+from backend.utils.logger import get_logger
+
+logger = get_logger()
+
+"""
+This file contains the compressed vector codes used for first-stage search. ScalarQuantizer
+stores every dimension as one uint8 (4x smaller than float32), ProductQuantizer stores every
+group of dimensions as the uint8 id of its nearest centroid (d * 4 / subvectors times smaller).
+ExactVectorStore searches the codes for a few times k candidates and rescores them against the
+float vectors, which a snapshot keeps on disk behind a memory map.
+"""
+
+INT8_QUANTIZATION = "int8"
+PQ_QUANTIZATION = "pq"
+QUANTIZATIONS = [INT8_QUANTIZATION, PQ_QUANTIZATION]
+# Codes turned into float32 at once while scoring, bounds the temporary copy
+SCORE_BLOCK_SIZE = 16384
+
+
+def _approximate_from_products(products: np.ndarray, queries: np.ndarray, squared_norms: np.ndarray | None, space: str) -> np.ndarray:
+    if space == "l2":
+        return (queries ** 2).sum(axis=1)[:, None] - 2 * products + squared_norms[None, :]
+    return 1 - products
+
+
+class ScalarQuantizer:
+    """Per-dimension affine uint8 codes: x ~ offset + scale * code."""
+    name = INT8_QUANTIZATION
+
+    def __init__(self, codes: np.ndarray, offset: np.ndarray, scale: np.ndarray, squared_norms: np.ndarray):
+        self.codes = codes
+        self.offset = offset
+        self.scale = scale
+        self.squared_norms = squared_norms
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray) -> "ScalarQuantizer":
+        vectors = np.asarray(vectors, dtype=np.float32)
+        low, high = vectors.min(axis=0), vectors.max(axis=0)
+        scale = np.maximum(high - low, 1e-12) / 255
+        codes = np.clip(np.rint((vectors - low) / scale), 0, 255).astype(np.uint8)
+        decoded = low + scale * codes.astype(np.float32)
+        return cls(codes, low.astype(np.float32), scale.astype(np.float32), (decoded ** 2).sum(axis=1).astype(np.float32))
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.offset.nbytes + self.scale.nbytes + self.squared_norms.nbytes
+
+    def approximate_distances(self, queries: np.ndarray, space: str) -> np.ndarray:
+        # q . x ~ q . offset + (q * scale) . code
+        scaled = queries * self.scale[None, :]
+        products = np.empty((len(queries), len(self.codes)), dtype=np.float32)
+        for start in range(0, len(self.codes), SCORE_BLOCK_SIZE):
+            block = self.codes[start:start + SCORE_BLOCK_SIZE].astype(np.float32)
+            products[:, start:start + len(block)] = scaled @ block.T
+        products += (queries @ self.offset)[:, None]
+        return _approximate_from_products(products, queries, self.squared_norms, space)
+
+    def to_sections(self) -> dict[str, np.ndarray]:
+        return {"codes": self.codes, "offset": self.offset, "scale": self.scale, "squared_norms": self.squared_norms}
+
+    @classmethod
+    def from_sections(cls, sections: dict[str, np.ndarray], parameters: dict, count: int, dimension: int) -> "ScalarQuantizer":
+        return cls(
+            sections["codes"].view(np.uint8).reshape(count, dimension),
+            sections["offset"].view(np.float32),
+            sections["scale"].view(np.float32),
+            sections["squared_norms"].view(np.float32)
+        )
+
+
+class ProductQuantizer:
+    """Subvector codes, each one the id of the nearest of up to 256 k-means centroids of its subspace."""
+    name = PQ_QUANTIZATION
+
+    def __init__(self, codes: np.ndarray, centroids: np.ndarray):
+        self.codes = codes
+        self.centroids = centroids
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray, subvectors: int, iterations: int = 20, seed: int = 0) -> "ProductQuantizer":
+        vectors = np.asarray(vectors, dtype=np.float32)
+        count, dimension = vectors.shape
+        if dimension % subvectors:
+            raise ValueError(f"Dimension {dimension} is not divisible into {subvectors} subvectors")
+        width = dimension // subvectors
+        centroid_count = min(256, count)
+        rng = np.random.default_rng(seed)
+
+        codes = np.empty((count, subvectors), dtype=np.uint8)
+        centroids = np.empty((subvectors, centroid_count, width), dtype=np.float32)
+        for j in range(subvectors):
+            subspace = vectors[:, j * width:(j + 1) * width]
+            # Lloyd's k-means, empty clusters keep their previous centroid
+            center = subspace[rng.choice(count, centroid_count, replace=False)].copy()
+            for _ in range(iterations):
+                assignment = cls._nearest(subspace, center)
+                sums = np.zeros_like(center)
+                np.add.at(sums, assignment, subspace)
+                sizes = np.bincount(assignment, minlength=centroid_count)
+                filled = sizes > 0
+                center[filled] = sums[filled] / sizes[filled, None]
+            codes[:, j] = cls._nearest(subspace, center)
+            centroids[j] = center
+        return cls(codes, centroids)
+
+    @staticmethod
+    def _nearest(points: np.ndarray, centers: np.ndarray) -> np.ndarray:
+        distances = (points ** 2).sum(axis=1)[:, None] - 2 * points @ centers.T + (centers ** 2).sum(axis=1)[None, :]
+        return distances.argmin(axis=1)
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.centroids.nbytes
+
+    def approximate_distances(self, queries: np.ndarray, space: str) -> np.ndarray:
+        subvectors, _, width = self.centroids.shape
+        distances = np.zeros((len(queries), len(self.codes)), dtype=np.float32)
+        for j in range(subvectors):
+            query_part = queries[:, j * width:(j + 1) * width]
+            if space == "l2":
+                table = ((query_part[:, None, :] - self.centroids[j][None, :, :]) ** 2).sum(axis=2)
+            else:
+                table = -(query_part @ self.centroids[j].T)
+            distances += table[:, self.codes[:, j]]
+        return distances if space == "l2" else 1 + distances
+
+    def to_sections(self) -> dict[str, np.ndarray]:
+        return {"codes": self.codes, "centroids": self.centroids}
+
+    @classmethod
+    def from_sections(cls, sections: dict[str, np.ndarray], parameters: dict, count: int, dimension: int) -> "ProductQuantizer":
+        subvectors, centroid_count = parameters["subvectors"], parameters["centroid_count"]
+        return cls(
+            sections["codes"].view(np.uint8).reshape(count, subvectors),
+            sections["centroids"].view(np.float32).reshape(subvectors, centroid_count, dimension // subvectors)
+        )
+
+
+def fit_quantizer(vectors: np.ndarray, quantization: str, subvectors: int | None = None):
+    """Train int8 or PQ codes for a float matrix."""
+    if quantization == INT8_QUANTIZATION:
+        return ScalarQuantizer.fit(vectors)
+    if quantization == PQ_QUANTIZATION:
+        return ProductQuantizer.fit(vectors, subvectors or max(1, vectors.shape[1] // 16))
+    raise ValueError(f"Unknown quantization {quantization}, expected one of {', '.join(QUANTIZATIONS)}")
+
+
+def get_quantizer_parameters(quantizer) -> dict:
+    """Header fields a snapshot needs to read the quantizer's sections back."""
+    parameters = {"name": quantizer.name}
+    if isinstance(quantizer, ProductQuantizer):
+        parameters["subvectors"], parameters["centroid_count"] = quantizer.centroids.shape[:2]
+    return parameters
+
+
+def load_quantizer(sections: dict[str, np.ndarray], parameters: dict, count: int, dimension: int):
+    quantizer_class = ScalarQuantizer if parameters["name"] == INT8_QUANTIZATION else ProductQuantizer
+    return quantizer_class.from_sections(sections, parameters, count, dimension)
@@ -0,0 +1,67 @@
+import numpy as np
+from langchain.docstore.document import Document
+from backend.utils.logger import get_logger
+
+logger = get_logger()
+
+"""
+This file contains batched retrieval helpers: all queries of a batch are embedded in a single
+encoder call and looked up with one multi-query vector search instead of one
+similarity_search per query.
+"""
+
+
+def embed_queries(db, queries: list[str]) -> np.ndarray:
+    """
+    Embed every query with the vector DB's embedding model in one batched call.
+
+    Args:
+        db: Vector DB instance exposing an `embeddings` model
+        queries: Query strings
+
+    Returns:
+        Float32 matrix with one row per query
+    """
+    if not queries:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.asarray(db.embeddings.embed_documents(queries), dtype=np.float32)
+
+
+def search_by_vectors(db, vectors: np.ndarray, k: int) -> list[list[tuple[Document, float]]]:
+    """
+    Run one vector search for several query embeddings.
+
+    Args:
+        db: Vector DB instance
+        vectors: Query embedding matrix, one row per query
+        k: Number of chunks to retrieve per query
+
+    Returns:
+        For each query, a list of (chunk, distance) pairs ordered from closest to farthest
+    """
+    if len(vectors) == 0:
+        return []
+    if hasattr(db, "similarity_search_by_vectors"):
+        # The exact backend searches all vectors with one matrix multiply
+        return db.similarity_search_by_vectors(vectors, k)
+
+    result = db._collection.query(
+        query_embeddings=vectors.tolist(),
+        n_results=k,
+        include=["documents", "metadatas", "distances"]
+    )
+
+    batch_results = []
+    for ids, texts, metadatas, distances in zip(result["ids"], result["documents"], result["metadatas"], result["distances"]):
+        batch_results.append([
+            (Document(page_content=text, metadata=metadata or {}, id=chunk_id), distance)
+            for chunk_id, text, metadata, distance in zip(ids, texts, metadatas, distances)
+        ])
+    return batch_results
+
+
+def batch_similarity_search(db, queries: list[str], k: int) -> list[list[tuple[Document, float]]]:
+    """Embed and search a whole batch of queries."""
+    logger.info(f"Running batched retrieval for {len(queries)} queries (k={k})")
+    vectors = embed_queries(db, queries)
+    return search_by_vectors(db, vectors, k)
@@ -0,0 +1,200 @@
+import datetime
+import hashlib
+from threading import Lock
+
+from langchain.docstore.document import Document
+from backend.ai.vectordb.exact import ExactVectorStore
+from backend.ai.vectordb.quantization import get_quantizer_parameters
+from backend.common.config import RETRIEVAL_CACHE_ENABLED
+from backend.common.constants import SEARCH_BACKEND_EXACT
+from backend.utils.logger import get_logger
+
+logger = get_logger()
+
+"""
+This file contains the persistent retrieval cache. Retrieved and reranked chunk ids are stored in
+MongoDB keyed by (collection fingerprint, query hash, k, retrieval options), so test cases that
+only differ in LLM, system message or judge settings reuse the same retrieval.
+
+The fingerprint includes the Chroma collection id, which changes whenever a collection is
+rebuilt, so entries of an old build are never served and are purged on first use of the new one.
+"""
+
+_indexes_created = False
+_purged_fingerprints = set()
+_purge_lock = Lock()
+
+
+def _get_collection():
+    global _indexes_created
+    from backend.web.database.main import GLOBAL_MONGO_DB_CLIENT
+    collection = GLOBAL_MONGO_DB_CLIENT.get_retrieval_cache_collection()
+    if not _indexes_created:
+        collection.create_index("db_path")
+        _indexes_created = True
+    return collection
+
+
+def get_collection_fingerprint(db) -> tuple[str, str]:
+    """
+    Identify the exact build of a vector DB collection.
+
+    The fingerprint is computed once per loaded instance and kept on it. Loading or building a
+    vector DB always creates a new instance, so a reload or rebuild starts without it.
+
+    Returns:
+        The persist directory and a fingerprint of the collection id and chunk count
+    """
+    cached = getattr(db, "_retrieval_cache_fingerprint", None)
+    if cached is not None:
+        return cached
+
+    if isinstance(db, ExactVectorStore):
+        # Exact results can differ from the HNSW ones, and so can those of another dtype, of a quantized
+        # first stage or of a snapshot's HNSW graph. Keep each configuration apart without purging each other
+        db_path = f"{db.persist_directory}#{SEARCH_BACKEND_EXACT}:{get_exact_search_config(db)}"
+        fingerprint = f"{db_path}|{db.collection_id}|{db.count()}"
+    else:
+        db_path = str(getattr(db, "_persist_directory", "") or "")
+        collection = db._collection
+        fingerprint = f"{db_path}|{collection.id}|{collection.count()}"
+    db._retrieval_cache_fingerprint = (db_path, hashlib.sha256(fingerprint.encode("utf-8")).hexdigest())
+    return db._retrieval_cache_fingerprint
+
+
+def get_exact_search_config(db: ExactVectorStore) -> str:
+    """The settings of an exact or snapshot store that change which chunks a search returns."""
+    config = db.dtype
+    if db.quantizer is not None:
+        parameters = get_quantizer_parameters(db.quantizer)
+        config += ":" + ",".join(f"{name}={value}" for name, value in sorted(parameters.items()))
+        config += f",rescore_factor={db.rescore_factor}"
+    if getattr(db, "_graph", None) is not None:
+        config += ":graph"
+    return config
+
+
+def make_cache_key(fingerprint: str, query: str, k: int, options: str = "") -> str:
+    """Cache key of a retrieval, options describe any reranking applied on top of the vector search."""
+    query_hash = hashlib.sha256(query.encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{fingerprint}|{query_hash}|{k}|{options}".encode("utf-8")).hexdigest()
+
+
+def _purge_stale_entries(collection, db_path: str, fingerprint: str):
+    """Delete entries stored for earlier builds of the same vector DB, once per process."""
+    if fingerprint in _purged_fingerprints:
+        return
+    with _purge_lock:
+        if fingerprint in _purged_fingerprints:
+            return
+        result = collection.delete_many({"db_path": db_path, "fingerprint": {"$ne": fingerprint}})
+        if result.deleted_count:
+            logger.info(f"Purged {result.deleted_count} retrieval cache entries of a rebuilt vector DB at {db_path}")
+        _purged_fingerprints.add(fingerprint)
+
+
+def _load_documents(db, ids: list[str]) -> dict[str, Document]:
+    """Fetch chunks by id, Chroma does not guarantee the order of the result."""
+    if not ids:
+        return {}
+    result = db.get(ids=ids, include=["documents", "metadatas"])
+    return {
+        chunk_id: Document(page_content=text, metadata=metadata or {}, id=chunk_id)
+        for chunk_id, text, metadata in zip(result["ids"], result["documents"], result["metadatas"])
+    }
+
+
+def load_cached_chunks_batch(db, queries: list[str], k: int, options: str = "") -> list[list[Document] | None]:
+    """
+    Look up cached retrievals for several queries with one MongoDB query and one chunk fetch.
+
+    Returns:
+        The cached chunks of each query in order, None for queries that are not cached
+    """
+    if not RETRIEVAL_CACHE_ENABLED or not queries:
+        return [None] * len(queries)
+
+    try:
+        collection = _get_collection()
+        db_path, fingerprint = get_collection_fingerprint(db)
+        _purge_stale_entries(collection, db_path, fingerprint)
+
+        keys = [make_cache_key(fingerprint, query, k, options) for query in queries]
+        entries = {entry["_id"]: entry for entry in collection.find({"_id": {"$in": keys}})}
+        documents = _load_documents(db, list({chunk_id for entry in entries.values() for chunk_id in entry["ids"]}))
+    except Exception as e:
+        logger.error(f"Retrieval cache lookup failed: {e}")
+        return [None] * len(queries)
+
+    results = []
+    for key in keys:
+        entry = entries.get(key)
+        if entry is None or any(chunk_id not in documents for chunk_id in entry["ids"]):
+            results.append(None)
+        else:
+            results.append([documents[chunk_id] for chunk_id in entry["ids"]])
+    logger.info(f"Retrieval cache hits: {sum(r is not None for r in results)}/{len(queries)}")
+    return results
+
+
+def load_cached_chunks(db, query: str, k: int, options: str = "") -> list[Document] | None:
+    """Look up the cached retrieval of a single query."""
+    return load_cached_chunks_batch(db, [query], k, options)[0]
+
+
+def store_cached_chunks_batch(db, queries: list[str], k: int, results: list[list[tuple[Document, float]]], options: str = ""):
+    """
+    Store the ordered chunk ids and scores of several retrievals.
+
+    Args:
+        db: Vector DB instance the chunks were retrieved from
+        queries: Query strings
+        k: Retrieval depth the results were produced with
+        results: For each query, (chunk, score) pairs in rank order
+        options: Reranking applied on top of the vector search, if any
+    """
+    if not RETRIEVAL_CACHE_ENABLED or not queries:
+        return
+
+    try:
+        from pymongo import ReplaceOne
+        collection = _get_collection()
+        db_path, fingerprint = get_collection_fingerprint(db)
+        now = datetime.datetime.now(datetime.timezone.utc)
+        operations = []
+        for query, scored_chunks in zip(queries, results):
+            ids = [chunk.id for chunk, _ in scored_chunks]
+            if any(chunk_id is None for chunk_id in ids):
+                continue
+            key = make_cache_key(fingerprint, query, k, options)
+            operations.append(ReplaceOne({"_id": key}, {
+                "_id": key,
+                "db_path": db_path,
+                "fingerprint": fingerprint,
+                "query": query,
+                "k": k,
+                "options": options,
+                "ids": ids,
+                "scores": [float(score) for _, score in scored_chunks],
+                "created_at": now
+            }, upsert=True))
+        if operations:
+            collection.bulk_write(operations, ordered=False)
+    except Exception as e:
+        logger.error(f"Retrieval cache store failed: {e}")
+
+
+def store_cached_chunks(db, query: str, k: int, scored_chunks: list[tuple[Document, float]], options: str = ""):
+    """Store the ordered chunk ids and scores of a single retrieval."""
+    store_cached_chunks_batch(db, [query], k, [scored_chunks], options)
+
+
+def cached_similarity_search(db, query: str, k: int) -> list[Document]:
+    """Similarity search that is served from the retrieval cache when possible."""
+    chunks = load_cached_chunks(db, query, k)
+    if chunks is not None:
+        return chunks
+    scored_chunks = db.similarity_search_with_score(query, k)
+    store_cached_chunks(db, query, k, scored_chunks)
+    return [chunk for chunk, _ in scored_chunks]
+
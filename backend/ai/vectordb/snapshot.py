@@ -0,0 +1,326 @@
+import argparse
+import datetime
+import json
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+from backend.ai.vectordb.catalog import get_catalog_entry, register_vectordb, update_catalog_entry
+from backend.ai.vectordb.exact import ExactVectorStore, EXACT_DTYPES
+from backend.ai.vectordb.index_params import from_collection_metadata
+from backend.ai.vectordb.quantization import QUANTIZATIONS, fit_quantizer, get_quantizer_parameters, load_quantizer
+from backend.common.config import VECTOR_DB_EXACT_DTYPE, VECTOR_DB_SNAPSHOT_USE_GRAPH, VECTOR_DB_SNAPSHOT_USE_QUANTIZATION, VECTOR_DB_RESCORE_FACTOR
+from backend.common.constants import SEARCH_BACKEND_CHROMA, SEARCH_BACKEND_SNAPSHOT
+from backend.common.paths import construct_snapshot_path
+from backend.utils.logger import get_logger
+
+logger = get_logger()
+
+"""
+This file contains the single-file vector DB snapshot. A snapshot packs a collection's vectors,
+chunk ids, texts, page metadata and optionally an HNSW graph or int8/PQ codes into one file
+that is memory-mapped read-only on load: opening it only parses a small header, the pages are
+shared by every process through the OS page cache, and deploying a DB to another host is a
+single file copy. Quantized codes are copied into memory and searched first, so only the float
+rows of the rescored candidates are read from the file.
+
+Layout: 8 byte magic, uint64 header length, JSON header, then 64 byte aligned sections whose
+offsets in the header are relative to the end of the aligned header.
+
+Usage:
+    python -m backend.ai.vectordb.snapshot export LaBSE:500:50 --dtype float16 --graph
+    python -m backend.ai.vectordb.snapshot export BAAI/bge-m3:500:50 --quantization pq --subvectors 128
+    python -m backend.ai.vectordb.snapshot import /path/to/LaBSE_500_50.snapshot
+    python -m backend.ai.vectordb.snapshot info /path/to/LaBSE_500_50.snapshot
+"""
+
+SNAPSHOT_MAGIC = b"SGKSNAP1"
+SNAPSHOT_FORMAT_VERSION = 1
+SECTION_ALIGNMENT = 64
+
+
+def _align(offset: int) -> int:
+    return -(-offset // SECTION_ALIGNMENT) * SECTION_ALIGNMENT
+
+
+def _pack_strings(values: list[str]) -> tuple[np.ndarray, bytes]:
+    """Concatenated UTF-8 strings and the uint64 offsets of their boundaries."""
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+    offsets[1:] = np.cumsum([len(value) for value in encoded], dtype=np.uint64)
+    return offsets, b"".join(encoded)
+
+
+class _StringTable:
+    """Read-only sequence over packed strings, each one decoded when it is accessed."""
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray, decode=None):
+        self._offsets = offsets
+        self._data = data
+        self._decode = decode
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, position: int):
+        value = self._data[int(self._offsets[position]):int(self._offsets[position + 1])].tobytes().decode("utf-8")
+        return self._decode(value) if self._decode else value
+
+    def __iter__(self):
+        return (self[position] for position in range(len(self)))
+
+
+def _build_graph(vectors: np.ndarray, space: str, index_params: dict) -> bytes:
+    import hnswlib
+
+    index = hnswlib.Index(space=space, dim=vectors.shape[1])
+    index.init_index(max_elements=len(vectors), ef_construction=index_params["construction_ef"], M=index_params["M"])
+    index.add_items(vectors, np.arange(len(vectors)))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "graph.bin")
+        index.save_index(path)
+        with open(path, "rb") as f:
+            return f.read()
+
+
+def _load_graph(data: np.ndarray, space: str, dimension: int, count: int, search_ef: int):
+    import hnswlib
+
+    # hnswlib only loads from a path, so the graph is copied out of the snapshot into process memory
+    index = hnswlib.Index(space=space, dim=dimension)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "graph.bin")
+        with open(path, "wb") as f:
+            f.write(data.tobytes())
+        index.load_index(path, max_elements=count)
+    index.set_ef(search_ef)
+    return index
+
+
+def write_snapshot(path, header: dict, sections: dict[str, bytes]):
+    """Write a header and its sections atomically."""
+    data_offset = 0
+    header = {**header, "sections": {}}
+    for name, data in sections.items():
+        header["sections"][name] = {"offset": data_offset, "length": len(data)}
+        data_offset = _align(data_offset + len(data))
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(temp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(np.uint64(len(header_bytes)).tobytes())
+        f.write(header_bytes)
+        data_start = _align(f.tell())
+        for name, data in sections.items():
+            f.seek(data_start + header["sections"][name]["offset"])
+            f.write(data)
+        f.truncate(data_start + data_offset)
+    os.replace(temp_path, path)
+
+
+def read_snapshot_header(path) -> dict:
+    with open(path, "rb") as f:
+        if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a vector DB snapshot")
+        header_length = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+        header = json.loads(f.read(header_length).decode("utf-8"))
+    if header.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format version {header.get('format_version')}")
+    header["data_start"] = _align(len(SNAPSHOT_MAGIC) + 8 + header_length)
+    return header
+
+
+class SnapshotVectorStore(ExactVectorStore):
+    """
+    ExactVectorStore over a memory-mapped snapshot, searched through its HNSW graph or its
+    quantized codes when it has them.
+    """
+
+    def __init__(self, path, embedding_function, use_graph: bool = VECTOR_DB_SNAPSHOT_USE_GRAPH,
+                 use_quantization: bool = VECTOR_DB_SNAPSHOT_USE_QUANTIZATION):
+        header = read_snapshot_header(path)
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = np.frombuffer(self._mmap, dtype=np.uint8)
+
+        def section(name, dtype=np.uint8):
+            info = header["sections"][name]
+            start = header["data_start"] + info["offset"]
+            return buffer[start:start + info["length"]].view(dtype)
+
+        count, dimension = header["count"], header["dimension"]
+        self.header = header
+        self.embeddings = embedding_function
+        self.space = header["space"]
+        self.dtype = header["dtype"]
+        self.persist_directory = str(path)
+        self.collection_id = header["collection_id"]
+        self._ids = _StringTable(section("ids_offsets", np.uint64), section("ids"))
+        self._texts = _StringTable(section("texts_offsets", np.uint64), section("texts"))
+        self._metadatas = _StringTable(section("metadatas_offsets", np.uint64), section("metadatas"), json.loads)
+        self._matrix = section("vectors", EXACT_DTYPES[self.dtype]).reshape(count, dimension)
+        self._squared_norms = section("squared_norms", np.float32) if self.space == "l2" else None
+        self.quantizer = None
+        self.rescore_factor = VECTOR_DB_RESCORE_FACTOR
+        if use_quantization and header.get("quantization"):
+            prefix = "quantizer_"
+            # Codes are searched on every query, keep them resident instead of paging them in
+            quantizer_sections = {name[len(prefix):]: np.array(section(name)) for name in header["sections"] if name.startswith(prefix)}
+            self.quantizer = load_quantizer(quantizer_sections, header["quantization"], count, dimension)
+        self._graph = None
+        if use_graph and "graph" in header["sections"]:
+            self._graph = _load_graph(section("graph"), self.space, dimension, count, header["index_params"]["search_ef"])
+
+    @cached_property
+    def _positions(self) -> dict:
+        return {chunk_id: position for position, chunk_id in enumerate(self._ids)}
+
+    def similarity_search_by_vectors(self, vectors, k: int):
+        if self._graph is None or len(vectors) == 0:
+            return super().similarity_search_by_vectors(vectors, k)
+        labels, distances = self._graph.knn_query(np.asarray(vectors, dtype=np.float32), k=min(k, self.count()))
+        return [
+            [(self._document(int(position)), float(distance)) for position, distance in zip(row_labels, row_distances)]
+            for row_labels, row_distances in zip(labels, distances)
+        ]
+
+
+def export_snapshot(embedding_model_name, chunk_size, chunk_overlap, output_path=None, dtype: str = VECTOR_DB_EXACT_DTYPE,
+                    include_graph: bool = False, quantization: str | None = None, subvectors: int | None = None) -> Path:
+    """
+    Pack a built vector DB into a snapshot file, by default next to the Chroma DBs where
+    load_vectordb finds it.
+
+    Args:
+        include_graph: Store an HNSW graph built with the DB's index parameters
+        quantization: Store int8 or pq codes for first-stage search
+        subvectors: PQ subvectors, dimension / 16 by default
+    """
+    from backend.ai.vectordb.utils import load_vectordb
+
+    if dtype not in EXACT_DTYPES:
+        raise ValueError(f"Unknown snapshot dtype {dtype}, expected one of {', '.join(EXACT_DTYPES)}")
+    db = load_vectordb(embedding_model_name, chunk_size, chunk_overlap, search_backend=SEARCH_BACKEND_CHROMA)
+    if db is None:
+        raise ValueError(f"Vector DB {embedding_model_name}_{chunk_size}_{chunk_overlap} could not be loaded")
+
+    collection = db._collection
+    data = collection.get(include=["embeddings", "documents", "metadatas"])
+    index_params = from_collection_metadata(collection.metadata)
+    vectors = np.asarray(data["embeddings"], dtype=np.float32)
+    if index_params["space"] == "cosine":
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    sections = {"vectors": np.ascontiguousarray(vectors, dtype=EXACT_DTYPES[dtype]).tobytes()}
+    if index_params["space"] == "l2":
+        sections["squared_norms"] = (vectors ** 2).sum(axis=1).astype(np.float32).tobytes()
+    for name, values in (
+        ("ids", data["ids"]),
+        ("texts", data["documents"]),
+        ("metadatas", [json.dumps(metadata or {}, ensure_ascii=False) for metadata in data["metadatas"]]),
+    ):
+        offsets, packed = _pack_strings(values)
+        sections[f"{name}_offsets"] = offsets.tobytes()
+        sections[name] = packed
+    if include_graph:
+        sections["graph"] = _build_graph(vectors, index_params["space"], index_params)
+    quantizer = fit_quantizer(vectors, quantization, subvectors) if quantization else None
+    if quantizer is not None:
+        for name, array in quantizer.to_sections().items():
+            sections[f"quantizer_{name}"] = np.ascontiguousarray(array).tobytes()
+
+    header = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "embedding_model": embedding_model_name,
+        "chunk_size": int(chunk_size),
+        "chunk_overlap": int(chunk_overlap),
+        "count": len(data["ids"]),
+        "dimension": int(vectors.shape[1]) if len(vectors) else 0,
+        "dtype": dtype,
+        "space": index_params["space"],
+        "index_params": index_params,
+        "quantization": get_quantizer_parameters(quantizer) if quantizer is not None else None,
+        "collection_id": str(collection.id),
+        "created_at": str(datetime.datetime.now()),
+    }
+    output_path = Path(output_path or construct_snapshot_path(embedding_model_name, chunk_size, chunk_overlap))
+    write_snapshot(output_path, header, sections)
+    logger.info(f"Exported {header['count']} chunks to snapshot {output_path} ({output_path.stat().st_size / (1024 * 1024):.1f} MB)")
+
+    if output_path == construct_snapshot_path(embedding_model_name, chunk_size, chunk_overlap) and get_catalog_entry(embedding_model_name, chunk_size, chunk_overlap):
+        update_catalog_entry(embedding_model_name, chunk_size, chunk_overlap, snapshot_dtype=dtype, snapshot_graph=include_graph,
+                             snapshot_quantization=quantization)
+    return output_path
+
+
+def import_snapshot(snapshot_path) -> dict:
+    """
+    Copy a snapshot into place and register it in the catalog with the snapshot search backend,
+    so the vector DB can be loaded on a host that does not have its Chroma directory.
+    """
+    header = read_snapshot_header(snapshot_path)
+    model, chunk_size, chunk_overlap = header["embedding_model"], header["chunk_size"], header["chunk_overlap"]
+    destination = construct_snapshot_path(model, chunk_size, chunk_overlap)
+    if Path(snapshot_path).resolve() != destination.resolve():
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = destination.with_name(f".{destination.name}.{os.getpid()}.tmp")
+        shutil.copyfile(snapshot_path, temp_path)
+        os.replace(temp_path, destination)
+
+    fields = {
+        "search_backend": SEARCH_BACKEND_SNAPSHOT,
+        "snapshot_dtype": header["dtype"],
+        "snapshot_graph": "graph" in header["sections"],
+        "snapshot_quantization": (header.get("quantization") or {}).get("name"),
+    }
+    if get_catalog_entry(model, chunk_size, chunk_overlap) is not None:
+        entry = update_catalog_entry(model, chunk_size, chunk_overlap, **fields)
+    else:
+        entry = register_vectordb(
+            model, chunk_size, chunk_overlap,
+            chunk_count=header["count"],
+            embedding_dimension=header["dimension"],
+            index_params=header["index_params"],
+            **fields
+        )
+    logger.info(f"Imported snapshot of {model}_{chunk_size}_{chunk_overlap} to {destination}")
+    return entry
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export and import single-file vector DB snapshots")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Pack a built vector DB into a snapshot")
+    export_parser.add_argument("collection", help="Vector DB as embedding_model:chunk_size:chunk_overlap")
+    export_parser.add_argument("--output", help="Snapshot path, by default where load_vectordb looks for it")
+    export_parser.add_argument("--dtype", choices=list(EXACT_DTYPES), default=VECTOR_DB_EXACT_DTYPE)
+    export_parser.add_argument("--graph", action="store_true", help="Include an HNSW graph built with the DB's index parameters")
+    export_parser.add_argument("--quantization", choices=QUANTIZATIONS, help="Include int8 or PQ codes for first-stage search")
+    export_parser.add_argument("--subvectors", type=int, help="PQ subvectors, dimension / 16 by default")
+    import_parser = commands.add_parser("import", help="Install a snapshot and search the DB through it")
+    import_parser.add_argument("path")
+    info_parser = commands.add_parser("info", help="Print the header of a snapshot")
+    info_parser.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        embedding_model, chunk_size, chunk_overlap = args.collection.rsplit(":", 2)
+        export_snapshot(embedding_model, int(chunk_size), int(chunk_overlap), args.output, args.dtype, args.graph,
+                        args.quantization, args.subvectors)
+    elif args.command == "import":
+        import_snapshot(args.path)
+    else:
+        print(json.dumps(read_snapshot_header(args.path), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
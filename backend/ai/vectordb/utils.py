@@ -1,12 +1,24 @@
 import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+import chromadb
+from pypdf import PdfReader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import UnstructuredWordDocumentLoader, PyPDFLoader
 from langchain_chroma import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
 from dotenv import load_dotenv
 from langchain.docstore.document import Document
-from backend.common.paths import SGK_DOCUMENT_PATH, construct_db_path
+from backend.common.paths import SGK_DOCUMENT_PATH, construct_db_path, construct_snapshot_path
 from backend.common.constants import LABSE
+from backend.common.constants import SEARCH_BACKEND_EXACT, SEARCH_BACKEND_SNAPSHOT, SEARCH_BACKENDS
+from backend.common.config import VECTOR_DB_BUILD_BATCH_SIZE, VECTOR_DB_DEFAULT_SEARCH_BACKEND, VECTOR_DB_EXACT_DTYPE
+from backend.ai.vectordb.catalog import register_vectordb, unregister_vectordb, get_catalog_entry, update_catalog_entry
+from backend.ai.vectordb.index_params import normalize_index_params, to_collection_metadata, from_collection_metadata
+from backend.ai.vectordb.exact import ExactVectorStore, EXACT_DTYPES
+from backend.ai.vectordb.snapshot import SnapshotVectorStore
 from backend.utils.logger import get_logger
 logger = get_logger()
 
@@ -14,56 +26,226 @@ load_dotenv()
 
 """
 This file contains the functions to create and load ChromaDB instances for the tests.
+The API builds through build_jobs.py, which runs build_vectordb in the background.
 """
 
-def create_vectordb(embedding_model_name, chunk_size, chunk_overlap):
+class VectorDBBuildCancelled(Exception):
+    """Raised by build_vectordb when its cancel event is set."""
+
+
+# chromadb versions whose client cache _release_chroma_client knows, see its docstring
+CHROMA_RELEASE_VERSIONS = ("0.6.",)
+
+def _release_chroma_client(client):
+    """
+    Close the PersistentClient of a build so its sqlite file is released before the directory is
+    renamed or removed, which Windows refuses while the file is open.
+
+    chromadb has no public API to close one client: clients are cached per path and
+    clear_system_cache() would stop the clients of every loaded DB as well. On the chromadb
+    versions in CHROMA_RELEASE_VERSIONS the build's client is dropped from that cache and stopped;
+    on others it stays open until the process exits, check the cache layout before adding one.
+    """
+    if not chromadb.__version__.startswith(CHROMA_RELEASE_VERSIONS):
+        logger.warning(f"Not closing the ChromaDB build client, chromadb {chromadb.__version__} is not known to support it")
+        return
+    try:
+        from chromadb.api.shared_system_client import SharedSystemClient
+        SharedSystemClient._identifier_to_system.pop(client._identifier, None)
+        client._system.stop()
+    except Exception as e:
+        logger.warning(f"Could not release the ChromaDB client: {e}")
+
+def build_vectordb(embedding_model_name, chunk_size, chunk_overlap, index_params=None, on_progress=None, cancel_event=None, build_id=None) -> dict:
+    """
+    Build a vector DB in a temporary directory next to its final path and rename it into place,
+    so a failed or cancelled build never leaves a half-written DB behind.
+
+    Args:
+        index_params: HNSW space, M, construction_ef and search_ef, defaults from VECTOR_DB_DEFAULT_INDEX_PARAMS
+        on_progress: Called with the build stage and counters after every step
+        cancel_event: threading.Event checked between steps, raises VectorDBBuildCancelled once set
+        build_id: Suffix of the temporary directory, random by default
+
+    Returns:
+        The catalog entry of the new vector DB
+    """
+    db_path = Path(construct_db_path(embedding_model_name, chunk_size, chunk_overlap))
+    if db_path.exists():
+        raise FileExistsError(f"ChromaDB instance {db_path.name} already exists")
+    index_params = normalize_index_params(index_params)
+
+    build_start = time.perf_counter()
+    progress = {
+        "stage": "loading_model",
+        "pages_parsed": 0,
+        "total_pages": None,
+        "chunk_count": None,
+        "chunks_embedded": 0,
+        "chunks_per_second": None,
+        "eta_seconds": None,
+        "elapsed_seconds": 0.0
+    }
+
+    def step(**fields):
+        progress.update(fields, elapsed_seconds=round(time.perf_counter() - build_start, 3))
+        if on_progress is not None:
+            on_progress(dict(progress))
+        if cancel_event is not None and cancel_event.is_set():
+            raise VectorDBBuildCancelled(f"Build of {db_path.name} was cancelled")
+
+    temp_path = db_path.with_name(f".{db_path.name}.build-{build_id or uuid.uuid4().hex[:8]}")
+    client = None
     try:
         embedding_model = HuggingFaceEmbeddings(model_name=embedding_model_name)
+        logger.info(f"Started creating ChromaDB instance {db_path.name}")
+
+        # One Document per PDF page, pages are numbered from 1
+        step(stage="parsing", total_pages=len(PdfReader(SGK_DOCUMENT_PATH).pages))
+        docs = []
+        for i, doc in enumerate(PyPDFLoader(SGK_DOCUMENT_PATH).lazy_load()):
+            metadata = doc.metadata.copy() if doc.metadata else {}
+            metadata["page"] = i + 1
+            docs.append(Document(page_content=doc.page_content, metadata=metadata))
+            step(pages_parsed=i + 1)
+
+        # Split the pages into smaller chunks while retaining the metadata (including page number)
+        text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        chunks = text_splitter.split_documents(docs)
+        step(stage="embedding", chunk_count=len(chunks))
+
+        temp_path.parent.mkdir(parents=True, exist_ok=True)
+        # The build owns its client, so it can be closed without touching clients of loaded DBs
+        client = chromadb.PersistentClient(path=str(temp_path))
+        vector_db = Chroma(
+            client=client,
+            embedding_function=embedding_model,
+            collection_name="sgk",
+            collection_metadata=to_collection_metadata(index_params)
+        )
+        embed_start = time.perf_counter()
+        for start in range(0, len(chunks), VECTOR_DB_BUILD_BATCH_SIZE):
+            vector_db.add_documents(chunks[start:start + VECTOR_DB_BUILD_BATCH_SIZE])
+            embedded = min(start + VECTOR_DB_BUILD_BATCH_SIZE, len(chunks))
+            rate = embedded / (time.perf_counter() - embed_start)
+            step(chunks_embedded=embedded, chunks_per_second=round(rate, 2), eta_seconds=round((len(chunks) - embedded) / rate, 1))
+
+        step(stage="finalizing")
+        sample = vector_db._collection.get(limit=1, include=["embeddings"])["embeddings"]
+        embedding_dimension = len(sample[0]) if len(sample) else None
+        _release_chroma_client(client)
+        client = None
+        if db_path.exists():
+            raise FileExistsError(f"ChromaDB instance {db_path.name} was created by another build")
+        os.rename(temp_path, db_path)
+    except BaseException:
+        if client is not None:
+            _release_chroma_client(client)
+        shutil.rmtree(temp_path, ignore_errors=True)
+        raise
+
+    entry = register_vectordb(
+        embedding_model_name, chunk_size, chunk_overlap,
+        chunk_count=len(chunks),
+        build_seconds=time.perf_counter() - build_start,
+        embedding_dimension=embedding_dimension,
+        index_params=index_params
+    )
+    logger.info(f"Created and saved ChromaDB instance {db_path.name}")
+    return entry
+
+def create_vectordb(embedding_model_name, chunk_size, chunk_overlap, index_params=None):
+    try:
         db_path = construct_db_path(embedding_model_name, chunk_size, chunk_overlap)
         if os.path.exists(db_path):
             logger.warning("ChromaDB already exists.")
+            if get_catalog_entry(embedding_model_name, chunk_size, chunk_overlap) is None:
+                register_vectordb(embedding_model_name, chunk_size, chunk_overlap)
             return
-        else:
-            logger.info(f"Started creating ChromaDB instance chroma_db_{embedding_model.model_name}_{chunk_size}_{chunk_overlap}")
-            
-            # Load PDF document using a PDF loader (e.g., PyPDFLoader)
-            # Ensure that 'document_name' points to your PDF file
-            loader = PyPDFLoader(SGK_DOCUMENT_PATH)
-            docs = loader.load()
-            
-            # Ensure each page/document has page number metadata.
-            # Many PDF loaders return one Document per page.
-            updated_docs = []
-            for i, doc in enumerate(docs):
-                metadata = doc.metadata.copy() if doc.metadata else {}
-                metadata["page"] = i + 1  # Assign page number starting at 1
-                updated_docs.append(Document(page_content=doc.page_content, metadata=metadata))
-            
-            # Split the pages into smaller chunks while retaining the metadata (including page number)
-            text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-            chunks = text_splitter.split_documents(updated_docs)
-            
-            # Create the ChromaDB instance and store the embeddings
-            Chroma.from_documents(chunks, embedding_model, persist_directory=str(db_path), collection_name="sgk")
-            logger.info(f"Created and saved ChromaDB instance chroma_db_{embedding_model.model_name}_{chunk_size}_{chunk_overlap}")
+        build_vectordb(embedding_model_name, chunk_size, chunk_overlap, index_params=index_params)
     except Exception as e:
         logger.error(f"Error creating ChromaDB: {e}")
 
-def load_vectordb(embedding_model_name,chunk_size,chunk_overlap):
+def load_vectordb(embedding_model_name,chunk_size,chunk_overlap,index_params=None,search_backend=None,exact_dtype=None):
+    """
+    Load a vector DB. Its HNSW parameters were fixed when it was built; requested index_params
+    that differ from them are reported, the DB has to be rebuilt to use them.
+
+    The DB is searched through the backend set for it in the catalog: Chroma by default,
+    ExactVectorStore, or a SnapshotVectorStore that does not open the Chroma directory at all.
+    search_backend and exact_dtype override the catalog for this load.
+    """
     try:
         db_path = construct_db_path(embedding_model_name, chunk_size, chunk_overlap)
-        logger.info(f"Trying to load ChromaDB instance from {db_path}")
         embedding_model = HuggingFaceEmbeddings(model_name=embedding_model_name)
+        catalog_backend, catalog_dtype = get_search_backend(embedding_model_name, chunk_size, chunk_overlap)
+        search_backend = search_backend or catalog_backend
+
+        if search_backend == SEARCH_BACKEND_SNAPSHOT:
+            snapshot_path = construct_snapshot_path(embedding_model_name, chunk_size, chunk_overlap)
+            if snapshot_path.exists():
+                vector_db = SnapshotVectorStore(snapshot_path, embedding_model)
+                logger.info(f"Loaded snapshot {snapshot_path} ({vector_db.count()} chunks)")
+                return vector_db
+            logger.warning(f"Snapshot {snapshot_path} does not exist, loading the ChromaDB instance instead")
+
+        logger.info(f"Trying to load ChromaDB instance from {db_path}")
 
         if os.path.exists(db_path):
             vector_db = Chroma(persist_directory=str(db_path), embedding_function=embedding_model, collection_name="sgk")
             logger.info(f"Loaded existing ChromaDB instance chroma_db_{embedding_model.model_name}_{chunk_size}_{chunk_overlap}")
+            check_index_params(vector_db, embedding_model_name, chunk_size, chunk_overlap, index_params)
+            if search_backend == SEARCH_BACKEND_EXACT:
+                return ExactVectorStore.from_chroma(vector_db, exact_dtype or catalog_dtype)
             return vector_db
         else:
             logger.error(f"ChromaDB instance chroma_db_{embedding_model.model_name}_{chunk_size}_{chunk_overlap} does not exist. Please create it first.")
     except Exception as e:
         logger.error(f"Error loading ChromaDB: {e}")
 
+def check_index_params(vector_db, embedding_model_name, chunk_size, chunk_overlap, index_params=None):
+    """Record the loaded DB's index parameters in the catalog and warn if they differ from the requested ones."""
+    built_params = from_collection_metadata(vector_db._collection.metadata)
+    entry = get_catalog_entry(embedding_model_name, chunk_size, chunk_overlap)
+    if entry is not None and entry.get("index_params") != built_params:
+        update_catalog_entry(embedding_model_name, chunk_size, chunk_overlap, index_params=built_params)
+    if index_params is not None and normalize_index_params(index_params) != built_params:
+        logger.warning(f"ChromaDB instance chroma_db_{embedding_model_name}_{chunk_size}_{chunk_overlap} was built with "
+                       f"index parameters {built_params}, rebuild it to use {normalize_index_params(index_params)}")
+    return built_params
+
+def get_search_backend(embedding_model_name, chunk_size, chunk_overlap) -> tuple[str, str]:
+    """Search backend and exact search dtype set for a vector DB in the catalog."""
+    entry = get_catalog_entry(embedding_model_name, chunk_size, chunk_overlap) or {}
+    return entry.get("search_backend") or VECTOR_DB_DEFAULT_SEARCH_BACKEND, entry.get("exact_dtype") or VECTOR_DB_EXACT_DTYPE
+
+def set_search_backend(embedding_model_name, chunk_size, chunk_overlap, search_backend, exact_dtype=None):
+    """Choose the search backend of a vector DB, used from its next load on."""
+    if search_backend not in SEARCH_BACKENDS:
+        raise ValueError(f"Unknown search backend {search_backend}, expected one of {', '.join(SEARCH_BACKENDS)}")
+    exact_dtype = exact_dtype or VECTOR_DB_EXACT_DTYPE
+    if exact_dtype not in EXACT_DTYPES:
+        raise ValueError(f"Unknown exact search dtype {exact_dtype}, expected one of {', '.join(EXACT_DTYPES)}")
+    if search_backend == SEARCH_BACKEND_SNAPSHOT and not construct_snapshot_path(embedding_model_name, chunk_size, chunk_overlap).exists():
+        raise ValueError("Export a snapshot of the vector DB before selecting the snapshot backend")
+    return update_catalog_entry(embedding_model_name, chunk_size, chunk_overlap, search_backend=search_backend, exact_dtype=exact_dtype)
+
+def delete_vectordb(embedding_model_name, chunk_size, chunk_overlap):
+    """
+    Delete a vector DB and its snapshot from disk and from the catalog.
+    """
+    db_path = construct_db_path(embedding_model_name, chunk_size, chunk_overlap)
+    if os.path.exists(db_path):
+        shutil.rmtree(db_path)
+        logger.info(f"Deleted ChromaDB instance at {db_path}")
+    else:
+        logger.warning(f"ChromaDB instance at {db_path} does not exist.")
+    snapshot_path = construct_snapshot_path(embedding_model_name, chunk_size, chunk_overlap)
+    if snapshot_path.exists():
+        snapshot_path.unlink()
+        logger.info(f"Deleted snapshot {snapshot_path}")
+    unregister_vectordb(embedding_model_name, chunk_size, chunk_overlap)
+
 def create_multiple_vectordbs(embedding_models,chunk_sizes_and_chunk_overlaps):
     for embedding_model_name in embedding_models:
         for chunk_size, chunk_overlap in chunk_sizes_and_chunk_overlaps:
@@ -48,13 +48,69 @@ CONFIG = {
 GLOBAL_VECTOR_DB_INITIAL_EMBEDDING_MODEL = LABSE
 GLOBAL_VECTOR_DB_INITIAL_CHUNK_SIZE = 500
 GLOBAL_VECTOR_DB_INITIAL_CHUNK_OVERLAP = 50
+WARMUP_ON_STARTUP = True  # load the initial vector DB and the RAG stack in the background when the API starts
+VECTOR_DB_BUILD_BATCH_SIZE = 64  # chunks embedded and written per step, progress and cancellation are checked between steps
+VECTOR_DB_BUILD_WORKERS = 1  # concurrent build jobs, each one holds an embedding model in memory
+VECTOR_DB_DEFAULT_SEARCH_BACKEND = SEARCH_BACKEND_CHROMA  # per collection overridable with POST /vectordb/search-backend
+VECTOR_DB_EXACT_DTYPE = "float32"  # float16 halves the memory of the exact backend's matrix
+VECTOR_DB_SNAPSHOT_USE_GRAPH = True  # search a snapshot through its HNSW graph when it has one, exactly otherwise
+VECTOR_DB_SNAPSHOT_USE_QUANTIZATION = True  # search a snapshot's int8/PQ codes first when it has them
+VECTOR_DB_RESCORE_FACTOR = 4  # candidates per requested chunk taken from the quantized search and rescored in full precision
+VECTOR_DB_DEFAULT_INDEX_PARAMS = {  # Chroma's HNSW defaults, used for builds that do not set their own
+    "space": "l2",
+    "M": 16,
+    "construction_ef": 100,
+    "search_ef": 10,
+}
 
 # Cross Encoder Configuration
 CROSS_ENCODER_K = 7
+CROSS_ENCODER_CACHE_SIZE = 2  # loaded cross-encoder models kept in memory
 SKG_AGENT_SIMILAR_VECTOR_K = 10
 
 # Self-RAG Configuration
 SELF_RAG_N = 5
 
+# Retrieval-only Evaluation Configuration
+RETRIEVAL_EVAL_KS = [1, 3, 5, 10]  # cutoffs for recall@k and nDCG@k
+
+# Test Run Configuration
+RUN_HEARTBEAT_STALE_AFTER = 600  # seconds without a heartbeat before a running run counts as interrupted
 
+# Retrieval Cache Configuration
+RETRIEVAL_CACHE_ENABLED = True  # reuse retrieved and reranked chunk ids across test cases
 
+# LLM Client Configuration
+LLM_PROVIDER = GROQ_PROVIDER  # overridden by the LLM_PROVIDER environment variable
+LLM_STUB_BASE_URL = "http://127.0.0.1:8900"  # overridden by the LLM_STUB_BASE_URL environment variable
+LLM_REQUEST_TIMEOUT = 60  # seconds per request
+LLM_MAX_RETRIES = 4
+LLM_RETRY_BASE_DELAY = 1.0  # seconds, doubled on every attempt
+LLM_RETRY_MAX_DELAY = 30.0
+LLM_HEDGING_ENABLED = True
+LLM_HEDGE_MIN_DELAY = 5.0  # never hedge before this many seconds
+LLM_HEDGE_QUANTILE = 0.95  # hedge calls slower than this latency quantile
+LLM_HEDGE_MIN_SAMPLES = 20
+LLM_HEDGE_MAX_WORKERS = 16
+LLM_HTTP_MAX_CONNECTIONS = 20
+LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS = 10
+LLM_HTTP_KEEPALIVE_EXPIRY = 30  # seconds
+LLM_CACHE_MODE = LLM_CACHE_PASSTHROUGH  # overridden by the LLM_CACHE_MODE environment variable
+
+# LLM Rate Limit Configuration (per model, shared by every call path)
+LLM_RATE_LIMITS = {
+  DEEPSEEK_R1_DISTILL_LLAMA_70B: {"rpm": 30, "tpm": 6000},
+  LLAMA_3_3_70B_VERSATILE: {"rpm": 30, "tpm": 12000},
+  META_LLAMA_LLAMA_4_MAVERICK_17B_128E_INSTRUCT: {"rpm": 30, "tpm": 6000},
+  MISTRAL_SABA_24B: {"rpm": 30, "tpm": 6000},
+  OPENAI_GPT_OSS_120B: {"rpm": 30, "tpm": 8000}
+}
+LLM_DEFAULT_RATE_LIMIT = {"rpm": 30, "tpm": 6000}
+LLM_INITIAL_CONCURRENCY = 4
+LLM_MIN_CONCURRENCY = 1
+LLM_MAX_CONCURRENCY = 16
+LLM_TARGET_LATENCY = 20.0  # seconds, slower calls shrink the concurrency limit
+LLM_AIMD_DECREASE_FACTOR = 0.5  # applied on 429
+LLM_LATENCY_DECREASE_FACTOR = 0.9  # applied on slow responses
+LLM_ESTIMATED_OUTPUT_TOKENS = 512
+LLM_RATE_LIMIT_MONGO_COORDINATION = False  # share per-minute counters across processes
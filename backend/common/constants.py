@@ -3,6 +3,9 @@ SGK_DOCUMENT_FILE_NAME = "doc.pdf"
 TEST_RESULTS_FILE_NAME = "results.json"
 TEST_CASES_FILE_NAME = "test_cases.json"
 TEST_QUERIES_AND_EXPECTED_ANSWERS_FILE_NAME = "queries_expected_answers.json"
+RETRIEVAL_BENCHMARK_BASELINE_FILE_NAME = "retrieval_baseline.json"
+VECTOR_DB_CATALOG_FILE_NAME = "catalog.json"
+SNAPSHOT_FILE_EXTENSION = ".snapshot"
 
 # Directory Names
 AI = "ai"
@@ -12,6 +15,11 @@ DOCUMENTS = "documents"
 CONFIG = "config"
 REACT_BUILD = "react_build"
 CHROMA_DB = "chroma_db"
+BENCHMARK = "benchmark"
+RESULTS = "results"
+LLM = "llm"
+COMPLETION_CACHE = "completion_cache"
+SNAPSHOTS = "snapshots"
 
 # CORS
 ALLOWED_CORS_ORIGINS = [
@@ -19,6 +27,16 @@ ALLOWED_CORS_ORIGINS = [
     "http://127.0.0.1:5173"
 ]
 
+# LLM Providers
+GROQ_PROVIDER = "groq"
+STUB_PROVIDER = "stub"  # local load test server, see backend/ai/llm/stub_server.py
+
+# LLM Completion Cache Modes
+LLM_CACHE_PASSTHROUGH = "passthrough"  # always call the provider
+LLM_CACHE_RECORD = "record"  # call the provider and store every completion
+LLM_CACHE_REPLAY = "replay"  # serve stored completions offline, fail on a miss
+LLM_CACHE_MODES = [LLM_CACHE_PASSTHROUGH, LLM_CACHE_RECORD, LLM_CACHE_REPLAY]
+
 # LLM Models
 DEEPSEEK_R1_DISTILL_LLAMA_70B = "deepseek-r1-distill-llama-70b" 
 LLAMA_3_2_90B_VISION_PREVIEW = "llama-3.2-90b-vision-preview"
@@ -47,4 +65,31 @@ SELF_RAG_OPTION = "SELF_RAG"
 # RAG DB Options
 VECTOR_DB_OPTION = "VectorDB"
 GRAPH_DB_OPTION = "GraphDB"
-HYBRID_DB_OPTION = "HybridDB"
\ No newline at end of file
+HYBRID_DB_OPTION = "HybridDB"
+
+# Run Types
+FULL_RUN_TYPE = "full"
+RETRIEVAL_RUN_TYPE = "retrieval"
+
+# Vector DB Search Backends
+SEARCH_BACKEND_CHROMA = "chroma"  # Chroma's HNSW index
+SEARCH_BACKEND_EXACT = "exact"  # in-memory brute-force search, see backend/ai/vectordb/exact.py
+SEARCH_BACKEND_SNAPSHOT = "snapshot"  # memory-mapped single-file snapshot, see backend/ai/vectordb/snapshot.py
+SEARCH_BACKENDS = [SEARCH_BACKEND_CHROMA, SEARCH_BACKEND_EXACT, SEARCH_BACKEND_SNAPSHOT]
+
+# HNSW Distance Spaces
+HNSW_SPACES = ["l2", "cosine", "ip"]
+
+# Vector DB Build Job Statuses
+BUILD_JOB_QUEUED = "queued"
+BUILD_JOB_RUNNING = "running"
+BUILD_JOB_COMPLETED = "completed"
+BUILD_JOB_FAILED = "failed"
+BUILD_JOB_CANCELLED = "cancelled"
+BUILD_JOB_FINISHED_STATUSES = [BUILD_JOB_COMPLETED, BUILD_JOB_FAILED, BUILD_JOB_CANCELLED]
+
+# Run Statuses
+RUN_STATUS_RUNNING = "running"  # in progress, or interrupted before it finished
+RUN_STATUS_PARTIAL = "partial"  # finished with some queries failed
+RUN_STATUS_COMPLETED = "completed"
+RESUMABLE_RUN_STATUSES = [RUN_STATUS_RUNNING, RUN_STATUS_PARTIAL]
\ No newline at end of file
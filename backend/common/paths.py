@@ -13,6 +13,8 @@ AI_DIR = BACKEND_DIR / AI
 DOCUMENTS_DIR = AI_DIR / DOCUMENTS
 CHROMA_DB_DIR = AI_DIR / CHROMA_DB
 TESTING_DIR = AI_DIR / TESTING
+BENCHMARK_DIR = AI_DIR / BENCHMARK
+LLM_DIR = AI_DIR / LLM
 
 # Web Directory
 WEB_DIR = BACKEND_DIR / WEB
@@ -24,6 +26,17 @@ TEST_RESULTS_PATH = TESTING_CONFIG_DIR / TEST_RESULTS_FILE_NAME
 TEST_CASES_PATH = TESTING_CONFIG_DIR / TEST_CASES_FILE_NAME
 TEST_QUERIES_AND_EXPECTED_ANSWERS_PATH = TESTING_CONFIG_DIR / TEST_QUERIES_AND_EXPECTED_ANSWERS_FILE_NAME
 
+# Benchmark Directories and Files
+BENCHMARK_RESULTS_DIR = BENCHMARK_DIR / RESULTS
+RETRIEVAL_BENCHMARK_BASELINE_PATH = BENCHMARK_DIR / RETRIEVAL_BENCHMARK_BASELINE_FILE_NAME
+
+# LLM Directories
+COMPLETION_CACHE_DIR = LLM_DIR / COMPLETION_CACHE
+
+# Vector DB Files
+VECTOR_DB_CATALOG_PATH = CHROMA_DB_DIR / VECTOR_DB_CATALOG_FILE_NAME
+VECTOR_DB_SNAPSHOTS_DIR = CHROMA_DB_DIR / SNAPSHOTS
+
 # Documents Directory
 SGK_DOCUMENT_PATH = DOCUMENTS_DIR / SGK_DOCUMENT_FILE_NAME
 
@@ -33,3 +46,10 @@ def construct_db_path(embedding_mode_name, chunk_size, chunk_overlap):
     Construct a new database path based on the embedding mode name, chunk size, and chunk overlap.
     """
     return CHROMA_DB_DIR / f"chroma_db_{embedding_mode_name}_{chunk_size}_{chunk_overlap}"
+
+
+def construct_snapshot_path(embedding_mode_name, chunk_size, chunk_overlap):
+    """
+    Construct the snapshot file path of a vector DB, "/" in model names is replaced so snapshots stay in one directory.
+    """
+    return VECTOR_DB_SNAPSHOTS_DIR / f"{embedding_mode_name.replace('/', '__')}_{chunk_size}_{chunk_overlap}{SNAPSHOT_FILE_EXTENSION}"
@@ -0,0 +1,175 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+
+"""
+This file contains a lightweight in-process metrics registry. Stage timers feed Prometheus
+histograms (rendered by the /metrics endpoint) and, while a query trace is active, a per-query
+stage breakdown that is stored with each test result.
+"""
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+STAGE_DURATION_METRIC = "hospital_llm_stage_duration_seconds"
+LLM_REQUEST_DURATION_METRIC = "hospital_llm_llm_request_duration_seconds"
+LLM_TOKENS_METRIC = "hospital_llm_llm_tokens_total"
+HTTP_REQUEST_DURATION_METRIC = "hospital_llm_http_request_duration_seconds"
+
+METRIC_HELP = {
+    STAGE_DURATION_METRIC: "Duration of RAG pipeline stages",
+    LLM_REQUEST_DURATION_METRIC: "Duration of LLM provider calls including retries",
+    LLM_TOKENS_METRIC: "Tokens reported by the LLM provider",
+    HTTP_REQUEST_DURATION_METRIC: "Duration of HTTP requests served by the API",
+}
+
+_current_trace: ContextVar["QueryTrace | None"] = ContextVar("current_trace", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Singleton store of histograms and counters keyed by metric name and labels"""
+    _instance = None
+    _lock = Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._histograms = {}
+                    cls._instance._counters = {}
+        return cls._instance
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if key not in self._histograms:
+                self._histograms[key] = Histogram()
+            self._histograms[key].observe(value)
+
+    def increment(self, name: str, amount: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name in sorted({key[0] for key in self._histograms}):
+                lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for (metric_name, labels), histogram in sorted(self._histograms.items()):
+                    if metric_name != name:
+                        continue
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f"{name}_bucket{_format_labels(labels, le=bound)} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(labels, le='+Inf')} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.total}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+            for name in sorted({key[0] for key in self._counters}):
+                lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for (metric_name, labels), value in sorted(self._counters.items()):
+                    if metric_name == name:
+                        lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: tuple, **extra) -> str:
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ""
+    formatted = ",".join(f'{key}="{_escape_label(value)}"' for key, value in items)
+    return "{" + formatted + "}"
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class QueryTrace:
+    """Per-query stage breakdown and token counts"""
+
+    def __init__(self):
+        self.stages: dict[str, float] = {}
+        self.tokens: dict[str, int] = {}
+
+    def add_stage(self, stage: str, seconds: float):
+        self.stages[stage] = round(self.stages.get(stage, 0.0) + seconds, 6)
+
+    def add_tokens(self, model: str, tokens: int):
+        self.tokens[model] = self.tokens.get(model, 0) + tokens
+
+    def to_dict(self) -> dict:
+        return {
+            "stage_timings": self.stages,
+            "total_time": round(sum(self.stages.values()), 6),
+            "token_usage": self.tokens,
+        }
+
+
+@contextmanager
+def trace_query():
+    """Collect the stage breakdown of everything timed inside the block."""
+    trace = QueryTrace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def get_current_trace() -> QueryTrace | None:
+    return _current_trace.get()
+
+
+@contextmanager
+def stage_timer(stage: str, model: str = "", db: str = ""):
+    """
+    Time a pipeline stage.
+
+    Args:
+        stage: Stage name, e.g. retrieval or generation
+        model: Model used by the stage, if any
+        db: RAG database option used by the stage, if any
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        MetricsRegistry().observe(STAGE_DURATION_METRIC, elapsed, stage=stage, model=model, db=db)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add_stage(stage, elapsed)
+
+
+def record_llm_call(model: str, seconds: float, usage: dict | None):
+    """Record the latency and token usage of an LLM call."""
+    registry = MetricsRegistry()
+    registry.observe(LLM_REQUEST_DURATION_METRIC, seconds, model=model)
+    if not usage:
+        return
+    for kind in ("input_tokens", "output_tokens"):
+        if usage.get(kind):
+            registry.increment(LLM_TOKENS_METRIC, usage[kind], model=model, kind=kind)
+    trace = _current_trace.get()
+    if trace is not None and usage.get("total_tokens"):
+        trace.add_tokens(model, usage["total_tokens"])
@@ -2,11 +2,10 @@
 import os
 from threading import Lock
 from dotenv import load_dotenv
-from pymongo import MongoClient
 class MongoDBClient:
     _instance = None
     _lock = Lock()
-    client: MongoClient = None
+    client = None
 
     def __new__(cls):
         if cls._instance is None:
@@ -15,17 +14,19 @@ class MongoDBClient:
                     cls._instance = super().__new__(cls)
         return cls._instance
     
-    def __init__(self):
-        if self.client is None:
-          load_dotenv()
-          MONGO_DB_URI = os.getenv('MONGO_DB_URI')
-          self.client = MongoClient(MONGO_DB_URI)
-            
     def get_client(self):
+        # Created on first use so importing the web app does not load pymongo
+        if self.client is None:
+            with self._lock:
+                if self.client is None:
+                    from pymongo import MongoClient
+                    load_dotenv()
+                    MONGO_DB_URI = os.getenv('MONGO_DB_URI')
+                    self.client = MongoClient(MONGO_DB_URI)
         return self.client
     
     def get_hospital_db(self):
-        return self.client['hospital']
+        return self.get_client()['hospital']
     
     def get_results_collection(self):
         db = self.get_hospital_db()
@@ -55,5 +56,13 @@ class MongoDBClient:
         db = self.get_hospital_db()
         return db['config']
 
+    def get_rate_limits_collection(self):
+        db = self.get_hospital_db()
+        return db['rate_limits']
+
+    def get_retrieval_cache_collection(self):
+        db = self.get_hospital_db()
+        return db['retrieval_cache']
+
 # Global instance
 GLOBAL_MONGO_DB_CLIENT = MongoDBClient()
\ No newline at end of file
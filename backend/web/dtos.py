@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Dict, Optional
 from pydantic import BaseModel, Field
 
 class ChatRequest(BaseModel):
@@ -14,6 +14,17 @@ class VectorDBInfo(BaseModel):
     name: str
     chunk_size: str
     chunk_overlap: str
+    index_params: Optional[Dict[str, Any]] = None  # HNSW space, M, construction_ef, search_ef used when building
+
+class SearchBackendRequest(BaseModel):
+    name: str
+    chunk_size: str
+    chunk_overlap: str
+    search_backend: str  # "chroma" or "exact"
+    exact_dtype: Optional[str] = None  # "float32" or "float16" for the exact backend
+
+class BuildJobIdRequest(BaseModel):
+    job_id: str
     
 class QAInfo(BaseModel):
     id: str = Field(alias='_id')
@@ -61,4 +72,7 @@ class ObjectIdRequest(BaseModel):
         populate_by_name = True
 
 class TestIdRequest(BaseModel):
-    test_id: int
\ No newline at end of file
+    test_id: int
+
+class RunCountRequest(BaseModel):
+    run_count: int
\ No newline at end of file
@@ -1,14 +1,25 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from backend.common.paths import REACT_BUILD_PATH
 from backend.common.constants import ALLOWED_CORS_ORIGINS
-from backend.ai.vectordb.main import GLOBAL_VECTOR_DB
 from backend.common.constants import *
-from backend.web.routes import chat, vectordb, results, tests, system_prompts, qa_batches, config, runs
+from backend.common.config import WARMUP_ON_STARTUP
+from backend.web.routes import chat, vectordb, results, tests, system_prompts, qa_batches, config, runs, metrics, health
+from backend.web.services.health_service import HealthService
+from backend.utils.metrics import MetricsRegistry, HTTP_REQUEST_DURATION_METRIC
 from backend.web.routes import qa
 
-app = FastAPI(title="Hospital LLM API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Heavy models load in the background, /health/ready reports when they are warm
+    if WARMUP_ON_STARTUP:
+        HealthService.start_warmup()
+    yield
+
+app = FastAPI(title="Hospital LLM API", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -19,6 +30,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_duration(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Use the route template so path parameters do not create new label values
+    route = request.scope.get("route")
+    path = route.path if route is not None else "unmatched"
+    MetricsRegistry().observe(
+        HTTP_REQUEST_DURATION_METRIC,
+        time.perf_counter() - start,
+        method=request.method,
+        path=path,
+        status=response.status_code
+    )
+    return response
+
 # Include routers
 app.include_router(chat.router, prefix="/chat", tags=["chat"])
 app.include_router(vectordb.router, prefix="/vectordb", tags=["vectordb"])
@@ -29,3 +56,5 @@ app.include_router(system_prompts.router, prefix="/system-prompts", tags=["syste
 app.include_router(qa_batches.router, prefix="/qa-batches", tags=["batches"])
 app.include_router(config.router, prefix="/config", tags=["config"])
 app.include_router(runs.router, prefix="/runs", tags=["runs"])
+app.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
+app.include_router(health.router, prefix="/health", tags=["health"])
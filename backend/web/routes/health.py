@@ -0,0 +1,29 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+from backend.web.services.health_service import HealthService
+
+router = APIRouter()
+
+@router.get("")
+def get_liveness():
+    """
+    Liveness check, answers as soon as the API process is up.
+    """
+    return {"status": "ok"}
+
+@router.get("/ready")
+def get_readiness():
+    """
+    Readiness check, reports whether the background warm-up has loaded every component.
+
+    Returns:
+        The warm-up state, with status code 503 while any component is not ready
+    """
+    try:
+        readiness = HealthService.get_readiness()
+        return JSONResponse(status_code=200 if readiness["ready"] else 503, content=readiness)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Error reading warm-up state: {e}"
+        )
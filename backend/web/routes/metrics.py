@@ -0,0 +1,21 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from backend.utils.metrics import MetricsRegistry
+
+router = APIRouter()
+
+@router.get("", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Get stage, LLM and HTTP metrics in the Prometheus text format.
+
+    Returns:
+        Prometheus exposition text
+    """
+    try:
+        return PlainTextResponse(MetricsRegistry().render(), media_type="text/plain; version=0.0.4")
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error rendering metrics: {e}"
+        )
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException
 from backend.web.services.runs_service import RunsService
+from backend.web.dtos import RunCountRequest
 
 router = APIRouter()
 
@@ -17,4 +18,14 @@ def get_runs():
         raise HTTPException(
             status_code=500, 
             detail=f"Error reading JSON file: {e}"
-        )
\ No newline at end of file
+        )
+
+@router.post("/resume")
+def resume_run(run_count: RunCountRequest):
+    try:
+        return RunsService.resume_run_service(run_count.run_count)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Error resuming run: {e}"
+        )
@@ -55,4 +55,14 @@ def run_test(test_id: TestIdRequest):
         raise HTTPException(
             status_code=500, 
             detail=f"Error running test case: {e}"
-        )
\ No newline at end of file
+        )
+
+@router.post("/run-retrieval")
+def run_retrieval_eval(test_id: TestIdRequest):
+    try:
+        return TestService.run_retrieval_eval_service(test_id.test_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Error running retrieval evaluation: {e}"
+        )
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
-from backend.web.dtos import VectorDBInfo
+from typing import List, Dict, Any, Optional
+from backend.web.dtos import VectorDBInfo, BuildJobIdRequest, SearchBackendRequest
 from backend.web.services.vectordb_service import VectorDBService
 
 router = APIRouter()
@@ -24,23 +24,65 @@ def get_vectordbs():
 @router.post("/create")
 def create_vectordb_request(request: VectorDBInfo):
     """
-    Create a new vector database.
+    Start building a new vector database in the background.
     
     Args:
         request: VectorDBInfo containing database parameters
         
     Returns:
-        Success message
+        Message and the build job
     """
     try:
-        VectorDBService.create_vectordb(request)
-        return {"detail": "Vector database created successfully"}
+        job = VectorDBService.create_vectordb(request)
+        return {"detail": "Vector database build started", "job": job}
     except Exception as e:
         raise HTTPException(
             status_code=500, 
             detail=f"Error creating vector database: {e}"
         )
 
+@router.get("/jobs")
+def get_build_jobs(job_id: Optional[str] = None):
+    """
+    Get the status and progress of vector database build jobs.
+    
+    Args:
+        job_id: Optional id of a single job
+        
+    Returns:
+        The job, or every job newest first
+    """
+    try:
+        return VectorDBService.get_build_jobs(job_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Error retrieving build jobs: {e}"
+        )
+
+@router.post("/jobs/cancel")
+def cancel_build_job(request: BuildJobIdRequest):
+    """
+    Cancel a queued or running vector database build.
+    
+    Args:
+        request: BuildJobIdRequest containing the job id
+        
+    Returns:
+        The job after the cancellation request
+    """
+    try:
+        return VectorDBService.cancel_build_job(request.job_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Error cancelling build job: {e}"
+        )
+
 @router.post("/load")
 def load_vectordb_request(request: VectorDBInfo):
     """
@@ -61,6 +103,45 @@ def load_vectordb_request(request: VectorDBInfo):
             detail=f"Error loading vector database: {e}"
         )
 
+@router.post("/delete")
+def delete_vectordb_request(request: VectorDBInfo):
+    """
+    Delete a vector database and its catalog entry.
+    
+    Args:
+        request: VectorDBInfo containing database parameters
+        
+    Returns:
+        Success message
+    """
+    try:
+        VectorDBService.delete_vectordb(request)
+        return {"detail": "Vector database deleted successfully"}
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Error deleting vector database: {e}"
+        )
+
+@router.post("/search-backend")
+def set_search_backend_request(request: SearchBackendRequest):
+    """
+    Set the search backend of a vector database.
+    
+    Args:
+        request: SearchBackendRequest containing database parameters and the backend
+        
+    Returns:
+        The updated catalog entry
+    """
+    try:
+        return VectorDBService.set_search_backend(request)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Error setting search backend: {e}"
+        )
+
 @router.get("/models")
 def get_vectordb_models():
     """
@@ -1,4 +1,3 @@
-from backend.ai.llm.sgk_agent.agent import sgk_agent
 from backend.web.dtos import ChatRequest, ChatResponse
 
 class ChatService:
@@ -16,5 +15,6 @@ class ChatService:
         Raises:
             Exception: If there's an error processing the chat request
         """
+        from backend.ai.llm.sgk_agent.agent import sgk_agent
         result = sgk_agent(request.llm, request.query, request.options)
         return ChatResponse(role="assistant", content=result.content)
\ No newline at end of file
@@ -0,0 +1,113 @@
+import time
+from threading import Lock, Thread
+from backend.common.config import (
+    GLOBAL_VECTOR_DB_INITIAL_EMBEDDING_MODEL,
+    GLOBAL_VECTOR_DB_INITIAL_CHUNK_SIZE,
+    GLOBAL_VECTOR_DB_INITIAL_CHUNK_OVERLAP,
+)
+from backend.utils.logger import get_logger
+
+logger = get_logger()
+
+WARMUP_PENDING = "pending"
+WARMUP_LOADING = "loading"
+WARMUP_READY = "ready"
+WARMUP_FAILED = "failed"
+
+
+class WarmupState:
+    """Singleton progress of the background warm-up, one entry per component"""
+    _instance = None
+    _lock = Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance.components = {}
+                    cls._instance.started = False
+        return cls._instance
+
+    def set(self, component: str, status: str, seconds: float | None = None, error: str = ""):
+        with self._lock:
+            self.components[component] = {"status": status, "seconds": seconds, "error": error}
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {name: dict(state) for name, state in self.components.items()}
+
+
+def _warm_rag_stack():
+    # Importing the agent loads langchain, the Groq client and the graph DB driver
+    import backend.ai.llm.sgk_agent.agent  # noqa: F401
+
+
+def _warm_vector_db():
+    from backend.ai.vectordb.main import GLOBAL_VECTOR_DB
+    if GLOBAL_VECTOR_DB.get_db() is None:
+        GLOBAL_VECTOR_DB.load_db(
+            GLOBAL_VECTOR_DB_INITIAL_EMBEDDING_MODEL,
+            GLOBAL_VECTOR_DB_INITIAL_CHUNK_SIZE,
+            GLOBAL_VECTOR_DB_INITIAL_CHUNK_OVERLAP
+        )
+    db = GLOBAL_VECTOR_DB.get_db()
+    if db is None:
+        raise ValueError("Initial vector DB could not be loaded")
+    # One search loads the embedding weights and the index into memory
+    db.similarity_search("warmup", k=1)
+
+
+def _warm_mongo():
+    from backend.web.database.main import GLOBAL_MONGO_DB_CLIENT
+    GLOBAL_MONGO_DB_CLIENT.get_client().admin.command("ping")
+
+
+WARMUP_STEPS = [
+    ("mongo", _warm_mongo),
+    ("rag_stack", _warm_rag_stack),
+    ("vector_db", _warm_vector_db),
+]
+
+
+class HealthService:
+    @staticmethod
+    def start_warmup():
+        """
+        Load the initial vector DB, its embedding model and the RAG stack in a background thread,
+        so the API accepts requests while heavy models are still loading.
+        """
+        state = WarmupState()
+        with state._lock:
+            if state.started:
+                return
+            state.started = True
+        for component, _ in WARMUP_STEPS:
+            state.set(component, WARMUP_PENDING)
+        Thread(target=HealthService._run_warmup, name="warmup", daemon=True).start()
+
+    @staticmethod
+    def _run_warmup():
+        state = WarmupState()
+        for component, step in WARMUP_STEPS:
+            state.set(component, WARMUP_LOADING)
+            start = time.perf_counter()
+            try:
+                step()
+                state.set(component, WARMUP_READY, time.perf_counter() - start)
+                logger.info(f"Warm-up of {component} finished in {time.perf_counter() - start:.1f}s")
+            except Exception as e:
+                state.set(component, WARMUP_FAILED, time.perf_counter() - start, str(e))
+                logger.error(f"Warm-up of {component} failed: {e}")
+
+    @staticmethod
+    def get_readiness() -> dict:
+        """
+        Get the warm-up state of every component.
+
+        Returns:
+            dict: Overall readiness and the status and load time of each component
+        """
+        components = WarmupState().snapshot()
+        ready = bool(components) and all(state["status"] == WARMUP_READY for state in components.values())
+        return {"ready": ready, "components": components}
@@ -1,9 +1,35 @@
 from backend.web.database.main import GLOBAL_MONGO_DB_CLIENT
 from backend.web.database.utils import from_mongo
+from backend.utils.logger import get_logger
+
+logger = get_logger()
 
 class RunsService:
     @staticmethod
     def get_test_runs():
       collection = GLOBAL_MONGO_DB_CLIENT.get_runs_collection()
       documents = list(collection.find().sort("time_stamp", -1))
-      return from_mongo(documents)
\ No newline at end of file
+      return from_mongo(documents)
+
+    @staticmethod
+    def resume_run_service(run_count):
+        """
+        Resume an interrupted or partially failed run.
+
+        Args:
+            run_count: Run to resume
+
+        Returns:
+            dict: Run count, number of resumed queries and the run's new status
+
+        Raises:
+            Exception: If the run cannot be resumed or fails again
+        """
+        logger.info(f"Resuming run {run_count}")
+
+        try:
+            from backend.ai.testing.main import resume_run
+            return resume_run(run_count)
+        except Exception as e:
+            logger.error(f"Resuming run {run_count} failed: {e}", exc_info=True)
+            raise Exception(f"Resuming run {run_count} failed: {e}") from e
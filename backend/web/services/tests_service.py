@@ -1,9 +1,6 @@
-from backend.ai.vectordb.utils import load_vectordb
 from backend.web.database.main import GLOBAL_MONGO_DB_CLIENT
 from backend.web.database.utils import from_mongo
 from bson import ObjectId
-from backend.ai.testing.io_utils import load_test_case_by_test_id, load_queries_expected_answers_batch_by_id
-from backend.ai.testing.main import run_test_case_by_test_id
 from backend.utils.logger import get_logger
 
 logger = get_logger()
@@ -76,6 +73,8 @@ class TestService:
         logger.info(f"Starting test execution for test_id: {test_id}")
 
         try:
+            # The test runner pulls in the whole RAG stack, so it is imported on first use
+            from backend.ai.testing.main import run_test_case_by_test_id
             run_test_case_by_test_id(test_id)
             logger.info(f"Test case {test_id} completed successfully")
             return {"success": True, "message": f"Test {test_id} completed successfully"}
@@ -83,3 +82,26 @@ class TestService:
             logger.error(f"Test case {test_id} failed: {e}", exc_info=True)
             # Re-raise so the API layer can handle it appropriately
             raise Exception(f"Test execution failed for test_id {test_id}: {e}") from e
+
+    @staticmethod
+    def run_retrieval_eval_service(test_id):
+        """
+        Run a retrieval-only evaluation of a test case, without LLM generation or judging.
+
+        Args:
+            test_id: ID of the test case to be evaluated
+
+        Returns:
+            dict: Run count and retrieval metrics
+
+        Raises:
+            Exception: If the evaluation fails
+        """
+        logger.info(f"Starting retrieval-only evaluation for test_id: {test_id}")
+
+        try:
+            from backend.ai.testing.retrieval_eval import run_retrieval_eval_by_test_id
+            return run_retrieval_eval_by_test_id(test_id)
+        except Exception as e:
+            logger.error(f"Retrieval evaluation of test case {test_id} failed: {e}", exc_info=True)
+            raise Exception(f"Retrieval evaluation failed for test_id {test_id}: {e}") from e
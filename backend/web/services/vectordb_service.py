@@ -1,71 +1,77 @@
-import re
-from pathlib import Path
 from typing import List, Dict, Any
-from backend.common.paths import CHROMA_DB_DIR
+from backend.ai.vectordb.catalog import load_catalog, get_catalog_key
+from backend.ai.vectordb.build_jobs import GLOBAL_BUILD_JOB_MANAGER
 from backend.common.config import VECTOR_DB_EMBEDDING_MODELS
 from backend.ai.vectordb.main import GLOBAL_VECTOR_DB
-from backend.web.dtos import VectorDBInfo
+from backend.common.config import VECTOR_DB_DEFAULT_SEARCH_BACKEND, VECTOR_DB_EXACT_DTYPE
+from backend.web.dtos import VectorDBInfo, SearchBackendRequest
 
 class VectorDBService:
     @staticmethod
     def get_available_vectordbs() -> List[Dict[str, Any]]:
         """
-        Get list of available vector databases from the ChromaDB directory.
+        Get list of available vector databases from the vector DB catalog.
         
         Returns:
             List of dictionaries containing vector DB information
         """
-        vectordbs_info = []
-        chroma_path = Path(CHROMA_DB_DIR)
-        
-        # Pattern to match names ending with one or more digits
-        number_pattern = re.compile(r'\d+$')
-        # Pattern to match UUID-like strings (optional, for extra filtering)
-        uuid_pattern = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$')
-        
-        for item in chroma_path.rglob("*"):
-            if (item.is_dir() and 
-                item != chroma_path and 
-                number_pattern.search(item.name)):
-                
-                rel_path = item.relative_to(chroma_path)
-                
-                if uuid_pattern.match(item.name):
-                    continue
-                    
-                name = item.name
-                
-                if name.startswith("chroma_db_"):
-                    name = name[len("chroma_db_"):]
-                else:
-                    # Create the normalized path outside the f-string
-                    normalized_path = str(rel_path).replace('\\', '/')
-                    name = normalized_path[len('chroma_db_'):]
-
-                name_parts = name.split('_')
-                if len(name_parts) >= 3:
-                    vectordbs_info.append({
-                        "name": name_parts[0],
-                        "chunk_size": name_parts[1],
-                        "chunk_overlap": name_parts[2],
-                    })
-        
-        return vectordbs_info
+        return [
+            {
+                "name": entry["embedding_model"],
+                "chunk_size": str(entry["chunk_size"]),
+                "chunk_overlap": str(entry["chunk_overlap"]),
+                "chunk_count": entry.get("chunk_count"),
+                "disk_size_mb": entry.get("disk_size_mb"),
+                "build_seconds": entry.get("build_seconds"),
+                "embedding_dimension": entry.get("embedding_dimension"),
+                "index_params": entry.get("index_params"),
+                "search_backend": entry.get("search_backend") or VECTOR_DB_DEFAULT_SEARCH_BACKEND,
+                "exact_dtype": entry.get("exact_dtype") or VECTOR_DB_EXACT_DTYPE,
+                "created_at": entry.get("created_at")
+            }
+            for entry in load_catalog().values()
+        ]
 
     @staticmethod
-    def create_vectordb(request: VectorDBInfo) -> None:
+    def create_vectordb(request: VectorDBInfo) -> Dict[str, Any]:
         """
-        Create a new vector database.
+        Start a background build of a new vector database.
         
         Args:
             request: VectorDBInfo containing name, chunk_size, and chunk_overlap
+            
+        Returns:
+            The build job, poll get_build_jobs for its progress
         """
-        from backend.ai.vectordb.utils import create_vectordb
-        create_vectordb(
+        job = GLOBAL_BUILD_JOB_MANAGER.submit(
             embedding_model_name=request.name,
             chunk_size=int(request.chunk_size),
-            chunk_overlap=int(request.chunk_overlap)
+            chunk_overlap=int(request.chunk_overlap),
+            index_params=request.index_params
         )
+        return job.to_dict()
+
+    @staticmethod
+    def get_build_jobs(job_id: str | None = None) -> List[Dict[str, Any]] | Dict[str, Any]:
+        """
+        Get one build job, or every build job of this process newest first.
+        
+        Args:
+            job_id: Optional id of a single job
+        """
+        if job_id is not None:
+            return GLOBAL_BUILD_JOB_MANAGER.get(job_id).to_dict()
+        return [job.to_dict() for job in GLOBAL_BUILD_JOB_MANAGER.list()]
+
+    @staticmethod
+    def cancel_build_job(job_id: str) -> Dict[str, Any]:
+        """
+        Cancel a queued or running build job.
+        
+        Args:
+            job_id: Id of the job
+        """
+        return GLOBAL_BUILD_JOB_MANAGER.cancel(job_id).to_dict()
 
     @staticmethod
     def load_vectordb(request: VectorDBInfo) -> None:
@@ -81,6 +87,49 @@ class VectorDBService:
             chunk_overlap=request.chunk_overlap
         )
 
+    @staticmethod
+    def delete_vectordb(request: VectorDBInfo) -> None:
+        """
+        Delete a vector database that is not currently loaded.
+        
+        Args:
+            request: VectorDBInfo containing name, chunk_size, and chunk_overlap
+        """
+        from backend.ai.vectordb.utils import delete_vectordb
+        name = get_catalog_key(request.name, request.chunk_size, request.chunk_overlap)
+        if GLOBAL_VECTOR_DB.get_db() is not None and GLOBAL_VECTOR_DB.get_db_name() == name:
+            raise ValueError(f"Vector database {name} is currently loaded")
+        delete_vectordb(
+            embedding_model_name=request.name,
+            chunk_size=int(request.chunk_size),
+            chunk_overlap=int(request.chunk_overlap)
+        )
+
+    @staticmethod
+    def set_search_backend(request: SearchBackendRequest) -> Dict[str, Any]:
+        """
+        Choose whether a vector database is searched through Chroma or the exact backend.
+        The currently loaded database is reloaded to apply it.
+        
+        Args:
+            request: SearchBackendRequest containing the database parameters and backend
+            
+        Returns:
+            The updated catalog entry
+        """
+        from backend.ai.vectordb.utils import set_search_backend
+        entry = set_search_backend(
+            embedding_model_name=request.name,
+            chunk_size=int(request.chunk_size),
+            chunk_overlap=int(request.chunk_overlap),
+            search_backend=request.search_backend,
+            exact_dtype=request.exact_dtype
+        )
+        name = get_catalog_key(request.name, request.chunk_size, request.chunk_overlap)
+        if GLOBAL_VECTOR_DB.get_db() is not None and GLOBAL_VECTOR_DB.get_db_name() == name:
+            GLOBAL_VECTOR_DB.load_db(request.name, request.chunk_size, request.chunk_overlap)
+        return entry
+
     @staticmethod
     def get_available_models() -> List[str]:
         """
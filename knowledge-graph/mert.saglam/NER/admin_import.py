@@ -0,0 +1,397 @@
+"""
+Offline Knowledge Graph Import
+Converts NER results and langextract JSONL into neo4j-admin database import CSVs for a from-scratch rebuild
+"""
+
+import os
+import csv
+import sys
+import json
+import argparse
+from typing import List, Dict, Any, Tuple
+import logging
+from extract import Neo4jKnowledgeGraph, get_text_key, to_neo4j_properties
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# neo4j-admin splits array cells on this character, passed as --array-delimiter
+ARRAY_DELIMITER = '|'
+MANIFEST_FILE = 'import_manifest.json'
+ENTITY_ID_SPACE = 'Entity'
+DOCUMENT_ID_SPACE = 'Document'
+EXTRACTED_FROM = 'EXTRACTED_FROM'
+
+NODE_FILES = {'entities.csv': ENTITY_ID_SPACE, 'documents.csv': DOCUMENT_ID_SPACE}
+RELATIONSHIP_FILES = {
+    'relationships.csv': (ENTITY_ID_SPACE, ENTITY_ID_SPACE),
+    'extracted_from.csv': (ENTITY_ID_SPACE, DOCUMENT_ID_SPACE)
+}
+
+
+class GraphExport:
+    """
+    Deduplicated nodes and relationships collected from extraction outputs
+    Ids, labels and properties are the ones the Cypher loader in extract.py writes, a later row
+    with the same id is merged into an earlier one like its MERGE ... SET n += does: its values win,
+    properties only the earlier row had are kept
+    """
+
+    def __init__(self):
+        self.kg = Neo4jKnowledgeGraph()  # Only used for its label/type sanitizing, never connected
+        self.entities: Dict[str, Dict[str, Any]] = {}
+        self.entity_ids_by_key: Dict[str, List[str]] = {}
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.relationships: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self.mentions: Dict[Tuple[str, str, int, int], Dict[str, Any]] = {}
+        self.unmatched_relations = 0
+
+    def add_entity(self, text: str, entity_type: str, source: str, fields: Dict[str, Any], properties: Dict[str, Any]) -> str:
+        """Add an entity node or merge it into the one with the same id, returns its id"""
+        entity_label = self.kg.sanitize_label(entity_type)
+        entity_id = self.kg.get_entity_id(text, entity_label)
+        text_key = get_text_key(text)
+
+        previous = self.entities.get(entity_id)
+        sources = previous['sources'] if previous else []
+        if source not in sources:
+            sources = sources + [source]
+
+        self.entities[entity_id] = {
+            **(previous or {}),
+            'text': text,
+            'text_key': text_key,
+            'type': entity_label,
+            'type_key': get_text_key(entity_type),
+            'original_type': entity_type,
+            **fields,
+            **to_neo4j_properties(properties),
+            # Provenance, id and labels go last, a property can't overwrite them
+            'sources': sources,
+            '_id': entity_id,
+            '_labels': ['Entity', entity_label]
+        }
+        if previous is None:
+            self.entity_ids_by_key.setdefault(text_key, []).append(entity_id)
+        return entity_id
+
+    def add_ner_results(self, ner_results: Dict[str, Any], source: str):
+        """Entities and relations of a ner.py extraction result"""
+        for entity in ner_results['entities']:
+            self.add_entity(entity['text'], entity['type'], source, {
+                'context': entity.get('context', ''),
+                'confidence': entity.get('confidence', 0.8),
+                'start_pos': entity.get('start_pos', 0),
+                'end_pos': entity.get('end_pos', 0),
+                'occurrence_count': entity.get('occurrence_count', 0)
+            }, entity.get('properties', {}))
+
+        # Like the loaders, a relation connects every entity whose text matches an endpoint
+        for relation in ner_results['relations']:
+            sources = self.entity_ids_by_key.get(get_text_key(relation['entity1']), [])
+            targets = self.entity_ids_by_key.get(get_text_key(relation['entity2']), [])
+            if not sources or not targets:
+                self.unmatched_relations += 1
+                continue
+            rel_type = self.kg.sanitize_relationship_type(relation['relation_type'])
+            for source_id in sources:
+                for target_id in targets:
+                    key = (source_id, target_id, rel_type)
+                    self.relationships[key] = {
+                        **self.relationships.get(key, {}),
+                        'original_type': relation['relation_type'],
+                        'context': relation.get('context', ''),
+                        'confidence': relation.get('confidence', 0.8),
+                        **to_neo4j_properties(relation.get('properties', {})),
+                        '_start': source_id,
+                        '_end': target_id,
+                        '_type': rel_type
+                    }
+
+    def add_langextract_document(self, document: Dict[str, Any], source: str):
+        """Extractions of one langextract document, each linked to a Document node by its span"""
+        document_id = document.get('document_id') or f"{source}#{len(self.documents)}"
+        self.documents[document_id] = {
+            'source': source,
+            'text_length': len(document.get('text') or ''),
+            '_id': document_id,
+            '_labels': ['Document']
+        }
+
+        for extraction in document.get('extractions', []):
+            text = (extraction.get('extraction_text') or '').strip()
+            if not text:
+                continue
+            interval = extraction.get('char_interval') or {}
+            start_pos = interval.get('start_pos')
+            end_pos = interval.get('end_pos')
+
+            entity_id = self.add_entity(text, extraction['extraction_class'], source, {
+                'start_pos': start_pos,
+                'end_pos': end_pos
+            }, extraction.get('attributes') or {})
+
+            mention_key = (entity_id, document_id, start_pos if start_pos is not None else -1, end_pos if end_pos is not None else -1)
+            self.mentions[mention_key] = {
+                'start_pos': start_pos,
+                'end_pos': end_pos,
+                'alignment_status': extraction.get('alignment_status'),
+                'extraction_index': extraction.get('extraction_index'),
+                '_start': entity_id,
+                '_end': document_id,
+                '_type': EXTRACTED_FROM
+            }
+
+
+def _value_type(value: Any) -> str:
+    if isinstance(value, bool):
+        return 'boolean'
+    if isinstance(value, int):
+        return 'long'
+    if isinstance(value, float):
+        return 'double'
+    return 'string'
+
+
+def _column_type(values: List[Any]) -> str:
+    """neo4j-admin type of a column, strings when its values disagree"""
+    if not values:
+        return 'string'
+    if values and all(isinstance(v, list) for v in values):
+        element_types = {_value_type(e) for v in values for e in v}
+        if element_types == {'string'} and any(ARRAY_DELIMITER in e for v in values for e in v):
+            return 'string'
+        if element_types <= {'long', 'double'} and element_types:
+            return 'double[]' if 'double' in element_types else 'long[]'
+        return f"{element_types.pop()}[]" if len(element_types) == 1 else 'string'
+
+    types = {_value_type(v) for v in values}
+    if types == {'long', 'double'}:
+        return 'double'
+    return types.pop() if len(types) == 1 else 'string'
+
+
+def _format_cell(value: Any, column_type: str) -> str:
+    if value is None:
+        return ''  # No property
+    if column_type.endswith('[]'):
+        return ARRAY_DELIMITER.join(_format_cell(e, column_type[:-2]) for e in value)
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if column_type == 'string' and not isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def _write_csv(path: str, rows: List[Dict[str, Any]], fixed_header: List[Tuple[str, str]]) -> int:
+    """
+    Write rows with a neo4j-admin header, fixed_header maps row keys to their special columns
+    Every other key becomes a typed property column, unless a special column already stores it (id:ID)
+    """
+    fixed_keys = [key for key, _ in fixed_header]
+    stored_names = {column.split(':', 1)[0] for _, column in fixed_header}
+    property_keys = sorted({key for row in rows for key in row} - set(fixed_keys) - stored_names)
+    column_types = {
+        key: _column_type([row[key] for row in rows if row.get(key) is not None])
+        for key in property_keys
+    }
+
+    header = [column for _, column in fixed_header]
+    for key in property_keys:
+        name = key.replace(':', '_').replace(',', '_')
+        header.append(name if column_types[key] == 'string' else f"{name}:{column_types[key]}")
+
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for row in rows:
+            cells = [';'.join(row[key]) if key == '_labels' else row[key] for key in fixed_keys]
+            cells += [_format_cell(row.get(key), column_types[key]) for key in property_keys]
+            writer.writerow(cells)
+
+    logger.info(f"Wrote {len(rows)} rows to {path}")
+    return len(rows)
+
+
+def get_import_command(output_dir: str, database: str = 'neo4j') -> str:
+    """neo4j-admin command that imports the exported files"""
+    nodes = ' '.join(f"--nodes={os.path.join(output_dir, name)}" for name in NODE_FILES)
+    relationships = ' '.join(f"--relationships={os.path.join(output_dir, name)}" for name in RELATIONSHIP_FILES)
+    return (f"neo4j-admin database import full {database} {nodes} {relationships} "
+            f"--array-delimiter='{ARRAY_DELIMITER}' --multiline-fields=true --overwrite-destination=true")
+
+
+def export_for_admin_import(ner_files: List[str], langextract_files: List[str], output_dir: str) -> Dict[str, Any]:
+    """
+    Convert extraction outputs into neo4j-admin import CSVs and a manifest of their row counts
+    Inputs are applied in order, NER results first
+    """
+    export = GraphExport()
+    for path in ner_files:
+        with open(path, 'r', encoding='utf-8') as f:
+            export.add_ner_results(json.load(f), os.path.basename(path))
+        logger.info(f"Read NER results from {path}")
+
+    for path in langextract_files:
+        source = os.path.join(os.path.basename(os.path.dirname(path)), os.path.basename(path))
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    export.add_langextract_document(json.loads(line), source)
+        logger.info(f"Read langextract documents from {path}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    files = {
+        'entities.csv': _write_csv(os.path.join(output_dir, 'entities.csv'), list(export.entities.values()),
+                                   [('_id', f'id:ID({ENTITY_ID_SPACE})'), ('_labels', ':LABEL')]),
+        'documents.csv': _write_csv(os.path.join(output_dir, 'documents.csv'), list(export.documents.values()),
+                                    [('_id', f'id:ID({DOCUMENT_ID_SPACE})'), ('_labels', ':LABEL')]),
+        'relationships.csv': _write_csv(os.path.join(output_dir, 'relationships.csv'), list(export.relationships.values()),
+                                        [('_start', f':START_ID({ENTITY_ID_SPACE})'), ('_end', f':END_ID({ENTITY_ID_SPACE})'), ('_type', ':TYPE')]),
+        'extracted_from.csv': _write_csv(os.path.join(output_dir, 'extracted_from.csv'), list(export.mentions.values()),
+                                         [('_start', f':START_ID({ENTITY_ID_SPACE})'), ('_end', f':END_ID({DOCUMENT_ID_SPACE})'), ('_type', ':TYPE')])
+    }
+
+    manifest = {
+        'inputs': {'ner': ner_files, 'langextract': langextract_files},
+        'files': files,
+        'unmatched_relations': export.unmatched_relations,
+        'array_delimiter': ARRAY_DELIMITER,
+        'command': get_import_command(output_dir)
+    }
+    with open(os.path.join(output_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    logger.info(f"Exported {files['entities.csv']} entities, {files['documents.csv']} documents, "
+                f"{files['relationships.csv']} relationships and {files['extracted_from.csv']} mentions "
+                f"({export.unmatched_relations} relations without both endpoints skipped)")
+    logger.info(f"Import with: {manifest['command']}")
+    return manifest
+
+
+def _check_cell(value: str, column_type: str) -> bool:
+    if value == '':
+        return True
+    if column_type.endswith('[]'):
+        return all(_check_cell(e, column_type[:-2]) for e in value.split(ARRAY_DELIMITER))
+    try:
+        if column_type == 'long':
+            int(value)
+        elif column_type == 'double':
+            float(value)
+        elif column_type == 'boolean' and value not in ('true', 'false'):
+            return False
+    except ValueError:
+        return False
+    return True
+
+
+def verify_export(output_dir: str) -> List[str]:
+    """
+    File-level check of an export before importing it
+    Row counts match the manifest, ids are unique per id space, every relationship endpoint exists
+    and typed cells parse. Returns the problems found
+    """
+    with open(os.path.join(output_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    problems = []
+    ids = {}
+    for name in list(NODE_FILES) + list(RELATIONSHIP_FILES):
+        with open(os.path.join(output_dir, name), 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            columns = [(column.split(':', 1) + [''])[:2] for column in header]
+            row_count = 0
+            for row in reader:
+                row_count += 1
+                if len(row) != len(header):
+                    problems.append(f"{name} row {row_count}: {len(row)} cells for {len(header)} columns")
+                    continue
+                for (field, column_type), value in zip(columns, row):
+                    if column_type.startswith('ID('):
+                        id_space = ids.setdefault(column_type[3:-1], set())
+                        if value in id_space:
+                            problems.append(f"{name} row {row_count}: duplicate id {value}")
+                        id_space.add(value)
+                    elif column_type.startswith(('START_ID(', 'END_ID(')):
+                        id_space = column_type[column_type.index('(') + 1:-1]
+                        if value not in ids.get(id_space, set()):
+                            problems.append(f"{name} row {row_count}: {value} is not a {id_space} node")
+                    elif field and not _check_cell(value, column_type):
+                        problems.append(f"{name} row {row_count}: {value!r} is not a valid {column_type} for {field}")
+
+        if row_count != manifest['files'][name]:
+            problems.append(f"{name}: {row_count} rows, the manifest lists {manifest['files'][name]}")
+
+    for problem in problems[:20]:
+        logger.error(problem)
+    logger.info(f"Verified {output_dir}: {len(problems)} problems")
+    return problems
+
+
+def verify_import(output_dir: str) -> List[str]:
+    """Compare node and relationship counts of the imported database with the manifest"""
+    with open(os.path.join(output_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    expected = {
+        'Entity': manifest['files']['entities.csv'],
+        'Document': manifest['files']['documents.csv'],
+        'relationships': manifest['files']['relationships.csv'],
+        EXTRACTED_FROM: manifest['files']['extracted_from.csv']
+    }
+
+    kg = Neo4jKnowledgeGraph()
+    kg.connect()
+    try:
+        with kg.driver.session(database=kg.database) as session:
+            actual = {
+                'Entity': session.run("MATCH (n:Entity) RETURN count(n) AS count").single()['count'],
+                'Document': session.run("MATCH (n:Document) RETURN count(n) AS count").single()['count'],
+                'relationships': session.run(
+                    "MATCH (:Entity)-[r]->(:Entity) RETURN count(r) AS count").single()['count'],
+                EXTRACTED_FROM: session.run(
+                    f"MATCH (:Entity)-[r:{EXTRACTED_FROM}]->(:Document) RETURN count(r) AS count").single()['count']
+            }
+    finally:
+        kg.close()
+
+    problems = [f"{name}: {actual[name]} in the database, {count} exported"
+                for name, count in expected.items() if actual[name] != count]
+    for problem in problems:
+        logger.error(problem)
+    logger.info(f"Verified import against {output_dir}: {len(problems)} problems")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export extraction outputs for neo4j-admin database import")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help="Write import CSVs and a manifest")
+    export_parser.add_argument('--ner', nargs='*', default=[], help="ner.py extraction JSON files")
+    export_parser.add_argument('--langextract', nargs='*', default=[], help="langextract extraction JSONL files")
+    export_parser.add_argument('--output', default='neo4j_import', help="Directory to write the CSVs to")
+
+    verify_parser = subparsers.add_parser('verify', help="Check an export, or with --database the imported graph")
+    verify_parser.add_argument('output', nargs='?', default='neo4j_import', help="Directory of the export")
+    verify_parser.add_argument('--database', action='store_true', help="Compare counts with the Neo4j in NEO4J_URI")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        if not args.ner and not args.langextract:
+            parser.error("nothing to export, pass --ner and/or --langextract files")
+        export_for_admin_import(args.ner, args.langextract, args.output)
+        problems = verify_export(args.output)
+    elif args.database:
+        problems = verify_import(args.output)
+    else:
+        problems = verify_export(args.output)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Exact span alignment for extracted entities
+Finds every occurrence of every entity surface form in the document with one Aho-Corasick scan
+"""
+
+import logging
+from collections import deque
+from typing import List, Dict, Tuple, Iterator
+
+logger = logging.getLogger(__name__)
+
+# Turkish dotted/dotless I: 'I' lowers to 'ı' and 'İ' to 'i'. Mapping them first also keeps the
+# folded text the same length as the original, str.lower() turns 'İ' into two characters
+TURKISH_UPPER_I = str.maketrans({'I': 'ı', 'İ': 'i'})
+
+
+def turkish_casefold(text: str) -> str:
+    """Lowercase with Turkish I rules, one output character per input character"""
+    return text.translate(TURKISH_UPPER_I).lower()
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton over a set of patterns
+    Building is linear in the total pattern length, a scan is linear in the text plus the matches
+    """
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = patterns
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.outputs: List[List[int]] = [[]]  # Pattern ids ending at each state, via fail links too
+
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for ch in pattern:
+                if ch not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.outputs.append([])
+                    self.goto[state][ch] = len(self.goto) - 1
+                state = self.goto[state][ch]
+            self.outputs[state].append(pattern_id)
+
+        # Breadth-first so a state's fail target is finished before the state, the root's children fail to the root
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(ch, 0)
+                self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Yield (start, pattern_id) of every pattern occurrence, overlapping ones included"""
+        goto, fail, outputs, patterns = self.goto, self.fail, self.outputs, self.patterns
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for pattern_id in outputs[state]:
+                yield i - len(patterns[pattern_id]) + 1, pattern_id
+
+
+def find_occurrences(text: str, surface_forms: List[str]) -> Dict[str, List[Tuple[int, int]]]:
+    """
+    Exact (start, end) spans of every surface form in the text, matched after Turkish case folding
+    A match has to start at a word boundary but may run into a suffix ("SGK" in "SGK'nın", "reçete" in "reçetenin")
+    """
+    folded_forms = {}
+    for form in dict.fromkeys(surface_forms):
+        folded = turkish_casefold(form.strip())
+        if folded:
+            folded_forms.setdefault(folded, []).append(form)
+
+    patterns = list(folded_forms)
+    automaton = AhoCorasick(patterns)
+    folded_text = turkish_casefold(text)
+
+    occurrences = {form: [] for form in surface_forms}
+    for start, pattern_id in automaton.iter_matches(folded_text):
+        if start > 0 and folded_text[start - 1].isalnum():
+            continue
+        span = (start, start + len(patterns[pattern_id]))
+        for form in folded_forms[patterns[pattern_id]]:
+            occurrences[form].append(span)
+    return occurrences
+
+
+def align_entities(text: str, entities: List) -> List:
+    """
+    Replace the approximate LLM positions of entities with exact document offsets
+    Every occurrence is stored on the entity and start_pos/end_pos become the occurrence nearest
+    the approximate position. Entities that never occur keep their positions with a count of 0
+    """
+    occurrences = find_occurrences(text, [entity.text for entity in entities])
+
+    aligned = 0
+    for entity in entities:
+        spans = occurrences.get(entity.text, [])
+        entity.occurrences = [list(span) for span in spans]
+        entity.occurrence_count = len(spans)
+        if spans:
+            entity.start_pos, entity.end_pos = min(spans, key=lambda span: abs(span[0] - entity.start_pos))
+            aligned += 1
+
+    logger.info(f"Aligned {aligned}/{len(entities)} entities to exact spans, "
+                f"{sum(entity.occurrence_count for entity in entities)} occurrences in total")
+    return entities
@@ -0,0 +1,234 @@
+"""
+Knowledge Graph Query Benchmark
+Loads a generated graph and times the query methods against the toLower/CONTAINS and full-scan queries they replaced
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+from typing import List, Dict, Any, Callable
+import logging
+from extract import Neo4jKnowledgeGraph
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SYLLABLES = ['sa', 'ğlık', 'hiz', 'met', 'ku', 'rum', 'ila', 'ç', 'ra', 'por', 'te', 'da', 'vi', 'fa', 'tu',
+             'ra', 'sev', 'k', 'ö', 'de', 'me', 'is', 'tem', 'gi', 'der', 'bel', 'ge', 'ş', 'ı', 'İ', 'üc', 'ret']
+TYPES = ['Kurum', 'Belge', 'Sistem', 'Kanun', 'Yönetmelik', 'İlaç', 'Tıbbi Prosedür', 'Sağlık Hizmeti',
+         'Ödeme Kuralı', 'Kimlik Belgesi', 'Hastalık', 'Tıbbi Malzeme', 'Rapor', 'Sözleşme', 'Fatura']
+RELATION_TYPES = ['yönetir', 'gerektirir', 'düzenler', 'kullanılır', 'kapsar', 'ödenir', 'referans alır']
+
+# The queries of the query methods before they used the key properties, the full-text index and the graph summary
+LEGACY_QUERIES = {
+    'search_entities': """
+        MATCH (n:Entity)
+        WHERE toLower(n.text) CONTAINS toLower($search_term)
+        RETURN n.id as id, n.text as text, n.original_type as type
+        ORDER BY n.confidence DESC
+        LIMIT 10
+    """,
+    'get_entity_details': """
+        MATCH (n:Entity)
+        WHERE toLower(n.text) = toLower($entity_text)
+        OPTIONAL MATCH (n)-[r_out]->(m:Entity)
+        OPTIONAL MATCH (n)<-[r_in]-(p:Entity)
+        RETURN n.id as id, collect(DISTINCT m.text) as outgoing, collect(DISTINCT p.text) as incoming
+    """,
+    'get_entities_by_type': """
+        MATCH (n:Entity)
+        WHERE toLower(n.original_type) = toLower($entity_type)
+        RETURN n.id as id, n.text as text
+        ORDER BY n.confidence DESC
+        LIMIT 20
+    """,
+    'get_path_between_entities': """
+        MATCH (a:Entity), (b:Entity)
+        WHERE toLower(a.text) = toLower($entity1)
+          AND toLower(b.text) = toLower($entity2)
+        MATCH path = shortestPath((a)-[*..5]-(b))
+        RETURN length(path) as path_length
+        LIMIT 5
+    """,
+    'get_entity_neighbors': """
+        MATCH (n:Entity)
+        WHERE toLower(n.text) = toLower($entity_text)
+        MATCH path = (n)-[*1..2]-(m:Entity)
+        RETURN m.text as end_entity, length(path) as depth
+        ORDER BY depth
+        LIMIT 50
+    """,
+    'get_graph_statistics': """
+        MATCH (n:Entity)
+        OPTIONAL MATCH ()-[r]->()
+        RETURN count(DISTINCT n) as total_nodes,
+               count(r) as total_relationships
+    """,
+    'find_central_entities': """
+        MATCH (n:Entity)
+        OPTIONAL MATCH (n)-[r]-()
+        WITH n, count(r) as connections
+        WHERE connections > 0
+        RETURN n.text as text, connections
+        ORDER BY connections DESC, n.confidence DESC
+        LIMIT 10
+    """
+}
+
+
+def generate_ner_results(entity_count: int, relation_count: int, seed: int = 0) -> Dict[str, Any]:
+    """NER-shaped results with random Turkish-looking entity texts"""
+    rng = random.Random(seed)
+    texts = set()
+    while len(texts) < entity_count:
+        words = [''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(rng.randint(1, 3))]
+        texts.add(' '.join(word.capitalize() for word in words))
+    texts = sorted(texts)
+
+    entities = [{
+        'text': text,
+        'type': rng.choice(TYPES),
+        'start_pos': i,
+        'end_pos': i + len(text),
+        'context': text,
+        'confidence': round(rng.uniform(0.5, 1.0), 2),
+        'occurrence_count': rng.randint(1, 50),
+        'properties': {}
+    } for i, text in enumerate(texts)]
+
+    relations = [{
+        'entity1': rng.choice(texts),
+        'entity2': rng.choice(texts),
+        'relation_type': rng.choice(RELATION_TYPES),
+        'context': '',
+        'properties': {}
+    } for _ in range(relation_count)]
+    return {'entities': entities, 'relations': relations}
+
+
+def time_calls(call: Callable[[Any], Any], arguments: List[Any]) -> Dict[str, float]:
+    """Per-call latency of call over every argument"""
+    latencies = []
+    for argument in arguments:
+        start = time.perf_counter()
+        call(argument)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        'calls': len(latencies),
+        'mean_ms': sum(latencies) / len(latencies),
+        'p50_ms': latencies[len(latencies) // 2],
+        'p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    }
+
+
+def run_benchmark(kg: Neo4jKnowledgeGraph, ner_results: Dict[str, Any], calls: int, seed: int = 0) -> Dict[str, Any]:
+    """Time every query method and its legacy query on the same arguments"""
+    rng = random.Random(seed)
+    texts = [entity['text'] for entity in rng.sample(ner_results['entities'], calls)]
+    pairs = [(texts[i], texts[(i + 1) % calls]) for i in range(calls)]
+    types = [rng.choice(TYPES) for _ in range(calls)]
+    # Search by the first word, like a user typing part of a name
+    search_terms = [text.split()[0] for text in texts]
+
+    def legacy(name: str, **params):
+        with kg.driver.session(database=kg.database) as session:
+            return list(session.run(LEGACY_QUERIES[name], **params))
+
+    cases = {
+        'search_entities': (
+            search_terms,
+            lambda term: legacy('search_entities', search_term=term),
+            lambda term: kg.search_entities(term)
+        ),
+        'get_entity_details': (
+            texts,
+            lambda text: legacy('get_entity_details', entity_text=text),
+            lambda text: kg.get_entity_details(text)
+        ),
+        'get_entities_by_type': (
+            types,
+            lambda entity_type: legacy('get_entities_by_type', entity_type=entity_type),
+            lambda entity_type: kg.get_entities_by_type(entity_type)
+        ),
+        'get_path_between_entities': (
+            pairs,
+            lambda pair: legacy('get_path_between_entities', entity1=pair[0], entity2=pair[1]),
+            lambda pair: kg.get_path_between_entities(pair[0], pair[1])
+        ),
+        'get_entity_neighbors': (
+            texts,
+            lambda text: legacy('get_entity_neighbors', entity_text=text),
+            lambda text: kg.get_entity_neighbors(text)
+        ),
+        # Whole-graph reads, timed a few times only since the legacy queries scan everything
+        'get_graph_statistics': (
+            list(range(min(calls, 5))),
+            lambda _: legacy('get_graph_statistics'),
+            lambda _: kg.get_graph_statistics()
+        ),
+        'find_central_entities': (
+            list(range(min(calls, 5))),
+            lambda _: legacy('find_central_entities'),
+            lambda _: kg.find_central_entities()
+        )
+    }
+
+    results = {}
+    for name, (arguments, before, after) in cases.items():
+        # One untimed call each so query planning is not part of the timings
+        before(arguments[0])
+        after(arguments[0])
+        results[name] = {'before': time_calls(before, arguments), 'after': time_calls(after, arguments)}
+        speedup = results[name]['before']['p50_ms'] / max(results[name]['after']['p50_ms'], 1e-6)
+        logger.info(f"{name}: p50 {results[name]['before']['p50_ms']:.2f}ms -> "
+                    f"{results[name]['after']['p50_ms']:.2f}ms ({speedup:.1f}x)")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the knowledge graph query methods before and after their indexes")
+    parser.add_argument('--entities', type=int, default=100000, help="Generated entities")
+    parser.add_argument('--relations', type=int, default=200000, help="Generated relations")
+    parser.add_argument('--calls', type=int, default=50, help="Timed calls per query method")
+    parser.add_argument('--clear', action='store_true', help="Clear the database first, it must be a disposable one")
+    parser.add_argument('--output', default='query_benchmark.json', help="Where to write the results JSON")
+    args = parser.parse_args(argv)
+
+    kg = Neo4jKnowledgeGraph()
+    kg.connect()
+    try:
+        with kg.driver.session(database=kg.database) as session:
+            # clear_database leaves a GraphSummary node behind, a cleared database still counts as empty
+            node_count = session.run("MATCH (n) WHERE NOT n:GraphSummary RETURN count(n) AS count").single()['count']
+        if node_count and not args.clear:
+            logger.error(f"{kg.database} has {node_count} nodes, pass --clear to benchmark on a disposable database")
+            return 1
+
+        kg.clear_database()
+        kg.create_indexes()
+        ner_results = generate_ner_results(args.entities, args.relations)
+        load_stats = kg.build_from_ner_results(ner_results)
+        with kg.driver.session(database=kg.database) as session:
+            session.run("CALL db.awaitIndexes(600)")
+
+        results = {
+            'entities': args.entities,
+            'relations': args.relations,
+            'load': load_stats,
+            'queries': run_benchmark(kg, ner_results, min(args.calls, args.entities))
+        }
+    finally:
+        kg.close()
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    logger.info(f"Results saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,12 +4,17 @@ Builds Neo4j knowledge graph from dynamically extracted entities
 """
 
 import os
+import re
 import json
-from typing import List, Dict, Any
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Callable
 from dotenv import load_dotenv
 from neo4j import GraphDatabase
 import logging
 from ner import TurkishNERExtractor
+from alignment import turkish_casefold
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -18,6 +23,80 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Rows sent per UNWIND transaction by the bulk loader
+NEO4J_BATCH_SIZE = int(os.getenv('NEO4J_BATCH_SIZE', '5000'))
+
+# Full-text index over entity text, Lucene's Turkish analyzer lowercases with Turkish I rules and stems
+ENTITY_FULLTEXT_INDEX = 'entity_text_fulltext'
+FULLTEXT_ANALYZER = 'turkish'
+
+# Graph statistics are kept on one GraphSummary node so reading them doesn't scan the graph. The bulk
+# loader updates it with the count changes of its batches, the other loaders refresh it with full passes.
+# PageRank is computed offline by compute_pagerank
+GRAPH_SUMMARY_ID = 'graph'
+PAGERANK_DAMPING = 0.85
+PAGERANK_ITERATIONS = 50
+PAGERANK_TOLERANCE = 1e-6
+CENTRALITY_MEASURES = ['degree', 'pagerank']
+
+
+def get_text_key(text: str) -> str:
+    """Normalized entity text stored as n.text_key, relation endpoints are matched on it through an index"""
+    return turkish_casefold(text.strip())
+
+
+def to_fulltext_query(search_term: str) -> str:
+    """
+    Lucene query matching entities that contain every word of the search term
+    Each word matches as analyzed (so Turkish suffixes are stemmed away) or as a prefix. Words are
+    split on punctuation like the analyzer does, which also leaves no Lucene syntax to escape
+    """
+    words = re.findall(r'\w+', turkish_casefold(search_term))
+    return ' AND '.join(f"({word} OR {word}*)" for word in words)
+
+
+def to_neo4j_properties(properties: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Make LLM-provided properties storable on a node or relationship
+    Neo4j only stores primitives and lists of primitives, anything else is kept as a JSON string
+    """
+    storable = {}
+    for key, value in (properties or {}).items():
+        if value is None:
+            continue
+        if isinstance(value, (str, int, float, bool)):
+            storable[key] = value
+        elif isinstance(value, list) and value and all(isinstance(v, type(value[0])) for v in value) \
+                and isinstance(value[0], (str, int, float, bool)):
+            storable[key] = value
+        else:
+            storable[key] = json.dumps(value, ensure_ascii=False)
+    return storable
+
+
+@dataclass
+class GraphSummaryDelta:
+    """Per-type count and confidence changes of a bulk load, applied to the GraphSummary node"""
+    nodes_by_type: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    relationships_by_type: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    confidence_sum: float = 0.0
+    confidence_count: int = 0
+    
+    def add_node(self, node_type: str, confidence: float, sign: int = 1):
+        self.nodes_by_type[node_type] += sign
+        if confidence is not None:
+            self.confidence_sum += sign * confidence
+            self.confidence_count += sign
+
+
+def apply_type_counts(type_counts: List[Dict[str, Any]], changes: Dict[str, int]) -> List[Dict[str, Any]]:
+    """Add count changes to a summary's per-type counts, dropping types that reach 0"""
+    counts = {record['type']: record['count'] for record in type_counts}
+    for record_type, change in changes.items():
+        counts[record_type] = counts.get(record_type, 0) + change
+    return [{'type': record_type, 'count': count}
+            for record_type, count in sorted(counts.items(), key=lambda item: -item[1]) if count > 0]
+
 
 class Neo4jKnowledgeGraph:
     """Manages Neo4j knowledge graph operations with dynamic entity types"""
@@ -52,6 +131,19 @@ class Neo4jKnowledgeGraph:
         """Clear all nodes and relationships"""
         with self.driver.session(database=self.database) as session:
             session.run("MATCH (n) DETACH DELETE n")
+            # The summary of an empty graph is known, so the next bulk load can add its deltas to it
+            session.run("""
+                CREATE (s:GraphSummary {id: $id})
+                SET s += $summary
+            """, id=GRAPH_SUMMARY_ID, summary={
+                'total_nodes': 0,
+                'total_relationships': 0,
+                'confidence_sum': 0.0,
+                'confidence_count': 0,
+                'nodes_by_type': '[]',
+                'relationships_by_type': '[]',
+                'updated_at': time.time()
+            })
             logger.info("Database cleared")
     
     def create_indexes(self):
@@ -60,8 +152,47 @@ class Neo4jKnowledgeGraph:
             # Create index on text for full-text search
             session.run("CREATE INDEX entity_text IF NOT EXISTS FOR (n:Entity) ON (n.text)")
             session.run("CREATE INDEX entity_type IF NOT EXISTS FOR (n:Entity) ON (n.type)")
+            # MERGE lookups of the loaders and relation endpoint matching
+            session.run("CREATE INDEX entity_id IF NOT EXISTS FOR (n:Entity) ON (n.id)")
+            session.run("CREATE INDEX entity_text_key IF NOT EXISTS FOR (n:Entity) ON (n.text_key)")
+            session.run("CREATE INDEX entity_type_key IF NOT EXISTS FOR (n:Entity) ON (n.type_key)")
+            # Ordering of find_central_entities
+            session.run("CREATE INDEX entity_degree IF NOT EXISTS FOR (n:Entity) ON (n.degree)")
+            session.run("CREATE INDEX entity_pagerank IF NOT EXISTS FOR (n:Entity) ON (n.pagerank)")
+            # Word search of search_entities
+            session.run(f"""
+                CREATE FULLTEXT INDEX {ENTITY_FULLTEXT_INDEX} IF NOT EXISTS
+                FOR (n:Entity) ON EACH [n.text]
+                OPTIONS {{indexConfig: {{`fulltext.analyzer`: '{FULLTEXT_ANALYZER}'}}}}
+            """)
             logger.info("Indexes created")
     
+    def backfill_keys(self, batch_size: int = NEO4J_BATCH_SIZE) -> int:
+        """
+        Set text_key and type_key on entities loaded before the keys existed
+        Cypher's toLower has no Turkish I rules, so the keys are computed here and written back in batches
+        """
+        with self.driver.session(database=self.database) as session:
+            rows = [
+                {'element_id': record['element_id'],
+                 'text_key': get_text_key(record['text'] or ''),
+                 'type_key': get_text_key(record['original_type'] or '')}
+                for record in session.run("""
+                    MATCH (n:Entity)
+                    WHERE n.text_key IS NULL OR n.type_key IS NULL
+                    RETURN elementId(n) as element_id, n.text as text, n.original_type as original_type
+                """)
+            ]
+            updated = self._run_batches(session, """
+                UNWIND $rows AS row
+                MATCH (n:Entity) WHERE elementId(n) = row.element_id
+                SET n.text_key = row.text_key, n.type_key = row.type_key
+                RETURN count(n) AS count
+            """, rows, batch_size)
+        
+        logger.info(f"Backfilled text_key and type_key on {updated} entities")
+        return updated
+    
     def sanitize_label(self, label: str) -> str:
         """Sanitize label for Neo4j (remove special characters)"""
         # Remove or replace characters that aren't allowed in Neo4j labels
@@ -81,6 +212,10 @@ class Neo4jKnowledgeGraph:
         sanitized = ''.join(c for c in sanitized if c.isalnum() or c == '_')
         return sanitized or 'RELATED_TO'
     
+    def get_entity_id(self, text: str, entity_label: str) -> str:
+        """Generate unique ID from text and type"""
+        return f"{text.lower().replace(' ', '_')}_{entity_label.lower()}"
+    
     def insert_entities_from_ner(self, entities: List[Dict[str, Any]]):
         """Insert entities from NER extraction results"""
         with self.driver.session(database=self.database) as session:
@@ -89,17 +224,20 @@ class Neo4jKnowledgeGraph:
                 entity_label = self.sanitize_label(entity['type'])
                 
                 # Generate unique ID from text and type
-                entity_id = f"{entity['text'].lower().replace(' ', '_')}_{entity_label.lower()}"
+                entity_id = self.get_entity_id(entity['text'], entity_label)
                 
                 query = f"""
                 MERGE (n:Entity:{entity_label} {{id: $id}})
                 SET n.text = $text,
+                    n.text_key = $text_key,
                     n.type = $type,
+                    n.type_key = $type_key,
                     n.original_type = $original_type,
                     n.context = $context,
                     n.confidence = $confidence,
                     n.start_pos = $start_pos,
                     n.end_pos = $end_pos,
+                    n.occurrence_count = $occurrence_count,
                     n += $properties
                 RETURN n
                 """
@@ -107,12 +245,15 @@ class Neo4jKnowledgeGraph:
                 session.run(query,
                            id=entity_id,
                            text=entity['text'],
+                           text_key=get_text_key(entity['text']),
                            type=entity_label,
+                           type_key=get_text_key(entity['type']),
                            original_type=entity['type'],
                            context=entity.get('context', ''),
                            confidence=entity.get('confidence', 0.8),
                            start_pos=entity.get('start_pos', 0),
                            end_pos=entity.get('end_pos', 0),
+                           occurrence_count=entity.get('occurrence_count', 0),
                            properties=entity.get('properties', {}))
         
         logger.info(f"Inserted {len(entities)} entities into Neo4j")
@@ -160,35 +301,404 @@ class Neo4jKnowledgeGraph:
         
         logger.info(f"Inserted {successful} relationships ({failed} failed)")
     
-    def build_from_ner_results(self, ner_results: Dict[str, Any]):
-        """Build complete knowledge graph from NER extraction results"""
+    def _run_batches(self, session, query: str, rows: List[Dict[str, Any]], batch_size: int,
+                     on_record: Callable[[Any], None] = None) -> int:
+        """
+        Run an UNWIND $rows query in explicit write transactions of batch_size rows, returns the summed count
+        on_record: Called with the result record of every batch
+        """
+        total = 0
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            record = session.execute_write(lambda tx: tx.run(query, rows=batch).single())
+            total += record['count']
+            if on_record is not None:
+                on_record(record)
+        return total
+    
+    def bulk_insert_entities(self, entities: List[Dict[str, Any]], batch_size: int = NEO4J_BATCH_SIZE,
+                             summary_delta: GraphSummaryDelta = None) -> Dict[str, Any]:
+        """
+        Insert entities with one UNWIND query per label and batch
+        Labels can't be query parameters, so rows are grouped by sanitized label first. Entities with
+        the same id are merged into one row like consecutive MERGEs would, so every node is written once
+        summary_delta: Collects the node count and confidence changes of the load
+        """
+        rows_by_label = defaultdict(dict)
+        for entity in entities:
+            entity_label = self.sanitize_label(entity['type'])
+            entity_id = self.get_entity_id(entity['text'], entity_label)
+            previous = rows_by_label[entity_label].get(entity_id)
+            properties = to_neo4j_properties(entity.get('properties', {}))
+            rows_by_label[entity_label][entity_id] = {
+                'id': entity_id,
+                'text': entity['text'],
+                'text_key': get_text_key(entity['text']),
+                'type': entity_label,
+                'type_key': get_text_key(entity['type']),
+                'original_type': entity['type'],
+                'context': entity.get('context', ''),
+                'confidence': entity.get('confidence', 0.8),
+                'start_pos': entity.get('start_pos', 0),
+                'end_pos': entity.get('end_pos', 0),
+                'occurrence_count': entity.get('occurrence_count', 0),
+                'properties': {**previous['properties'], **properties} if previous else properties,
+                'input_rows': previous['input_rows'] + 1 if previous else 1
+            }
+        
+        def collect_delta(record):
+            # Every written node now has its row's type and confidence, the ones it replaced are taken off
+            for row_type, confidence in record['written']:
+                summary_delta.add_node(row_type, confidence)
+            for previous_type, previous_confidence in record['replaced']:
+                summary_delta.add_node(previous_type, previous_confidence, sign=-1)
+        
+        start = time.perf_counter()
+        written = 0
+        with self.driver.session(database=self.database) as session:
+            for entity_label, rows_by_id in rows_by_label.items():
+                query = f"""
+                UNWIND $rows AS row
+                OPTIONAL MATCH (previous:Entity {{id: row.id}})
+                WITH row, previous IS NOT NULL AS existed,
+                     previous.original_type AS previous_type, previous.confidence AS previous_confidence
+                MERGE (n:Entity:{entity_label} {{id: row.id}})
+                ON CREATE SET n.degree = 0
+                SET n.text = row.text,
+                    n.text_key = row.text_key,
+                    n.type = row.type,
+                    n.type_key = row.type_key,
+                    n.original_type = row.original_type,
+                    n.context = row.context,
+                    n.confidence = row.confidence,
+                    n.start_pos = row.start_pos,
+                    n.end_pos = row.end_pos,
+                    n.occurrence_count = row.occurrence_count,
+                    n += row.properties
+                RETURN sum(row.input_rows) AS count,
+                       collect([row.original_type, row.confidence]) AS written,
+                       collect(CASE WHEN existed THEN [previous_type, previous_confidence] END) AS replaced
+                """
+                written += self._run_batches(session, query, list(rows_by_id.values()), batch_size,
+                                             collect_delta if summary_delta is not None else None)
+        seconds = time.perf_counter() - start
+        
+        stats = {
+            'rows': len(entities),
+            'written': written,
+            'labels': len(rows_by_label),
+            'seconds': seconds,
+            'rows_per_second': len(entities) / seconds if seconds else 0.0
+        }
+        logger.info(f"Bulk inserted {written} entities under {len(rows_by_label)} labels in {seconds:.2f}s "
+                    f"({stats['rows_per_second']:.0f} rows/s)")
+        return stats
+    
+    def bulk_insert_relations(self, relations: List[Dict[str, Any]], batch_size: int = NEO4J_BATCH_SIZE,
+                              summary_delta: GraphSummaryDelta = None) -> Dict[str, Any]:
+        """
+        Insert relationships with one UNWIND query per relationship type and batch
+        Endpoints are matched on the indexed text_key instead of scanning every entity with toLower.
+        Relations between the same endpoint keys are merged into one row, like the entities
+        summary_delta: Collects the relationship count changes of the load
+        """
+        rows_by_type = defaultdict(dict)
+        for relation in relations:
+            rel_type = self.sanitize_relationship_type(relation['relation_type'])
+            endpoint_keys = (get_text_key(relation['entity1']), get_text_key(relation['entity2']))
+            previous = rows_by_type[rel_type].get(endpoint_keys)
+            properties = to_neo4j_properties(relation.get('properties', {}))
+            rows_by_type[rel_type][endpoint_keys] = {
+                'source_key': endpoint_keys[0],
+                'target_key': endpoint_keys[1],
+                'original_type': relation['relation_type'],
+                'context': relation.get('context', ''),
+                'confidence': relation.get('confidence', 0.8),
+                'properties': {**previous['properties'], **properties} if previous else properties,
+                'input_rows': previous['input_rows'] + 1 if previous else 1
+            }
+        
+        def collect_delta(record):
+            for row_type, merged, replaced in record['changes']:
+                summary_delta.relationships_by_type[row_type] += merged
+                for (previous_type,) in replaced:
+                    summary_delta.relationships_by_type[previous_type] -= 1
+        
+        start = time.perf_counter()
+        successful = 0
+        with self.driver.session(database=self.database) as session:
+            for rel_type, rows_by_keys in rows_by_type.items():
+                # Like the per-relation insert, every entity with a matching text is connected
+                query = f"""
+                UNWIND $rows AS row
+                MATCH (source:Entity {{text_key: row.source_key}})
+                MATCH (target:Entity {{text_key: row.target_key}})
+                WITH row, source, target, EXISTS {{ (source)-[:{rel_type}]->(target) }} AS existed
+                MERGE (source)-[r:{rel_type}]->(target)
+                ON CREATE SET source.degree = coalesce(source.degree, 0) + 1,
+                              target.degree = coalesce(target.degree, 0) + 1
+                WITH row, r, existed, r.original_type AS previous_type
+                SET r.original_type = row.original_type,
+                    r.context = row.context,
+                    r.confidence = row.confidence,
+                    r += row.properties
+                WITH row, count(r) AS merged, collect(CASE WHEN existed THEN [previous_type] END) AS replaced
+                RETURN sum(row.input_rows) AS count, collect([row.original_type, merged, replaced]) AS changes
+                """
+                successful += self._run_batches(session, query, list(rows_by_keys.values()), batch_size,
+                                                collect_delta if summary_delta is not None else None)
+        seconds = time.perf_counter() - start
+        
+        stats = {
+            'rows': len(relations),
+            'written': successful,
+            'failed': len(relations) - successful,
+            'relationship_types': len(rows_by_type),
+            'seconds': seconds,
+            'rows_per_second': len(relations) / seconds if seconds else 0.0
+        }
+        logger.info(f"Bulk inserted {successful} relationships ({stats['failed']} without both endpoints) "
+                    f"in {seconds:.2f}s ({stats['rows_per_second']:.0f} rows/s)")
+        return stats
+    
+    def build_from_ner_results(self, ner_results: Dict[str, Any], bulk: bool = True) -> Dict[str, Any]:
+        """
+        Build complete knowledge graph from NER extraction results
+        bulk: Load with batched UNWIND transactions, False inserts one entity and relation per query
+        """
         logger.info("Building knowledge graph from NER results...")
         
+        if bulk:
+            # The bulk loader keeps degrees and the summary up to date, unless entities without a degree predate it
+            recompute_degrees = self._has_entities_without_degree()
+            summary_delta = GraphSummaryDelta()
+            stats = {
+                'entities': self.bulk_insert_entities(ner_results['entities'], summary_delta=summary_delta),
+                'relations': self.bulk_insert_relations(ner_results['relations'], summary_delta=summary_delta)
+            }
+            if recompute_degrees:
+                stats['summary'] = self.refresh_graph_summary(recompute_degrees=True)
+            else:
+                stats['summary'] = self.apply_summary_delta(summary_delta)
+            logger.info("Knowledge graph built successfully!")
+            return stats
+        
         # Insert entities
         self.insert_entities_from_ner(ner_results['entities'])
         
         # Insert relations
         self.insert_relations_from_ner(ner_results['relations'])
         
+        self.refresh_graph_summary(recompute_degrees=True)
         logger.info("Knowledge graph built successfully!")
+        return {}
+    
+    # ========== GRAPH SUMMARY ==========
+    
+    def _has_entities_without_degree(self) -> bool:
+        with self.driver.session(database=self.database) as session:
+            return session.run("""
+                RETURN EXISTS { MATCH (n:Entity) WHERE n.degree IS NULL } as missing
+            """).single()['missing']
+    
+    def _read_summary(self) -> Dict[str, Any]:
+        with self.driver.session(database=self.database) as session:
+            record = session.run("""
+                MATCH (s:GraphSummary {id: $id})
+                RETURN properties(s) as summary
+            """, id=GRAPH_SUMMARY_ID).single()
+        if record and record['summary'].get('updated_at') is not None:
+            return record['summary']
+        return None
+    
+    def refresh_graph_summary(self, recompute_degrees: bool = None) -> Dict[str, Any]:
+        """
+        Recompute graph statistics and store them on the GraphSummary node
+        recompute_degrees: Also rewrite every entity's degree, by default only when some entity has none
+        """
+        if recompute_degrees is None:
+            recompute_degrees = self._has_entities_without_degree()
+        
+        start = time.perf_counter()
+        with self.driver.session(database=self.database) as session:
+            if recompute_degrees:
+                # A self-loop counts twice, like the loaders' increments
+                session.run("""
+                    MATCH (n:Entity)
+                    CALL {
+                        WITH n
+                        SET n.degree = COUNT { (n)-->() } + COUNT { (n)<--() }
+                    } IN TRANSACTIONS OF 10000 ROWS
+                """)
+            
+            # Totals come from the count store, the per-type counts take one pass each over nodes and relationships
+            total_nodes = session.run("MATCH (n:Entity) RETURN count(n) as count").single()['count']
+            total_relationships = session.run("MATCH ()-[r]->() RETURN count(r) as count").single()['count']
+            node_counts = [dict(record) for record in session.run("""
+                MATCH (n:Entity)
+                RETURN n.original_type as type, count(n) as count, sum(n.confidence) as confidence_sum, count(n.confidence) as confidence_count
+                ORDER BY count DESC
+            """)]
+            rel_counts = [dict(record) for record in session.run("""
+                MATCH ()-[r]->()
+                RETURN r.original_type as type, count(r) as count
+                ORDER BY count DESC
+            """)]
+            
+            confidence_count = sum(record.pop('confidence_count') for record in node_counts)
+            confidence_sum = sum(record.pop('confidence_sum') or 0 for record in node_counts)
+            summary = {
+                'total_nodes': total_nodes,
+                'total_relationships': total_relationships,
+                # Kept so load deltas can update the average
+                'confidence_sum': confidence_sum,
+                'confidence_count': confidence_count,
+                'average_confidence': confidence_sum / confidence_count if confidence_count else None,
+                # Lists of maps can't be node properties
+                'nodes_by_type': json.dumps(node_counts, ensure_ascii=False),
+                'relationships_by_type': json.dumps(rel_counts, ensure_ascii=False),
+                'updated_at': time.time()
+            }
+            session.run("""
+                MERGE (s:GraphSummary {id: $id})
+                SET s += $summary
+            """, id=GRAPH_SUMMARY_ID, summary=summary)
+        
+        logger.info(f"Graph summary refreshed in {time.perf_counter() - start:.2f}s"
+                    f"{' with degrees recomputed' if recompute_degrees else ''}")
+        return self._summary_to_statistics(summary)
+    
+    def apply_summary_delta(self, summary_delta: GraphSummaryDelta) -> Dict[str, Any]:
+        """
+        Add the count changes of a load to the GraphSummary node instead of recomputing it
+        Falls back to refresh_graph_summary when there is no summary yet or it predates the stored confidence sums
+        """
+        def apply(tx):
+            # Touching the node first takes its write lock, so concurrent loads apply their deltas one after another
+            record = tx.run("""
+                MATCH (s:GraphSummary {id: $id})
+                SET s.updated_at = $updated_at
+                RETURN properties(s) as summary
+            """, id=GRAPH_SUMMARY_ID, updated_at=time.time()).single()
+            if record is None or record['summary'].get('confidence_count') is None:
+                return None
+            
+            summary = record['summary']
+            confidence_sum = summary['confidence_sum'] + summary_delta.confidence_sum
+            confidence_count = summary['confidence_count'] + summary_delta.confidence_count
+            summary.update({
+                'total_nodes': summary['total_nodes'] + sum(summary_delta.nodes_by_type.values()),
+                'total_relationships': summary['total_relationships'] + sum(summary_delta.relationships_by_type.values()),
+                'confidence_sum': confidence_sum,
+                'confidence_count': confidence_count,
+                'average_confidence': confidence_sum / confidence_count if confidence_count else None,
+                'nodes_by_type': json.dumps(apply_type_counts(json.loads(summary['nodes_by_type']),
+                                                              summary_delta.nodes_by_type), ensure_ascii=False),
+                'relationships_by_type': json.dumps(apply_type_counts(json.loads(summary['relationships_by_type']),
+                                                                      summary_delta.relationships_by_type), ensure_ascii=False)
+            })
+            tx.run("""
+                MATCH (s:GraphSummary {id: $id})
+                SET s += $summary
+            """, id=GRAPH_SUMMARY_ID, summary=summary)
+            return summary
+        
+        with self.driver.session(database=self.database) as session:
+            summary = session.execute_write(apply)
+        if summary is None:
+            return self.refresh_graph_summary()
+        
+        logger.info(f"Graph summary updated with {sum(summary_delta.nodes_by_type.values())} entities and "
+                    f"{sum(summary_delta.relationships_by_type.values())} relationships")
+        return self._summary_to_statistics(summary)
+    
+    def _summary_to_statistics(self, summary: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'total_nodes': summary['total_nodes'],
+            'total_relationships': summary['total_relationships'],
+            'average_confidence': summary.get('average_confidence'),
+            'nodes_by_type': json.loads(summary['nodes_by_type']),
+            'relationships_by_type': json.loads(summary['relationships_by_type']),
+            'updated_at': summary['updated_at'],
+            'pagerank_computed_at': summary.get('pagerank_computed_at')
+        }
+    
+    def compute_pagerank(self, damping: float = PAGERANK_DAMPING, iterations: int = PAGERANK_ITERATIONS,
+                         tolerance: float = PAGERANK_TOLERANCE, batch_size: int = NEO4J_BATCH_SIZE) -> Dict[str, float]:
+        """
+        Compute PageRank over the entity relationships offline and store it as n.pagerank
+        The edges are read once and iterated in Python, no graph algorithms plugin is needed
+        """
+        start = time.perf_counter()
+        with self.driver.session(database=self.database) as session:
+            entity_ids = [record['id'] for record in session.run("MATCH (n:Entity) RETURN n.id as id")]
+            position = {entity_id: i for i, entity_id in enumerate(entity_ids)}
+            edges = [
+                (position[record['source']], position[record['target']])
+                for record in session.run("MATCH (a:Entity)-->(b:Entity) RETURN a.id as source, b.id as target")
+            ]
+        
+        node_count = len(entity_ids)
+        if not node_count:
+            return {}
+        out_degree = [0] * node_count
+        for source, _ in edges:
+            out_degree[source] += 1
+        
+        rank = [1.0 / node_count] * node_count
+        iteration = 0
+        for iteration in range(1, iterations + 1):
+            # Rank of nodes without outgoing edges is spread over every node
+            dangling = sum(rank[i] for i in range(node_count) if not out_degree[i])
+            base = (1 - damping) / node_count + damping * dangling / node_count
+            new_rank = [base] * node_count
+            for source, target in edges:
+                new_rank[target] += damping * rank[source] / out_degree[source]
+            delta = sum(abs(new - old) for new, old in zip(new_rank, rank))
+            rank = new_rank
+            if delta < tolerance:
+                break
+        
+        rows = [{'id': entity_id, 'pagerank': rank[i]} for i, entity_id in enumerate(entity_ids)]
+        with self.driver.session(database=self.database) as session:
+            self._run_batches(session, """
+                UNWIND $rows AS row
+                MATCH (n:Entity {id: row.id})
+                SET n.pagerank = row.pagerank
+                RETURN count(n) AS count
+            """, rows, batch_size)
+            session.run("""
+                MERGE (s:GraphSummary {id: $id})
+                SET s.pagerank_computed_at = $computed_at
+            """, id=GRAPH_SUMMARY_ID, computed_at=time.time())
+        
+        logger.info(f"PageRank of {node_count} entities over {len(edges)} relationships computed in "
+                    f"{iteration} iterations ({time.perf_counter() - start:.2f}s)")
+        return dict(zip(entity_ids, rank))
     
     # ========== QUERY METHODS ==========
     
     def search_entities(self, search_term: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """Search entities by text (case-insensitive)"""
+        """
+        Search entities by text (case-insensitive)
+        Uses the Turkish full-text index, every word of the search term has to match a word of the entity or its start
+        """
+        query = to_fulltext_query(search_term)
+        if not query:
+            return []
+        
         with self.driver.session(database=self.database) as session:
             result = session.run("""
-                MATCH (n:Entity)
-                WHERE toLower(n.text) CONTAINS toLower($search_term)
+                CALL db.index.fulltext.queryNodes($index, $query) YIELD node AS n, score
                 RETURN n.id as id, 
                        n.text as text,
                        n.original_type as type,
                        n.context as context,
                        n.confidence as confidence,
                        properties(n) as properties
-                ORDER BY n.confidence DESC
+                ORDER BY score DESC, n.confidence DESC
                 LIMIT $limit
-            """, search_term=search_term, limit=limit)
+            """, index=ENTITY_FULLTEXT_INDEX, query=query, limit=limit)
             
             return [dict(record) for record in result]
     
@@ -196,8 +706,7 @@ class Neo4jKnowledgeGraph:
         """Get full details of an entity and its relationships"""
         with self.driver.session(database=self.database) as session:
             result = session.run("""
-                MATCH (n:Entity)
-                WHERE toLower(n.text) = toLower($entity_text)
+                MATCH (n:Entity {text_key: $text_key})
                 OPTIONAL MATCH (n)-[r_out]->(m:Entity)
                 OPTIONAL MATCH (n)<-[r_in]-(p:Entity)
                 RETURN n.id as id,
@@ -220,7 +729,7 @@ class Neo4jKnowledgeGraph:
                            source_type: p.original_type,
                            confidence: r_in.confidence
                        }) as incoming
-            """, entity_text=entity_text)
+            """, text_key=get_text_key(entity_text))
             
             record = result.single()
             if not record:
@@ -232,8 +741,7 @@ class Neo4jKnowledgeGraph:
         """Get all entities of a specific type"""
         with self.driver.session(database=self.database) as session:
             result = session.run("""
-                MATCH (n:Entity)
-                WHERE toLower(n.original_type) = toLower($entity_type)
+                MATCH (n:Entity {type_key: $type_key})
                 RETURN n.id as id,
                        n.text as text,
                        n.original_type as type,
@@ -241,7 +749,7 @@ class Neo4jKnowledgeGraph:
                        n.confidence as confidence
                 ORDER BY n.confidence DESC
                 LIMIT $limit
-            """, entity_type=entity_type, limit=limit)
+            """, type_key=get_text_key(entity_type), limit=limit)
             
             return [dict(record) for record in result]
     
@@ -249,15 +757,13 @@ class Neo4jKnowledgeGraph:
         """Find shortest paths between two entities"""
         with self.driver.session(database=self.database) as session:
             result = session.run("""
-                MATCH (a:Entity), (b:Entity)
-                WHERE toLower(a.text) = toLower($entity1) 
-                  AND toLower(b.text) = toLower($entity2)
+                MATCH (a:Entity {text_key: $entity1_key}), (b:Entity {text_key: $entity2_key})
                 MATCH path = shortestPath((a)-[*..%d]-(b))
                 RETURN [node in nodes(path) | {text: node.text, type: node.original_type}] as nodes,
                        [rel in relationships(path) | rel.original_type] as relationships,
                        length(path) as path_length
                 LIMIT 5
-            """ % max_depth, entity1=entity1_text, entity2=entity2_text)
+            """ % max_depth, entity1_key=get_text_key(entity1_text), entity2_key=get_text_key(entity2_text))
             
             return [dict(record) for record in result]
     
@@ -265,8 +771,7 @@ class Neo4jKnowledgeGraph:
         """Get neighboring entities up to specified depth"""
         with self.driver.session(database=self.database) as session:
             result = session.run("""
-                MATCH (n:Entity)
-                WHERE toLower(n.text) = toLower($entity_text)
+                MATCH (n:Entity {text_key: $text_key})
                 MATCH path = (n)-[*1..%d]-(m:Entity)
                 RETURN n.text as start_entity,
                        n.original_type as start_type,
@@ -276,64 +781,44 @@ class Neo4jKnowledgeGraph:
                        length(path) as depth
                 ORDER BY depth
                 LIMIT $limit
-            """ % depth, entity_text=entity_text, limit=limit)
+            """ % depth, text_key=get_text_key(entity_text), limit=limit)
             
             return [dict(record) for record in result]
     
-    def get_graph_statistics(self) -> Dict[str, Any]:
-        """Get overall statistics about the knowledge graph"""
-        with self.driver.session(database=self.database) as session:
-            # Count nodes by type
-            node_counts = session.run("""
-                MATCH (n:Entity)
-                RETURN n.original_type as type, count(n) as count
-                ORDER BY count DESC
-            """)
-            
-            # Count relationships by type
-            rel_counts = session.run("""
-                MATCH ()-[r]->()
-                RETURN r.original_type as type, count(r) as count
-                ORDER BY count DESC
-            """)
-            
-            # Total counts
-            totals = session.run("""
-                MATCH (n:Entity)
-                OPTIONAL MATCH ()-[r]->()
-                RETURN count(DISTINCT n) as total_nodes,
-                       count(r) as total_relationships
-            """).single()
-            
-            # Average confidence
-            avg_conf = session.run("""
-                MATCH (n:Entity)
-                RETURN avg(n.confidence) as avg_confidence
-            """).single()
-            
-            return {
-                'total_nodes': totals['total_nodes'],
-                'total_relationships': totals['total_relationships'],
-                'average_confidence': avg_conf['avg_confidence'],
-                'nodes_by_type': [dict(record) for record in node_counts],
-                'relationships_by_type': [dict(record) for record in rel_counts]
-            }
+    def get_graph_statistics(self, refresh: bool = False) -> Dict[str, Any]:
+        """
+        Get overall statistics about the knowledge graph
+        Read from the GraphSummary node the loaders maintain, computed once if it doesn't exist yet
+        """
+        summary = None if refresh else self._read_summary()
+        if summary is not None:
+            return self._summary_to_statistics(summary)
+        
+        return self.refresh_graph_summary()
     
-    def find_central_entities(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """Find most connected entities (highest degree centrality)"""
+    def find_central_entities(self, limit: int = 10, by: str = 'degree') -> List[Dict[str, Any]]:
+        """
+        Find most connected entities (highest degree centrality)
+        by: 'degree' (maintained by the loaders) or 'pagerank' (after compute_pagerank), both stored on the nodes
+        """
+        if by not in CENTRALITY_MEASURES:
+            raise ValueError(f"Unknown centrality {by}, expected one of {', '.join(CENTRALITY_MEASURES)}")
+        # Degrees exist once the loaders have written a summary, a graph from before them gets both now
+        if self._read_summary() is None:
+            self.refresh_graph_summary()
+        
         with self.driver.session(database=self.database) as session:
             result = session.run("""
                 MATCH (n:Entity)
-                OPTIONAL MATCH (n)-[r]-()
-                WITH n, count(r) as connections
-                WHERE connections > 0
+                WHERE n.%s > 0
                 RETURN n.text as text,
                        n.original_type as type,
                        n.confidence as confidence,
-                       connections
-                ORDER BY connections DESC, n.confidence DESC
+                       n.degree as connections,
+                       n.pagerank as pagerank
+                ORDER BY n.%s DESC, n.confidence DESC
                 LIMIT $limit
-            """, limit=limit)
+            """ % (by, by), limit=limit)
             
             return [dict(record) for record in result]
     
@@ -4,13 +4,22 @@ Extracts entities dynamically without predefined categories using Groq LLM
 """
 
 import os
+import sys
 import json
+import hashlib
 import re
-from typing import List, Dict, Any, Set
-from dataclasses import dataclass, asdict
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Set, Tuple
+from dataclasses import dataclass, asdict, field
 from dotenv import load_dotenv
-from groq import Groq
+from groq import Groq, RateLimitError, APIConnectionError, InternalServerError
+import httpx
 import logging
+from alignment import align_entities
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -19,6 +28,35 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Calls go through the backend's per-model rate limiter when the backend is importable, so NER and
+# the RAG tests share one budget per model (across processes with LLM_RATE_LIMIT_MONGO_COORDINATION).
+# Without the backend's dependencies the script runs on its own with only the 429 pause below
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+try:
+    from backend.ai.llm.rate_limiter import RateLimiter, estimate_tokens
+except ImportError:
+    RateLimiter = None
+
+# Groq client settings: one pooled keep-alive client per extractor. The SDK does not retry,
+# _create_completion does, so every attempt goes through the rate limiter and a 429 is seen at once
+GROQ_REQUEST_TIMEOUT = 120  # seconds per request
+GROQ_MAX_CONNECTIONS = 10
+
+# Concurrent extraction: chunks processed at once (1 = one after another). A 429 pauses every
+# worker together, not just the one that hit it; 5xx and connection errors only back off the call
+NER_MAX_WORKERS = int(os.getenv('NER_MAX_WORKERS', '4'))
+NER_MAX_RETRIES = 5
+NER_RATE_LIMIT_BASE_DELAY = 5  # seconds, doubled on every further 429 of the same call
+NER_RATE_LIMIT_MAX_DELAY = 120
+NER_RETRY_BASE_DELAY = 1  # seconds, doubled on every further 5xx or connection error of the same call
+NER_RETRY_MAX_DELAY = 30
+
+# Per-chunk results are appended to a JSONL checkpoint keyed by a hash of the chunk text, model
+# and prompt version, so a restarted run or a run over an edited document only calls the LLM for
+# chunks it has not seen. Bump PROMPT_VERSION whenever a prompt changes to invalidate old results
+PROMPT_VERSION = 1
+NER_CHECKPOINT_FILE = os.getenv('NER_CHECKPOINT_FILE', 'ner_checkpoint.jsonl')
+
 
 @dataclass
 class NamedEntity:
@@ -29,6 +67,8 @@ class NamedEntity:
     end_pos: int  # End position in original text
     context: str  # Surrounding context
     properties: Dict[str, Any]  # Additional properties
+    occurrence_count: int = 0  # Exact occurrences in the document, set by alignment
+    occurrences: List[List[int]] = field(default_factory=list)  # [start, end] of every occurrence
     
     def to_dict(self):
         return asdict(self)
@@ -54,15 +94,87 @@ class TurkishNERExtractor:
     """
     
     def __init__(self):
-        self.client = Groq(api_key=os.getenv('GROQ_API_KEY'))
+        self.client = Groq(
+            api_key=os.getenv('GROQ_API_KEY'),
+            timeout=GROQ_REQUEST_TIMEOUT,
+            max_retries=0,
+            http_client=httpx.Client(
+                limits=httpx.Limits(max_connections=GROQ_MAX_CONNECTIONS,
+                                    max_keepalive_connections=GROQ_MAX_CONNECTIONS),
+                timeout=GROQ_REQUEST_TIMEOUT
+            )
+        )
         self.model = os.getenv('GROQ_MODEL', 'llama-3.3-70b-versatile')
-        self.entity_cache: Dict[str, NamedEntity] = {}
+        self.chunk_cache: Dict[str, Dict[str, Any]] = {}  # Checkpointed chunk results by chunk key
+        self._checkpoint_lock = threading.Lock()
         self.discovered_types: Set[str] = set()
+        self._rate_limit_lock = threading.Lock()
+        self._rate_limited_until = 0.0
+
+    def _wait_for_rate_limit(self):
+        """Sleep until the shared rate limit pause is over"""
+        while True:
+            with self._rate_limit_lock:
+                remaining = self._rate_limited_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    def _create_completion(self, **kwargs):
+        """
+        Chat completion that retries rate limits, server errors and connection failures
+        Each attempt holds a reservation of the shared model rate limiter when the backend is available.
+        All workers wait out the pause of a 429, honoring Retry-After when Groq sends it
+        """
+        limiter = RateLimiter().get(kwargs['model']) if RateLimiter is not None else None
+        estimated_tokens = estimate_tokens([message['content'] for message in kwargs['messages']]) if limiter else 0
+        for attempt in range(NER_MAX_RETRIES + 1):
+            self._wait_for_rate_limit()
+            if limiter:
+                limiter.acquire(estimated_tokens)
+            start = time.perf_counter()
+            try:
+                response = self.client.chat.completions.create(**kwargs)
+            except RateLimitError as e:
+                if limiter:
+                    limiter.release(rate_limited=True)
+                if attempt == NER_MAX_RETRIES:
+                    raise
+                retry_after = e.response.headers.get('retry-after') if e.response is not None else None
+                try:
+                    delay = float(retry_after)
+                except (TypeError, ValueError):
+                    delay = min(NER_RATE_LIMIT_BASE_DELAY * 2 ** attempt, NER_RATE_LIMIT_MAX_DELAY)
+                delay += random.uniform(0, 1)
+                with self._rate_limit_lock:
+                    self._rate_limited_until = max(self._rate_limited_until, time.monotonic() + delay)
+                logger.warning(f"Rate limited by Groq, pausing all requests for {delay:.1f}s "
+                               f"(attempt {attempt + 1}/{NER_MAX_RETRIES})")
+            except (APIConnectionError, InternalServerError) as e:
+                if limiter:
+                    limiter.release()
+                if attempt == NER_MAX_RETRIES:
+                    raise
+                delay = random.uniform(0, min(NER_RETRY_BASE_DELAY * 2 ** attempt, NER_RETRY_MAX_DELAY))
+                logger.warning(f"Groq call failed ({e}), retrying in {delay:.1f}s "
+                               f"(attempt {attempt + 1}/{NER_MAX_RETRIES})")
+                time.sleep(delay)
+            except Exception:
+                if limiter:
+                    limiter.release()
+                raise
+            else:
+                if limiter:
+                    usage = getattr(response, 'usage', None)
+                    limiter.release(time.perf_counter() - start, estimated_tokens=estimated_tokens,
+                                    actual_tokens=getattr(usage, 'total_tokens', None))
+                return response
         
-    def extract_entities_from_chunk(self, text: str, chunk_index: int = 0) -> List[NamedEntity]:
+    def extract_entities_from_chunk(self, text: str, chunk_index: int = 0, raise_errors: bool = False) -> List[NamedEntity]:
         """
         Extract named entities from a text chunk using LLM
         Discovers entity types dynamically from the content
+        raise_errors: Raise instead of returning no entities when the call or its JSON fails
         """
         
         prompt = f"""You are an expert in Turkish Named Entity Recognition for healthcare and legal documents.
@@ -117,7 +229,7 @@ CRITICAL RULES:
 8. Return ONLY valid JSON, no markdown or explanations"""
 
         try:
-            response = self.client.chat.completions.create(
+            response = self._create_completion(
                 model=self.model,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.1,
@@ -163,13 +275,17 @@ CRITICAL RULES:
             return entities
             
         except Exception as e:
+            if raise_errors:
+                raise
             logger.error(f"Error extracting entities from chunk {chunk_index}: {e}")
             return []
     
-    def extract_relations_from_chunk(self, text: str, entities: List[NamedEntity], chunk_index: int = 0) -> List[EntityRelation]:
+    def extract_relations_from_chunk(self, text: str, entities: List[NamedEntity], chunk_index: int = 0,
+                                     raise_errors: bool = False) -> List[EntityRelation]:
         """
         Extract relationships between entities in a chunk
         Discovers relationship types dynamically
+        raise_errors: Raise instead of returning no relations when the call or its JSON fails
         """
         
         if len(entities) < 2:
@@ -229,7 +345,7 @@ RULES:
 6. Return ONLY valid JSON"""
 
         try:
-            response = self.client.chat.completions.create(
+            response = self._create_completion(
                 model=self.model,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.1,
@@ -260,6 +376,8 @@ RULES:
             return relations
             
         except Exception as e:
+            if raise_errors:
+                raise
             logger.error(f"Error extracting relations from chunk {chunk_index}: {e}")
             return []
     
@@ -285,13 +403,15 @@ RULES:
                 search_start = max(end - 200, start)
                 substring = text[search_start:end]
                 
-                # Find last period or newline
-                last_period = substring.rfind('. ')
-                last_newline = substring.rfind('\n')
-                last_delim = max(last_period, last_newline)
+                # Cut at the period or newline whose preceding text hashes lowest rather than the
+                # last one, so boundaries follow the content and an edit leaves later chunks (and
+                # their checkpointed results) unchanged
+                delims = [i for i, ch in enumerate(substring) if ch == '\n' or substring.startswith('. ', i)]
                 
-                if last_delim != -1:
-                    end = search_start + last_delim + 1
+                if delims:
+                    best_delim = min(delims, key=lambda i: zlib.crc32(
+                        text[max(search_start + i - 32, 0):search_start + i + 1].encode('utf-8')))
+                    end = search_start + best_delim + 1
             
             chunk_text = text[start:end]
             
@@ -320,11 +440,100 @@ RULES:
         logger.info(f"Split text into {len(chunks)} chunks")
         return chunks
     
-    def extract_from_document(self, text: str, max_chunks: int = None) -> Dict[str, Any]:
+    def get_chunk_key(self, chunk_text: str) -> str:
+        """Checkpoint key of a chunk: its text, the model and the prompt version"""
+        return hashlib.sha256(f"{self.model}\n{PROMPT_VERSION}\n{chunk_text}".encode('utf-8')).hexdigest()
+    
+    def load_checkpoint(self, checkpoint_file: str) -> int:
+        """
+        Load checkpointed chunk results into the chunk cache
+        A line cut off by a crash is skipped, that chunk is extracted again
+        """
+        self.chunk_cache = {}
+        if not os.path.exists(checkpoint_file):
+            return 0
+        
+        with open(checkpoint_file, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping unreadable line {line_number} of checkpoint {checkpoint_file}")
+                    continue
+                self.chunk_cache[record['key']] = record
+        
+        logger.info(f"Loaded {len(self.chunk_cache)} checkpointed chunks from {checkpoint_file}")
+        return len(self.chunk_cache)
+    
+    def _append_checkpoint(self, checkpoint_file: str, record: Dict[str, Any]):
+        """Append one chunk result to the checkpoint, flushed so a crash keeps it"""
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._checkpoint_lock:
+            with open(checkpoint_file, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self.chunk_cache[record['key']] = record
+    
+    def process_chunk(self, chunk_info: Dict[str, Any], checkpoint_file: str = None) -> Tuple[List[NamedEntity], List[EntityRelation]]:
+        """
+        Extract the entities and relations of one chunk
+        Entity positions are moved to document coordinates
+        checkpoint_file: Reuse a checkpointed result of the same chunk text, or checkpoint the new one
+        """
+        chunk_idx = chunk_info['index']
+        chunk_text = chunk_info['text']
+        chunk_start = chunk_info['start_pos']
+        chunk_key = self.get_chunk_key(chunk_text)
+        
+        cached = self.chunk_cache.get(chunk_key) if checkpoint_file else None
+        if cached is not None:
+            entities = [NamedEntity(**e) for e in cached['entities']]
+            relations = [EntityRelation(**r) for r in cached['relations']]
+            self.discovered_types.update(entity.type for entity in entities)
+            logger.info(f"Chunk {chunk_idx}: Reused {len(entities)} entities and {len(relations)} relations from checkpoint")
+        else:
+            try:
+                # Extract entities
+                entities = self.extract_entities_from_chunk(chunk_text, chunk_idx, raise_errors=checkpoint_file is not None)
+                
+                # Extract relations (only if we have entities)
+                relations = []
+                if len(entities) >= 2:
+                    relations = self.extract_relations_from_chunk(chunk_text, entities, chunk_idx,
+                                                                  raise_errors=checkpoint_file is not None)
+            except Exception as e:
+                # Not checkpointed, the next run tries this chunk again
+                logger.error(f"Error extracting chunk {chunk_idx}, it will be retried on the next run: {e}")
+                return [], []
+            
+            # Checkpointed positions are relative to the chunk, it may start elsewhere after an edit
+            if checkpoint_file:
+                self._append_checkpoint(checkpoint_file, {
+                    'key': chunk_key,
+                    'model': self.model,
+                    'prompt_version': PROMPT_VERSION,
+                    'chunk_index': chunk_idx,
+                    'entities': [e.to_dict() for e in entities],
+                    'relations': [r.to_dict() for r in relations]
+                })
+        
+        # Adjust positions to document coordinates
+        for entity in entities:
+            entity.start_pos += chunk_start
+            entity.end_pos += chunk_start
+        
+        return entities, relations
+    
+    def extract_from_document(self, text: str, max_chunks: int = None, max_workers: int = None,
+                              checkpoint_file: str = NER_CHECKPOINT_FILE) -> Dict[str, Any]:
         """
         Extract all entities and relations from a complete document
         max_chunks: Limit number of chunks to process (for testing)
+        max_workers: Chunks processed concurrently, NER_MAX_WORKERS by default, 1 processes them in order
+        checkpoint_file: JSONL file of per-chunk results to resume from and append to, None disables it
         """
+        max_workers = max_workers or NER_MAX_WORKERS
         logger.info(f"Starting NER extraction from document (length: {len(text)} chars)...")
         
         # Reset discovered types for this document
@@ -339,43 +548,47 @@ RULES:
             logger.info(f"Limiting to first {max_chunks} chunks for testing")
             chunks = chunks[:max_chunks]
         
-        all_entities = []
-        all_relations = []
-        entity_texts_seen = set()  # For deduplication
+        if checkpoint_file:
+            self.load_checkpoint(checkpoint_file)
+            cached_chunks = sum(1 for chunk_info in chunks if self.get_chunk_key(chunk_info['text']) in self.chunk_cache)
+            logger.info(f"{cached_chunks}/{len(chunks)} chunks are already in the checkpoint, "
+                        f"{len(chunks) - cached_chunks} need the LLM")
         
         # Process chunks with progress updates
         total_chunks = len(chunks)
-        for chunk_info in chunks:
-            chunk_idx = chunk_info['index']
-            chunk_text = chunk_info['text']
-            chunk_start = chunk_info['start_pos']
-            
-            # Progress update
-            progress = ((chunk_idx + 1) / total_chunks) * 100
-            logger.info(f"Processing chunk {chunk_idx + 1}/{total_chunks} ({progress:.1f}%)")
-            
-            # Extract entities
-            entities = self.extract_entities_from_chunk(chunk_text, chunk_idx)
+        chunk_results = {}
+        if max_workers <= 1:
+            for chunk_info in chunks:
+                chunk_idx = chunk_info['index']
+                progress = ((chunk_idx + 1) / total_chunks) * 100
+                logger.info(f"Processing chunk {chunk_idx + 1}/{total_chunks} ({progress:.1f}%)")
+                chunk_results[chunk_idx] = self.process_chunk(chunk_info, checkpoint_file)
+        else:
+            logger.info(f"Processing {total_chunks} chunks with {max_workers} workers")
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ner') as executor:
+                futures = {executor.submit(self.process_chunk, chunk_info, checkpoint_file): chunk_info['index'] for chunk_info in chunks}
+                for done, future in enumerate(as_completed(futures), 1):
+                    chunk_results[futures[future]] = future.result()
+                    logger.info(f"Finished chunk {futures[future] + 1} ({done}/{total_chunks}, {(done / total_chunks) * 100:.1f}%)")
+        
+        # Merge in chunk order so the kept duplicate does not depend on which request finished first
+        all_entities = []
+        all_relations = []
+        entity_texts_seen = set()  # For deduplication
+        for chunk_idx in sorted(chunk_results):
+            entities, relations = chunk_results[chunk_idx]
             
-            # Adjust positions to document coordinates and deduplicate
+            # Deduplicate by text and type
             for entity in entities:
-                entity.start_pos += chunk_start
-                entity.end_pos += chunk_start
-                
-                # Deduplicate by text and type
                 entity_key = (entity.text.lower(), entity.type)
                 if entity_key not in entity_texts_seen:
                     entity_texts_seen.add(entity_key)
                     all_entities.append(entity)
             
-            # Extract relations (only if we have entities)
-            if len(entities) >= 2:
-                relations = self.extract_relations_from_chunk(chunk_text, entities, chunk_idx)
-                all_relations.extend(relations)
-            
-            # Periodic summary every 5 chunks
-            if (chunk_idx + 1) % 5 == 0:
-                logger.info(f"Progress: {len(all_entities)} entities, {len(all_relations)} relations so far")
+            all_relations.extend(relations)
+        
+        # Exact document offsets and occurrence counts in place of the LLM's approximate positions
+        align_entities(text, all_entities)
         
         # Deduplicate relations
         unique_relations = []